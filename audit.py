@@ -0,0 +1,118 @@
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Set
+
+from config import config
+from database import db
+from near_duplicates import near_duplicate_index, simhash
+from wordpress_client import wordpress_client
+
+# Pontuação que um post costuma atingir depois de otimizado; o ganho
+# esperado é a distância até ela
+TARGET_SCORE = 90
+
+# Motor de pontuação de cada processo de trabalho (criado no initializer)
+_worker_scorer = None
+
+def _init_worker(site_domain: str):
+    global _worker_scorer
+    from seo_scoring import SEOScorer
+    _worker_scorer = SEOScorer(site_domain=site_domain)
+
+def _score_page(posts: List[Dict]) -> List[Dict]:
+    """Pontua uma página de posts (roda em um processo de trabalho)"""
+    results = []
+    for post in posts:
+        report = _worker_scorer.score(post['title'], post['excerpt'], post['content'])
+        results.append({
+            'post_id': post['id'],
+            'title': post['title'],
+            'link': post['link'],
+            'score': report.score,
+            'rules': report.to_dict()['rules'],
+            'post_modified': post['modified'],
+            'categories': post['categories'],
+            'simhash': simhash(post['title'], post['content'])
+        })
+    return results
+
+def _slim(post: Dict) -> Dict:
+    """Reduz o post da API ao necessário para pontuar (menos dados entre processos)"""
+    return {
+        'id': post['id'],
+        'link': post.get('link', ''),
+        'modified': post.get('modified', ''),
+        'categories': post.get('categories', []),
+        'title': post.get('title', {}).get('rendered', ''),
+        'excerpt': post.get('excerpt', {}).get('rendered', ''),
+        'content': post.get('content', {}).get('rendered', ''),
+    }
+
+class ArchiveAuditor:
+    """
+    Auditoria de SEO do acervo: percorre todos os posts publicados página
+    por página, pontua cada página em um processo de trabalho e grava as
+    notas em `post_scores`, alimentando também o índice de quase
+    duplicatas. No máximo `workers * 2` páginas ficam em memória ao mesmo
+    tempo, independentemente do tamanho do acervo.
+    """
+
+    def __init__(self, workers: Optional[int] = None, per_page: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.workers = workers or os.cpu_count() or 1
+        self.per_page = per_page
+        self.max_pending = self.workers * 2
+
+    def run(self) -> Dict:
+        """Executa a auditoria completa e retorna um resumo"""
+        settings = config.snapshot()
+        optimizable_ids = settings.optimizable_category_ids
+        optimized_ids = db.get_optimized_post_ids()
+
+        start = time.time()
+        summary = {'posts_scored': 0, 'pages': 0, 'score_sum': 0}
+        pending: Set[Future] = set()
+
+        self.logger.info(f"Iniciando auditoria do acervo com {self.workers} processos")
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(settings.wordpress_domain,)) as pool:
+            for page in wordpress_client.iter_published_posts(per_page=self.per_page):
+                pending.add(pool.submit(_score_page, [_slim(post) for post in page]))
+                summary['pages'] += 1
+
+                # Contrapressão: espera páginas terminarem antes de buscar mais
+                while len(pending) >= self.max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._store(done, optimizable_ids, optimized_ids, summary)
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                self._store(done, optimizable_ids, optimized_ids, summary)
+
+        summary['processing_time'] = time.time() - start
+        summary['average_score'] = (
+            summary['score_sum'] / summary['posts_scored'] if summary['posts_scored'] else 0
+        )
+        del summary['score_sum']
+        self.logger.info(
+            f"Auditoria concluída: {summary['posts_scored']} posts em "
+            f"{summary['processing_time']:.1f}s (nota média {summary['average_score']:.1f})"
+        )
+        return summary
+
+    def _store(self, done: Set[Future], optimizable_ids, optimized_ids: Set[int], summary: Dict):
+        for future in done:
+            scores = future.result()
+            for item in scores:
+                item['optimizable'] = bool(optimizable_ids & set(item.pop('categories')))
+                item['optimized'] = item['post_id'] in optimized_ids
+                item['expected_gain'] = max(0, TARGET_SCORE - item['score'])
+                summary['score_sum'] += item['score']
+            db.save_post_scores(scores)
+            # A auditoria também alimenta o índice de quase duplicatas com o acervo
+            near_duplicate_index.add_many([
+                (item['post_id'], item.pop('simhash'), item['title']) for item in scores
+            ])
+            summary['posts_scored'] += len(scores)
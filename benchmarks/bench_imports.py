@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark de tempo de import e de inicialização da CLI.
+
+Cada cenário roda em um subprocesso novo (sem cache de módulos), várias
+vezes, e reporta a mediana. Executa a partir de um diretório temporário
+para não tocar no banco nem no log do projeto.
+
+Uso:
+  python benchmarks/bench_imports.py
+  python benchmarks/bench_imports.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'import config': 'import config',
+    'import database': 'import database',
+    'import seo_optimizer': 'import seo_optimizer',
+    'import main': 'import main',
+    'import dashboard': 'import dashboard',
+    'main --stats': 'import sys; sys.argv = ["main.py", "--stats"]; import main; main.main()',
+}
+
+# Valores fictícios: o benchmark nunca deve falar com serviços reais
+FAKE_ENV = {
+    'WORDPRESS_URL': 'http://127.0.0.1:9',
+    'WORDPRESS_USERNAME': 'bench',
+    'WORDPRESS_PASSWORD': 'bench',
+    'GEMINI_API_KEY': 'bench-key',
+    'TMDB_API_KEY': 'bench-key',
+}
+
+def run_scenario(code: str, workdir: str) -> float:
+    """Executa um cenário em um interpretador novo e retorna o tempo em segundos"""
+    env = dict(os.environ)
+    env.update(FAKE_ENV)
+    env['PYTHONPATH'] = PROJECT_DIR
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        check=False
+    )
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de tempo de import")
+    parser.add_argument('--runs', type=int, default=5, help='Execuções por cenário')
+    args = parser.parse_args()
+
+    baseline = None
+    with tempfile.TemporaryDirectory() as workdir:
+        baseline = statistics.median(run_scenario('pass', workdir) for _ in range(args.runs))
+
+        print(f"{'Cenário':<24} {'Mediana':>10} {'Sobre o interpretador':>24}")
+        print("-" * 60)
+        print(f"{'python -c pass':<24} {baseline * 1000:>8.1f}ms {'-':>24}")
+
+        for name, code in SCENARIOS.items():
+            timings = [run_scenario(code, workdir) for _ in range(args.runs)]
+            median = statistics.median(timings)
+            print(f"{name:<24} {median * 1000:>8.1f}ms {(median - baseline) * 1000:>22.1f}ms")
+
+if __name__ == "__main__":
+    main()
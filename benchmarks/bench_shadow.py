@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Teste de carga do pipeline em modo simulação (DRY_RUN).
+
+Sobe um WordPress falso local (fake_wordpress.py) com posts sintéticos e
+roda `main.py --dry-run --drain` em N processos, que dividem os posts por
+leases. Nada é escrito no WordPress nem no banco de produção: o benchmark
+confere que o servidor falso não recebeu nenhuma escrita e que o banco base
+(criado antes, como o de uma produção em uso) ficou igual, e reporta a
+vazão e o tempo da etapa do Gemini, lidos do banco de simulação.
+
+Sem --gemini-latency, usa as chaves Gemini reais do ambiente/.env (teste
+da etapa do LLM); com ela, o Gemini é trocado por uma resposta fixa com
+essa latência, para medir só o restante do pipeline.
+
+Uso:
+  python benchmarks/bench_shadow.py --posts 50 --workers 2
+  python benchmarks/bench_shadow.py --posts 200 --workers 4 --gemini-latency 0.5
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_wordpress import FakeWordPress
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cada processo: troca o Gemini se pedido e roda a drenagem em modo simulação
+WORKER_CODE = '''
+import sys, time
+latency = float(sys.argv[1])
+if latency >= 0:
+    from gemini_client import GeminiClient
+    def optimize_content(self, title, excerpt, content, tags_text, max_retries=3):
+        time.sleep(latency)
+        return {'title': title, 'excerpt': excerpt, 'content': content + '<p>Conclusão.</p>'}
+    GeminiClient.initialize_client = lambda self: None
+    GeminiClient.optimize_content = optimize_content
+sys.argv = ['main.py', '--dry-run', '--drain']
+import main
+main.main()
+'''
+
+# Banco base de "produção", criado antes da simulação com uso registrado na chave 1
+PREPARE_CODE = '''
+from database import db
+db.update_key_usage(0)
+'''
+
+# Credenciais fictícias do WordPress falso (as chaves Gemini vêm do ambiente)
+FAKE_ENV = {
+    'WORDPRESS_USERNAME': 'bench',
+    'WORDPRESS_PASSWORD': 'bench',
+    'TMDB_API_KEY': 'bench-key',
+    'TMDB_ENRICHMENT_ENABLED': 'false',
+    'TENANTS_FILE': '',
+    'GEMINI_DAILY_REQUESTS_PER_KEY': '0',
+}
+
+def database_fingerprint(path: str, skip_tables=()) -> str:
+    """Hash do conteúdo de um banco SQLite (schema e linhas), ignorando `skip_tables`"""
+    digest = hashlib.sha1()
+    conn = sqlite3.connect(path)
+    try:
+        for line in conn.iterdump():
+            if not any(f'"{table}"' in line for table in skip_tables):
+                digest.update(line.encode('utf-8'))
+    finally:
+        conn.close()
+    return digest.hexdigest()
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do pipeline em modo simulação")
+    parser.add_argument('--posts', type=int, default=50, help='Posts sintéticos no WordPress falso')
+    parser.add_argument('--workers', type=int, default=1, help='Processos de drenagem em paralelo')
+    parser.add_argument('--gemini-latency', type=float, default=None,
+                        help='Substitui o Gemini por uma resposta fixa com esta latência (s)')
+    parser.add_argument('--batch', type=int, default=20, help='DRAIN_MAX_BATCH de cada processo')
+    args = parser.parse_args()
+
+    server = FakeWordPress(args.posts).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update(FAKE_ENV)
+        env.update({
+            'WORDPRESS_URL': server.url,
+            'DATABASE_PATH': os.path.join(workdir, 'bench.db'),
+            'DRAIN_MAX_BATCH': str(args.batch),
+            'PYTHONPATH': PROJECT_DIR,
+            'PYTHONDONTWRITEBYTECODE': '1',
+        })
+        if args.gemini_latency is not None:
+            env.setdefault('GEMINI_API_KEY', 'bench-key')
+        latency = args.gemini_latency if args.gemini_latency is not None else -1
+
+        base_path = os.path.join(workdir, 'bench.db')
+        subprocess.run([sys.executable, '-c', PREPARE_CODE], cwd=workdir, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # Com o Gemini real, a quota (compartilhada com a produção) muda legitimamente
+        skip_tables = ('gemini_quota',) if args.gemini_latency is None else ()
+        base_before = database_fingerprint(base_path, skip_tables)
+
+        start = time.perf_counter()
+        workers = [
+            subprocess.Popen([sys.executable, '-c', WORKER_CODE, str(latency)], cwd=workdir, env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            for _ in range(args.workers)
+        ]
+        failed = sum(1 for worker in workers if worker.wait() != 0)
+        elapsed = time.perf_counter() - start
+        base_unchanged = database_fingerprint(base_path, skip_tables) == base_before
+
+        shadow_path = os.path.join(workdir, 'bench.shadow.db')
+        rows = []
+        if os.path.exists(shadow_path):
+            with sqlite3.connect(shadow_path) as conn:
+                rows = conn.execute('SELECT post_id, gemini_seconds, seo_score_before, seo_score_after '
+                                    'FROM shadow_results').fetchall()
+    server.stop()
+
+    post_ids = [row[0] for row in rows]
+    gemini_times = [row[1] for row in rows]
+    print(f"Processos: {args.workers} ({failed} com erro)   Posts no WordPress falso: {args.posts}")
+    print(f"Posts simulados: {len(rows)} ({len(post_ids) - len(set(post_ids))} duplicados)")
+    print(f"Escritas recebidas pelo WordPress: {len(server.writes)}")
+    print(f"Banco base (produção) inalterado: {'sim' if base_unchanged else 'NÃO'}")
+    print(f"Tempo total: {elapsed:.1f}s   Vazão: {len(rows) / elapsed * 60:.1f} posts/min")
+    if gemini_times:
+        print(f"Gemini por post: mediana {statistics.median(gemini_times):.2f}s, "
+              f"p95 {percentile(gemini_times, 0.95):.2f}s")
+        print(f"Pontuação SEO média: {statistics.mean(row[2] for row in rows):.0f} -> "
+              f"{statistics.mean(row[3] for row in rows):.0f}")
+    if server.writes or not base_unchanged:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
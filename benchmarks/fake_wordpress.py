@@ -0,0 +1,134 @@
+"""
+WordPress falso para benchmarks e para o modo simulação.
+
+Serve, em uma thread, as rotas da API REST que o pipeline lê (posts
+paginados do mais novo para o mais antigo, post por ID, usuário atual,
+tags e categorias) com posts sintéticos e determinísticos de filmes.
+Qualquer escrita (POST/PUT/DELETE) é respondida e contada em `writes`,
+para conferir que uma execução em DRY_RUN não altera o site.
+
+Uso:
+  python benchmarks/fake_wordpress.py --posts 200 --port 8780
+"""
+
+import argparse
+import json
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlsplit
+
+# Mesmos IDs padrão da configuração (autor alvo e categoria de filmes)
+AUTHOR_ID = 6
+MOVIE_CATEGORY_ID = 24
+
+_WORDS = ('filme', 'estreia', 'elenco', 'diretor', 'trailer', 'bilheteria', 'crítica', 'roteiro',
+          'sequência', 'personagem', 'cena', 'estúdio', 'cinema', 'streaming', 'temporada', 'história')
+_TAGS = ('Marvel', 'DC', 'Netflix', 'Disney', 'Oscar', 'Terror', 'Animação', 'Ficção científica')
+
+def fake_post(post_id: int, total: int) -> Dict:
+    """Post sintético: ~5 parágrafos, uma tag e publicação a cada hora"""
+    rnd = random.Random(post_id)
+    paragraphs = ''.join(
+        '<p>' + ' '.join(rnd.choice(_WORDS) for _ in range(rnd.randint(30, 70))) + '.</p>'
+        for _ in range(5)
+    )
+    tag = rnd.randrange(len(_TAGS))
+    published = datetime.now(timezone.utc) - timedelta(hours=total - post_id)
+    return {
+        'id': post_id,
+        'author': AUTHOR_ID,
+        'status': 'publish',
+        'link': f'https://exemplo.com.br/post-{post_id}/',
+        'date_gmt': published.strftime('%Y-%m-%dT%H:%M:%S'),
+        'modified': published.strftime('%Y-%m-%dT%H:%M:%S'),
+        'title': {'rendered': f'{_TAGS[tag]}: {rnd.choice(_WORDS)} {post_id} ganha {rnd.choice(_WORDS)}'},
+        'excerpt': {'rendered': f'<p>{" ".join(rnd.choice(_WORDS) for _ in range(25))}</p>'},
+        'content': {'rendered': paragraphs},
+        '_embedded': {'wp:term': [
+            [{'id': MOVIE_CATEGORY_ID, 'name': 'Filmes', 'link': 'https://exemplo.com.br/category/filmes/'}],
+            [{'id': 100 + tag, 'name': _TAGS[tag], 'link': f'https://exemplo.com.br/tag/{100 + tag}/'}],
+        ]},
+    }
+
+class FakeWordPress:
+    """Servidor HTTP local com `total` posts (IDs de 1 a `total`)"""
+
+    def __init__(self, total: int = 100, port: int = 0):
+        self.total = total
+        self.writes: List[str] = []
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeWordPress':
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, payload, headers=()):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = parse_qs(parts.query)
+                if parts.path.endswith('/posts'):
+                    per_page = int(query.get('per_page', ['10'])[0])
+                    page = int(query.get('page', ['1'])[0])
+                    ids = list(range(fake.total, 0, -1))[(page - 1) * per_page:page * per_page]
+                    total_pages = -(-fake.total // per_page)
+                    self._send([fake_post(post_id, fake.total) for post_id in ids],
+                               [('X-WP-TotalPages', str(total_pages))])
+                elif '/posts/' in parts.path:
+                    self._send(fake_post(int(parts.path.rstrip('/').rsplit('/', 1)[1]), fake.total))
+                elif parts.path.endswith('/users/me'):
+                    self._send({'id': 9, 'name': 'Benchmark'})
+                else:
+                    # Tags, categorias e demais listas: vazias
+                    self._send([], [('X-WP-TotalPages', '1')])
+
+            def _write(self):
+                fake.writes.append(f'{self.command} {urlsplit(self.path).path}')
+                self._send({'id': 0})
+
+            do_POST = do_PUT = do_DELETE = _write
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="WordPress falso para benchmarks")
+    parser.add_argument('--posts', type=int, default=100, help='Quantidade de posts sintéticos')
+    parser.add_argument('--port', type=int, default=8780, help='Porta local')
+    args = parser.parse_args()
+
+    server = FakeWordPress(args.posts, args.port).start()
+    print(f"WordPress falso em {server.url} com {args.posts} posts (Ctrl+C para sair)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import config, current_tenant
+from database import db
+from events import event_bus
+from lazy import LazySingleton
+
+# Dependências externas com circuit breaker (o do WordPress é um por tenant)
+GEMINI = 'gemini'
+TMDB = 'tmdb'
+WORDPRESS = 'wordpress'
+
+# Tamanho máximo do último erro guardado no estado do circuito
+MAX_ERROR_LENGTH = 300
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem tentar: o circuito da dependência está aberto"""
+
+    def __init__(self, name: str, retry_at: float):
+        self.name = name
+        self.retry_at = retry_at
+        super().__init__(
+            f"{name} indisponível (circuito aberto, nova tentativa em {max(0, round(retry_at - time.time()))}s)"
+        )
+
+def _epoch_to_iso(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value).isoformat(timespec='seconds') if value else None
+
+class CircuitBreaker:
+    """
+    Circuit breaker de uma dependência externa, com o estado na tabela
+    `circuit_breakers` do banco base: orquestrador, workers e dashboard
+    enxergam (e alimentam) o mesmo circuito.
+
+    - fechado: as chamadas passam; CIRCUIT_FAILURE_THRESHOLD falhas
+      seguidas abrem o circuito;
+    - aberto: as chamadas são recusadas na hora (CircuitOpenError) por
+      CIRCUIT_OPEN_SECONDS;
+    - meio-aberto: vencida a espera, uma única chamada de teste passa (a
+      reserva é atômica entre processos); sucesso fecha o circuito, falha
+      o abre por mais CIRCUIT_OPEN_SECONDS.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+    def allow(self) -> bool:
+        """Indica se a chamada pode ser feita (no meio-aberto, reserva a chamada de teste)"""
+        state = db.get_circuit_breaker(self.name)
+        if not state or state['state'] == 'closed':
+            return True
+        if state['retry_at'] > time.time():
+            return False
+        if db.claim_circuit_probe(self.name, time.time() + config.circuit_open_seconds):
+            self.logger.info(f"Circuito {self.name} meio-aberto: testando a dependência com uma chamada")
+            return True
+        return False
+
+    def check(self):
+        """Como `allow`, mas levanta CircuitOpenError quando a chamada é recusada"""
+        if not self.allow():
+            raise self.open_error()
+
+    def available(self) -> bool:
+        """Fechado ou com a espera vencida (a próxima chamada será o teste); não reserva nada"""
+        state = db.get_circuit_breaker(self.name)
+        return not state or state['state'] == 'closed' or state['retry_at'] <= time.time()
+
+    def open_error(self) -> CircuitOpenError:
+        state = db.get_circuit_breaker(self.name) or {}
+        return CircuitOpenError(self.name, state.get('retry_at') or time.time())
+
+    def record_success(self):
+        if db.close_circuit_breaker(self.name):
+            self.logger.info(f"Circuito {self.name} fechado: a dependência voltou a responder")
+            event_bus.publish('circuit_changed', {'name': self.name, 'state': 'closed'})
+
+    def record_failure(self, error):
+        settings = config.snapshot()
+        retry_at = time.time() + settings.circuit_open_seconds
+        state = db.record_circuit_failure(self.name, str(error)[:MAX_ERROR_LENGTH],
+                                          settings.circuit_failure_threshold, retry_at)
+        if state['state'] == 'open' and state['retry_at'] == retry_at:
+            self.logger.warning(
+                f"Circuito {self.name} aberto após {state['failures']} falhas seguidas ({error}); "
+                f"chamadas recusadas por {settings.circuit_open_seconds}s"
+            )
+            event_bus.publish('circuit_changed', {'name': self.name, 'state': 'open'})
+
+class CircuitBreakerRegistry:
+    """Circuit breakers do processo, um por dependência (WordPress: um por site)"""
+
+    def __init__(self):
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name)
+            return self._breakers[name]
+
+    def wordpress(self) -> CircuitBreaker:
+        """Circuito do WordPress do tenant ativo"""
+        tenant = current_tenant()
+        return self.get(WORDPRESS if tenant is None else f"{WORDPRESS}:{tenant}")
+
+    def summary(self) -> Dict[str, Dict]:
+        """Estado de todos os circuitos, para o status do sistema"""
+        now = time.time()
+        summary = {name: {'state': 'closed', 'failures': 0} for name in (self.wordpress().name, GEMINI, TMDB)}
+        for state in db.get_circuit_breakers():
+            retry_in = max(0, round(state['retry_at'] - now)) if state['state'] != 'closed' else None
+            summary[state['name']] = {
+                'state': state['state'],
+                'failures': state['failures'],
+                'opened_at': _epoch_to_iso(state['opened_at']),
+                'retry_in_seconds': retry_in,
+                'last_error': state['last_error'],
+            }
+        return summary
+
+def guarded_adapter(breaker: CircuitBreaker, timeout: Optional[float] = None, **adapter_options):
+    """
+    HTTPAdapter do requests que passa cada requisição pelo circuit breaker:
+    erros de rede e respostas 5xx contam como falha, as demais respostas
+    como sucesso. Com `timeout`, é o padrão das requisições sem timeout.
+    """
+    from requests.adapters import HTTPAdapter
+
+    class GuardedAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            if timeout and kwargs.get('timeout') is None:
+                kwargs['timeout'] = timeout
+            breaker.check()
+            try:
+                response = super().send(request, **kwargs)
+            except Exception as e:
+                # Só o tipo do erro: a mensagem traz a URL, que pode ter a api_key
+                breaker.record_failure(type(e).__name__)
+                raise
+            if response.status_code >= 500:
+                breaker.record_failure(f"HTTP {response.status_code}")
+            else:
+                breaker.record_success()
+            return response
+
+    return GuardedAdapter(**adapter_options)
+
+# Instância global dos circuit breakers (o estado fica no banco base)
+circuit_breakers = LazySingleton(CircuitBreakerRegistry)
@@ -1,18 +1,288 @@
 import os
+import json
 import logging
-from typing import List, Optional
-from dotenv import load_dotenv
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, fields, replace
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+from dotenv import dotenv_values, find_dotenv, load_dotenv
+
+from lazy import LazySingleton
+
+# Variáveis definidas pelo processo têm precedência sobre o .env, também no reload
+_PROCESS_ENV_KEYS = frozenset(os.environ)
+_DOTENV_PATH = find_dotenv()
 
 # Carrega variáveis de ambiente
-load_dotenv()
+load_dotenv(_DOTENV_PATH)
+
+# Site/autor (tenant) ativo no contexto atual; None = configuração base do .env
+_active_tenant: ContextVar[Optional[str]] = ContextVar('active_tenant', default=None)
+
+# Nomes de tenant viram nome de arquivo do banco
+_TENANT_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9_-]*$')
+
+# Campos que valem para o processo inteiro e não podem variar por tenant
+_SHARED_FIELDS = frozenset({
+    'gemini_api_keys', 'tenants_file', 'dry_run', 'session_secret', 'dashboard_threads', 'sse_max_clients',
+    'circuit_failure_threshold', 'circuit_open_seconds',
+})
+
+def set_process_env(name: str, value: str):
+    """
+    Define uma variável de ambiente como se viesse do processo (ex.: uma
+    opção da CLI): ela precede o .env, também nos reloads por SIGHUP, e é
+    herdada pelos processos filhos. Deve ser chamada antes do primeiro uso
+    da configuração.
+    """
+    global _PROCESS_ENV_KEYS
+    os.environ[name] = value
+    _PROCESS_ENV_KEYS = _PROCESS_ENV_KEYS | {name}
+
+def current_tenant() -> Optional[str]:
+    """Nome do tenant ativo no contexto atual (None = configuração base)"""
+    return _active_tenant.get()
+
+@contextmanager
+def use_tenant(name: Optional[str]) -> Iterator[None]:
+    """
+    Ativa um tenant no contexto atual: configuração, banco e clientes
+    (instâncias com escopo por tenant) passam a ser os do site dele.
+    Threads novas não herdam o contexto (use `contextvars.copy_context`).
+    """
+    token = _active_tenant.set(name)
+    try:
+        yield
+    finally:
+        _active_tenant.reset(token)
+
+def _env_int(name: str, default: int) -> int:
+    """Lê uma variável de ambiente inteira, com erro claro se inválida"""
+    raw = os.getenv(name, str(default)).strip()
+    try:
+        return int(raw)
+    except ValueError:
+        raise ValueError(f"{name} deve ser um número inteiro (valor atual: {raw!r})")
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Lê uma variável de ambiente booleana (true/false, 1/0, sim/não)"""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    value = raw.strip().lower()
+    if value in ('1', 'true', 'yes', 'sim', 'on'):
+        return True
+    if value in ('0', 'false', 'no', 'nao', 'não', 'off'):
+        return False
+    raise ValueError(f"{name} deve ser true ou false (valor atual: {raw!r})")
+
+@dataclass(frozen=True)
+class Settings:
+    """Snapshot imutável das configurações, lido do ambiente uma única vez"""
+
+    wordpress_url: str
+    wordpress_username: str
+    wordpress_password: str
+    wordpress_domain: str
+    gemini_api_keys: Tuple[str, ...]
+    tmdb_api_key: str
+    tmdb_read_token: str
+    tmdb_base_url: str
+    tmdb_image_url: str
+    tmdb_enrichment_enabled: bool
+    tmdb_index_path: str
+    tmdb_rate_limit: int
+    tmdb_pool_size: int
+    tmdb_timeout_seconds: int
+    tmdb_max_retries: int
+    wordpress_timeout_seconds: int
+    circuit_failure_threshold: int
+    circuit_open_seconds: int
+    session_secret: str
+    target_author_id: int
+    editor_author_id: int
+    movie_category_id: int
+    series_category_id: int
+    max_posts_per_cycle: int
+    check_interval_minutes: int
+    scheduler_min_interval_minutes: int
+    scheduler_max_interval_minutes: int
+    wordpress_fetch_limit: int
+    internal_links_max: int
+    internal_link_min_posts: int
+    term_catalog_sync_hours: int
+    database_path: str
+    tenants_file: str
+    gemini_key_indexes: Tuple[int, ...]
+    dry_run: bool
+    webhook_secret: str
+    webhook_debounce_seconds: int
+    gemini_daily_requests_per_key: int
+    wordpress_writes_per_minute: int
+    drain_max_batch: int
+    lease_ttl_seconds: int
+    priority_recency_weight: int
+    priority_trending_weight: int
+    priority_gain_weight: int
+    priority_recency_half_life_hours: int
+    priority_aging_per_hour: int
+    status_refresh_seconds: int
+    dashboard_threads: int
+    sse_max_clients: int
+
+    @property
+    def optimizable_category_ids(self) -> FrozenSet[int]:
+        """IDs das categorias que tornam um post otimizável (filme/série)"""
+        return frozenset((self.movie_category_id, self.series_category_id))
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        """Constrói o snapshot a partir das variáveis de ambiente atuais"""
+        keys = []
+        # Chave principal
+        main_key = os.getenv("GEMINI_API_KEY")
+        if main_key:
+            keys.append(main_key)
+
+        # Chaves alternativas
+        for i in range(1, 10):  # Suporte para até 9 chaves adicionais
+            key = os.getenv(f"GEMINI_API_KEY_{i}")
+            if key:
+                keys.append(key)
+
+        wordpress_url = os.getenv("WORDPRESS_URL", "").rstrip('/')
+
+        return cls(
+            wordpress_url=wordpress_url,
+            wordpress_username=os.getenv("WORDPRESS_USERNAME", ""),
+            wordpress_password=os.getenv("WORDPRESS_PASSWORD", ""),
+            wordpress_domain=os.getenv("WORDPRESS_DOMAIN", wordpress_url),
+            gemini_api_keys=tuple(keys),
+            tmdb_api_key=os.getenv("TMDB_API_KEY", ""),
+            tmdb_read_token=os.getenv("TMDB_READ_TOKEN", ""),
+            tmdb_base_url=os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3"),
+            tmdb_image_url=os.getenv("TMDB_IMAGE_URL", "https://image.tmdb.org/t/p"),
+            tmdb_enrichment_enabled=_env_bool("TMDB_ENRICHMENT_ENABLED", False),
+            tmdb_index_path=os.getenv("TMDB_INDEX_PATH", "tmdb_index.db"),
+            tmdb_rate_limit=_env_int("TMDB_RATE_LIMIT", 40),
+            tmdb_pool_size=_env_int("TMDB_POOL_SIZE", 20),
+            tmdb_timeout_seconds=_env_int("TMDB_TIMEOUT_SECONDS", 10),
+            tmdb_max_retries=_env_int("TMDB_MAX_RETRIES", 3),
+            wordpress_timeout_seconds=_env_int("WORDPRESS_TIMEOUT_SECONDS", 30),
+            circuit_failure_threshold=_env_int("CIRCUIT_FAILURE_THRESHOLD", 5),
+            circuit_open_seconds=_env_int("CIRCUIT_OPEN_SECONDS", 60),
+            session_secret=os.getenv("SESSION_SECRET", "default_secret_key_for_development"),
+            target_author_id=_env_int("TARGET_AUTHOR_ID", 6),
+            editor_author_id=_env_int("EDITOR_AUTHOR_ID", 9),
+            movie_category_id=_env_int("MOVIE_CATEGORY_ID", 24),
+            series_category_id=_env_int("SERIES_CATEGORY_ID", 21),
+            max_posts_per_cycle=_env_int("MAX_POSTS_PER_CYCLE", 2),
+            check_interval_minutes=_env_int("CHECK_INTERVAL_MINUTES", 20),
+            scheduler_min_interval_minutes=_env_int("SCHEDULER_MIN_INTERVAL_MINUTES", 2),
+            scheduler_max_interval_minutes=_env_int("SCHEDULER_MAX_INTERVAL_MINUTES", 120),
+            wordpress_fetch_limit=_env_int("WORDPRESS_FETCH_LIMIT", 50),
+            internal_links_max=_env_int("INTERNAL_LINKS_MAX", 5),
+            internal_link_min_posts=_env_int("INTERNAL_LINK_MIN_POSTS", 3),
+            term_catalog_sync_hours=_env_int("TERM_CATALOG_SYNC_HOURS", 24),
+            database_path=os.getenv("DATABASE_PATH", "seo_dashboard.db"),
+            tenants_file=os.getenv("TENANTS_FILE", ""),
+            gemini_key_indexes=(),
+            dry_run=_env_bool("DRY_RUN", False),
+            webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+            webhook_debounce_seconds=_env_int("WEBHOOK_DEBOUNCE_SECONDS", 15),
+            gemini_daily_requests_per_key=_env_int("GEMINI_DAILY_REQUESTS_PER_KEY", 1500),
+            wordpress_writes_per_minute=_env_int("WORDPRESS_WRITES_PER_MINUTE", 30),
+            drain_max_batch=_env_int("DRAIN_MAX_BATCH", 20),
+            lease_ttl_seconds=_env_int("LEASE_TTL_SECONDS", 300),
+            priority_recency_weight=_env_int("PRIORITY_RECENCY_WEIGHT", 40),
+            priority_trending_weight=_env_int("PRIORITY_TRENDING_WEIGHT", 30),
+            priority_gain_weight=_env_int("PRIORITY_GAIN_WEIGHT", 30),
+            priority_recency_half_life_hours=_env_int("PRIORITY_RECENCY_HALF_LIFE_HOURS", 24),
+            priority_aging_per_hour=_env_int("PRIORITY_AGING_PER_HOUR", 5),
+            status_refresh_seconds=_env_int("STATUS_REFRESH_SECONDS", 30),
+            dashboard_threads=_env_int("DASHBOARD_THREADS", 16),
+            sse_max_clients=_env_int("SSE_MAX_CLIENTS", 10),
+        )
+
+@dataclass(frozen=True)
+class TenantProfile:
+    """Um site/autor gerenciado pelo processo: configuração própria e peso na divisão da quota"""
+
+    name: str
+    settings: Settings
+    weight: int = 1
+
+def _load_tenants(base: Settings) -> Dict[str, TenantProfile]:
+    """
+    Lê os perfis de TENANTS_FILE: uma lista JSON de objetos com `name`,
+    campos do Settings em minúsculas (os ausentes herdam do .env) e,
+    opcionalmente, `weight` e `gemini_keys` (números das chaves, a partir de 1).
+    """
+    if not base.tenants_file:
+        return {}
+    try:
+        with open(base.tenants_file, encoding='utf-8') as handle:
+            raw_profiles = json.load(handle)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"TENANTS_FILE inválido ({base.tenants_file}): {e}")
+    if not isinstance(raw_profiles, list):
+        raise ValueError("TENANTS_FILE deve conter uma lista de perfis")
+
+    known_fields = {field.name for field in fields(Settings)} - _SHARED_FIELDS
+    tenants = {}
+    for raw in raw_profiles:
+        profile = dict(raw)
+        name = str(profile.pop('name', ''))
+        if not _TENANT_NAME_RE.match(name):
+            raise ValueError(f"Nome de tenant inválido: {name!r} (use letras minúsculas, números, - e _)")
+        if name in tenants:
+            raise ValueError(f"Tenant duplicado: {name!r}")
+        weight = profile.pop('weight', 1)
+        key_numbers = profile.pop('gemini_keys', [])
+        unknown = set(profile) - known_fields
+        if unknown:
+            raise ValueError(f"Tenant {name!r}: campos desconhecidos {sorted(unknown)}")
+
+        overrides = {'database_path': f"seo_dashboard_{name}.db", **profile}
+        if 'wordpress_url' in overrides:
+            overrides['wordpress_url'] = overrides['wordpress_url'].rstrip('/')
+            overrides.setdefault('wordpress_domain', overrides['wordpress_url'])
+        overrides['gemini_key_indexes'] = tuple(int(number) - 1 for number in key_numbers)
+        tenants[name] = TenantProfile(name, replace(base, **overrides), int(weight))
+    return tenants
 
 class Config:
-    """Classe para gerenciar todas as configurações do sistema"""
+    """
+    Classe para gerenciar todas as configurações do sistema.
+
+    As variáveis de ambiente são lidas uma vez para um `Settings` imutável;
+    as propriedades apenas leem desse snapshot. Use `reload()` para recarregar
+    (ex.: em SIGHUP) e `snapshot()` para obter uma visão consistente durante
+    um ciclo inteiro.
+
+    Com TENANTS_FILE, cada tenant (site/autor) tem o próprio snapshot; as
+    propriedades e `snapshot()` devolvem o do tenant ativo (`use_tenant`).
+    """
     
     def __init__(self):
         self.setup_logging()
+        self._reload_lock = threading.Lock()
+        self._base_settings = Settings.from_env()
+        self._tenants = _load_tenants(self._base_settings)
         self.validate_config()
     
+    @property
+    def _settings(self) -> Settings:
+        name = current_tenant()
+        if name is None:
+            return self._base_settings
+        try:
+            return self._tenants[name].settings
+        except KeyError:
+            raise ValueError(f"Tenant desconhecido: {name!r}") from None
+    
     def setup_logging(self):
         """Configura o sistema de logging com fuso horário de Brasília (UTC-3)"""
         import logging
@@ -50,126 +320,420 @@ class Config:
         )
         self.logger = logging.getLogger(__name__)
     
+    def snapshot(self) -> Settings:
+        """Retorna o snapshot atual (imutável) das configurações do tenant ativo"""
+        return self._settings
+    
+    def base_snapshot(self) -> Settings:
+        """Snapshot da configuração base (.env), independente do tenant ativo"""
+        return self._base_settings
+    
+    def tenants(self) -> List[TenantProfile]:
+        """Perfis de TENANTS_FILE (lista vazia: um único site, configurado pelo .env)"""
+        return list(self._tenants.values())
+
+    def reload(self) -> List[str]:
+        """
+        Relê o .env e o ambiente, valida e troca o snapshot atomicamente.
+
+        Se a nova configuração for inválida, o snapshot anterior é mantido e
+        o ValueError é propagado.
+
+        Returns:
+            Lista com os nomes dos campos que mudaram.
+        """
+        with self._reload_lock:
+            for key, value in dotenv_values(_DOTENV_PATH).items():
+                if key not in _PROCESS_ENV_KEYS and value is not None:
+                    os.environ[key] = value
+            new_settings = Settings.from_env()
+            new_tenants = _load_tenants(new_settings)
+            self._validate_all(new_settings, new_tenants)
+
+            pairs = [(self._base_settings, new_settings)] + [
+                (self._tenants[name].settings, profile.settings)
+                for name, profile in new_tenants.items() if name in self._tenants
+            ]
+            changed = [
+                field.name for field in fields(Settings)
+                if any(getattr(old, field.name) != getattr(new, field.name) for old, new in pairs)
+            ]
+            if set(new_tenants) != set(self._tenants):
+                changed.append('tenants')
+            self._base_settings = new_settings
+            self._tenants = new_tenants
+
+        if changed:
+            self.logger.info(f"Configuração recarregada. Campos alterados: {', '.join(changed)}")
+        else:
+            self.logger.info("Configuração recarregada sem alterações")
+        return changed
+
     # WordPress Configuration
     @property
     def wordpress_url(self) -> str:
-        return os.getenv("WORDPRESS_URL", "").rstrip('/')
+        return self._settings.wordpress_url
     
     @property
     def wordpress_username(self) -> str:
-        return os.getenv("WORDPRESS_USERNAME", "")
+        return self._settings.wordpress_username
     
     @property
     def wordpress_password(self) -> str:
-        return os.getenv("WORDPRESS_PASSWORD", "")
+        return self._settings.wordpress_password
     
     @property
     def wordpress_domain(self) -> str:
-        return os.getenv("WORDPRESS_DOMAIN", self.wordpress_url)
+        return self._settings.wordpress_domain
     
     # Gemini Configuration
     @property
-    def gemini_api_keys(self) -> List[str]:
-        """Retorna lista de todas as chaves Gemini disponíveis"""
-        keys = []
-        # Chave principal
-        main_key = os.getenv("GEMINI_API_KEY")
-        if main_key:
-            keys.append(main_key)
-        
-        # Chaves alternativas
-        for i in range(1, 10):  # Suporte para até 9 chaves adicionais
-            key = os.getenv(f"GEMINI_API_KEY_{i}")
-            if key:
-                keys.append(key)
-        
-        return keys
+    def gemini_api_keys(self) -> Tuple[str, ...]:
+        """Retorna todas as chaves Gemini disponíveis"""
+        return self._settings.gemini_api_keys
     
     # TMDB Configuration
     @property
     def tmdb_api_key(self) -> str:
-        return os.getenv("TMDB_API_KEY", "")
+        return self._settings.tmdb_api_key
     
     @property
     def tmdb_read_token(self) -> str:
-        return os.getenv("TMDB_READ_TOKEN", "")
+        return self._settings.tmdb_read_token
     
     @property
     def tmdb_base_url(self) -> str:
-        return os.getenv("TMDB_BASE_URL", "https://api.themoviedb.org/3")
+        return self._settings.tmdb_base_url
     
     @property
     def tmdb_image_url(self) -> str:
-        return os.getenv("TMDB_IMAGE_URL", "https://image.tmdb.org/t/p")
+        return self._settings.tmdb_image_url
+    
+    @property
+    def tmdb_enrichment_enabled(self) -> bool:
+        """Busca o filme/série no TMDB e envia os dados oficiais ao Gemini"""
+        return self._settings.tmdb_enrichment_enabled
     
+    @property
+    def tmdb_index_path(self) -> str:
+        """Arquivo do índice local de títulos (gerado com `main.py --build-tmdb-index`)"""
+        return self._settings.tmdb_index_path
+    
+    @property
+    def tmdb_rate_limit(self) -> int:
+        """Máximo de requisições por segundo ao TMDB (o limite deles é ~50/s por IP)"""
+        return self._settings.tmdb_rate_limit
+    
+    @property
+    def tmdb_pool_size(self) -> int:
+        """Conexões simultâneas com o TMDB (o limite deles é 20 por IP)"""
+        return self._settings.tmdb_pool_size
+    
+    @property
+    def tmdb_timeout_seconds(self) -> int:
+        """Timeout de cada requisição ao TMDB"""
+        return self._settings.tmdb_timeout_seconds
+    
+    @property
+    def tmdb_max_retries(self) -> int:
+        """Novas tentativas em erros de rede, 429 e 5xx do TMDB"""
+        return self._settings.tmdb_max_retries
+
+    @property
+    def wordpress_timeout_seconds(self) -> int:
+        """Timeout das requisições à API do WordPress sem timeout próprio"""
+        return self._settings.wordpress_timeout_seconds
+
+    @property
+    def circuit_failure_threshold(self) -> int:
+        """Falhas seguidas de uma dependência (WordPress, Gemini, TMDB) que abrem o circuito"""
+        return self._settings.circuit_failure_threshold
+
+    @property
+    def circuit_open_seconds(self) -> int:
+        """Tempo com o circuito aberto antes de deixar passar uma chamada de teste"""
+        return self._settings.circuit_open_seconds
+
     # Flask Configuration
     @property
     def session_secret(self) -> str:
-        return os.getenv("SESSION_SECRET", "default_secret_key_for_development")
+        return self._settings.session_secret
     
     # Sistema Configuration
     @property
     def target_author_id(self) -> int:
         """ID do autor cujos posts serão otimizados (João)"""
-        return int(os.getenv("TARGET_AUTHOR_ID", "6"))
+        return self._settings.target_author_id
     
     @property
     def editor_author_id(self) -> int:
         """ID do autor que fará as edições (você)"""
-        return int(os.getenv("EDITOR_AUTHOR_ID", "9"))
+        return self._settings.editor_author_id
     
     @property
     def movie_category_id(self) -> int:
         """ID da categoria Filme"""
-        return int(os.getenv("MOVIE_CATEGORY_ID", "24"))
+        return self._settings.movie_category_id
     
     @property
     def series_category_id(self) -> int:
         """ID da categoria Série"""
-        return int(os.getenv("SERIES_CATEGORY_ID", "21"))
+        return self._settings.series_category_id
     
     @property
     def max_posts_per_cycle(self) -> int:
         """Máximo de posts a processar por ciclo"""
-        return int(os.getenv("MAX_POSTS_PER_CYCLE", "2"))
+        return self._settings.max_posts_per_cycle
     
     @property
     def check_interval_minutes(self) -> int:
-        """Intervalo entre verificações em minutos"""
-        return int(os.getenv("CHECK_INTERVAL_MINUTES", "20"))
+        """Intervalo base entre verificações em minutos (ajustado pelo agendador)"""
+        return self._settings.check_interval_minutes
+    
+    @property
+    def scheduler_min_interval_minutes(self) -> int:
+        """Intervalo usado enquanto os autores estão publicando"""
+        return self._settings.scheduler_min_interval_minutes
+    
+    @property
+    def scheduler_max_interval_minutes(self) -> int:
+        """Intervalo máximo em ociosidade ou com todas as chaves esgotadas"""
+        return self._settings.scheduler_max_interval_minutes
     
     @property
     def wordpress_fetch_limit(self) -> int:
         """Número de posts a buscar do WordPress por ciclo (para encontrar novos)"""
-        return int(os.getenv("WORDPRESS_FETCH_LIMIT", "50"))
+        return self._settings.wordpress_fetch_limit
+    
+    @property
+    def internal_links_max(self) -> int:
+        """Máximo de links internos inseridos em cada post otimizado"""
+        return self._settings.internal_links_max
+    
+    @property
+    def internal_link_min_posts(self) -> int:
+        """Posts mínimos de uma tag/categoria (que não seja do post) para virar link"""
+        return self._settings.internal_link_min_posts
+    
+    @property
+    def term_catalog_sync_hours(self) -> int:
+        """Intervalo entre sincronizações completas do catálogo de tags e categorias"""
+        return self._settings.term_catalog_sync_hours
+    
+    @property
+    def database_path(self) -> str:
+        """Arquivo SQLite do tenant ativo (a quota Gemini fica sempre no banco base)"""
+        return self._settings.database_path
+    
+    @property
+    def gemini_key_indexes(self) -> Tuple[int, ...]:
+        """Chaves Gemini (índices) reservadas ao tenant ativo; vazio = todas"""
+        return self._settings.gemini_key_indexes
+    
+    @property
+    def dry_run(self) -> bool:
+        """Modo simulação: o pipeline roda inteiro, mas nada é escrito no WordPress"""
+        return self._settings.dry_run
+    
+    @property
+    def webhook_secret(self) -> str:
+        """Segredo HMAC do webhook de publicação (vazio desativa o endpoint)"""
+        return self._settings.webhook_secret
+    
+    @property
+    def webhook_debounce_seconds(self) -> int:
+        """Espera após o último aviso de um post antes de processá-lo"""
+        return self._settings.webhook_debounce_seconds
+    
+    @property
+    def gemini_daily_requests_per_key(self) -> int:
+        """Requisições por dia de cada chave Gemini (0 = desconhecido, só a quota excedida conta)"""
+        return self._settings.gemini_daily_requests_per_key
+    
+    @property
+    def wordpress_writes_per_minute(self) -> int:
+        """Máximo de posts atualizados por minuto no modo --drain"""
+        return self._settings.wordpress_writes_per_minute
+    
+    @property
+    def drain_max_batch(self) -> int:
+        """Tamanho máximo de um lote do modo --drain"""
+        return self._settings.drain_max_batch
+    
+    @property
+    def lease_ttl_seconds(self) -> int:
+        """Validade da lease de um post sem heartbeat (e espera antes de retentar uma falha)"""
+        return self._settings.lease_ttl_seconds
+    
+    @property
+    def priority_recency_weight(self) -> int:
+        """Pontos da fila de prioridade para um post recém-publicado (decaem com a idade)"""
+        return self._settings.priority_recency_weight
+    
+    @property
+    def priority_trending_weight(self) -> int:
+        """Pontos para um post com tag em alta (muitos posts recentes com a mesma tag)"""
+        return self._settings.priority_trending_weight
+    
+    @property
+    def priority_gain_weight(self) -> int:
+        """Pontos para o maior ganho de SEO esperado (pontuação atual longe da meta)"""
+        return self._settings.priority_gain_weight
+    
+    @property
+    def priority_recency_half_life_hours(self) -> int:
+        """Horas para os pontos de recência caírem pela metade"""
+        return self._settings.priority_recency_half_life_hours
+    
+    @property
+    def priority_aging_per_hour(self) -> int:
+        """Pontos ganhos por hora de espera na fila (nenhum post espera para sempre)"""
+        return self._settings.priority_aging_per_hour
+    
+    @property
+    def status_refresh_seconds(self) -> int:
+        """Intervalo de atualização do snapshot de status do dashboard"""
+        return self._settings.status_refresh_seconds
+    
+    @property
+    def dashboard_threads(self) -> int:
+        """Threads do servidor WSGI do dashboard (conexões SSE ocupam uma cada)"""
+        return self._settings.dashboard_threads
+    
+    @property
+    def sse_max_clients(self) -> int:
+        """Máximo de conexões simultâneas em /api/events"""
+        return self._settings.sse_max_clients
     
     def validate_config(self):
         """Valida se todas as configurações necessárias estão presentes"""
+        self._validate_all(self._base_settings, self._tenants)
+        
+        self.logger.info(f"Configuração validada com sucesso")
+        self.logger.info(f"WordPress: {self.wordpress_url}")
+        self.logger.info(f"Gemini API Keys: {len(self.gemini_api_keys)} chaves configuradas")
+        self.logger.info(f"TMDB configurado: Sim")
+        if self.dry_run:
+            self.logger.warning("Modo simulação (DRY_RUN): nenhuma alteração será gravada no WordPress")
+        for profile in self._tenants.values():
+            self.logger.info(f"Tenant {profile.name}: {profile.settings.wordpress_url} "
+                             f"(autor {profile.settings.target_author_id}, peso {profile.weight})")
+    
+    def _validate_all(self, base: Settings, tenants: Dict[str, TenantProfile]):
+        """Valida a configuração base e a de cada tenant, reunindo os erros"""
+        errors = []
+        for label, settings in [(None, base)] + [(name, profile.settings) for name, profile in tenants.items()]:
+            try:
+                self._validate_settings(settings)
+            except ValueError as e:
+                errors.append(str(e) if label is None else f"[tenant {label}] {e}")
+        for profile in tenants.values():
+            if profile.weight < 1:
+                errors.append(f"[tenant {profile.name}] weight deve ser maior que zero")
+        paths = [base.database_path] + [profile.settings.database_path for profile in tenants.values()]
+        if len(set(paths)) != len(paths):
+            errors.append("Cada tenant precisa de um database_path próprio")
+        if errors:
+            raise ValueError("\n".join(errors))
+    
+    def _validate_settings(self, settings: Settings):
+        """Valida um snapshot, levantando ValueError com todos os problemas"""
         errors = []
         
-        if not self.wordpress_url:
+        if not settings.wordpress_url:
             errors.append("WORDPRESS_URL não configurado")
         
-        if not self.wordpress_username:
+        if not settings.wordpress_username:
             errors.append("WORDPRESS_USERNAME não configurado")
         
-        if not self.wordpress_password:
+        if not settings.wordpress_password:
             errors.append("WORDPRESS_PASSWORD não configurado")
         
-        if not self.gemini_api_keys:
+        if not settings.gemini_api_keys:
             errors.append("Nenhuma GEMINI_API_KEY configurada")
         
-        if not self.tmdb_api_key:
+        if not settings.tmdb_api_key:
             errors.append("TMDB_API_KEY não configurado")
         
+        invalid_keys = [index + 1 for index in settings.gemini_key_indexes
+                        if not 0 <= index < len(settings.gemini_api_keys)]
+        if invalid_keys:
+            errors.append(f"Chaves Gemini inexistentes em gemini_keys: {invalid_keys}")
+        
+        if settings.max_posts_per_cycle < 1:
+            errors.append("MAX_POSTS_PER_CYCLE deve ser maior que zero")
+        
+        if settings.check_interval_minutes < 1:
+            errors.append("CHECK_INTERVAL_MINUTES deve ser maior que zero")
+        
+        if settings.scheduler_min_interval_minutes < 1:
+            errors.append("SCHEDULER_MIN_INTERVAL_MINUTES deve ser maior que zero")
+        
+        if settings.scheduler_max_interval_minutes < settings.scheduler_min_interval_minutes:
+            errors.append("SCHEDULER_MAX_INTERVAL_MINUTES deve ser maior ou igual a SCHEDULER_MIN_INTERVAL_MINUTES")
+        
+        if settings.wordpress_fetch_limit < 1:
+            errors.append("WORDPRESS_FETCH_LIMIT deve ser maior que zero")
+        
+        if settings.internal_links_max < 0:
+            errors.append("INTERNAL_LINKS_MAX não pode ser negativo")
+        
+        if settings.term_catalog_sync_hours < 1:
+            errors.append("TERM_CATALOG_SYNC_HOURS deve ser maior que zero")
+        
+        if settings.tmdb_rate_limit < 1:
+            errors.append("TMDB_RATE_LIMIT deve ser maior que zero")
+        
+        if not 1 <= settings.tmdb_pool_size <= 20:
+            errors.append("TMDB_POOL_SIZE deve estar entre 1 e 20")
+        
+        if settings.tmdb_timeout_seconds < 1:
+            errors.append("TMDB_TIMEOUT_SECONDS deve ser maior que zero")
+        
+        if settings.tmdb_max_retries < 0:
+            errors.append("TMDB_MAX_RETRIES não pode ser negativo")
+        
+        if settings.wordpress_timeout_seconds < 1:
+            errors.append("WORDPRESS_TIMEOUT_SECONDS deve ser maior que zero")
+        
+        if settings.circuit_failure_threshold < 1:
+            errors.append("CIRCUIT_FAILURE_THRESHOLD deve ser maior que zero")
+        
+        if settings.circuit_open_seconds < 1:
+            errors.append("CIRCUIT_OPEN_SECONDS deve ser maior que zero")
+        
+        if settings.webhook_debounce_seconds < 0:
+            errors.append("WEBHOOK_DEBOUNCE_SECONDS não pode ser negativo")
+        
+        if settings.gemini_daily_requests_per_key < 0:
+            errors.append("GEMINI_DAILY_REQUESTS_PER_KEY não pode ser negativo")
+        
+        if settings.wordpress_writes_per_minute < 1:
+            errors.append("WORDPRESS_WRITES_PER_MINUTE deve ser maior que zero")
+        
+        if settings.drain_max_batch < 1:
+            errors.append("DRAIN_MAX_BATCH deve ser maior que zero")
+        
+        if settings.lease_ttl_seconds < 30:
+            errors.append("LEASE_TTL_SECONDS deve ser de pelo menos 30")
+        
+        priority_weights = (settings.priority_recency_weight, settings.priority_trending_weight,
+                            settings.priority_gain_weight, settings.priority_aging_per_hour)
+        if min(priority_weights) < 0:
+            errors.append("Os pesos PRIORITY_* não podem ser negativos")
+        
+        if settings.priority_recency_half_life_hours < 1:
+            errors.append("PRIORITY_RECENCY_HALF_LIFE_HOURS deve ser maior que zero")
+        
+        if settings.status_refresh_seconds < 1:
+            errors.append("STATUS_REFRESH_SECONDS deve ser maior que zero")
+        
+        if settings.sse_max_clients >= settings.dashboard_threads:
+            errors.append("SSE_MAX_CLIENTS deve ser menor que DASHBOARD_THREADS")
+        
         if errors:
-            error_msg = "Configurações faltando:\n" + "\n".join(f"- {error}" for error in errors)
+            error_msg = "Configurações faltando ou inválidas:\n" + "\n".join(f"- {error}" for error in errors)
             raise ValueError(error_msg)
-        
-        self.logger.info(f"Configuração validada com sucesso")
-        self.logger.info(f"WordPress: {self.wordpress_url}")
-        self.logger.info(f"Gemini API Keys: {len(self.gemini_api_keys)} chaves configuradas")
-        self.logger.info(f"TMDB configurado: Sim")
 
-# Instância global de configuração
-config = Config()
+# Instância global de configuração (logging e validação no primeiro uso)
+config = LazySingleton(Config)
@@ -0,0 +1,215 @@
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from html import unescape
+from typing import List, Optional, Tuple
+
+# Tags HTML e comentários; o conteúdo entre elas é o texto do post
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)\b([^>]*)>|<!--.*?-->', re.S)
+_HREF_RE = re.compile(r'''href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.I)
+_WORD_RE = re.compile(r'\w+', re.U)
+_ENTITY_CODE_RE = re.compile(r'&#\d+;')
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+_SENTENCE_END_RE = re.compile(r'^(.+[.!?])\s*', re.S)
+_TRAILING_PUNCT_RE = re.compile(r'[,;:]$')
+_MARKDOWN_EMPHASIS_RE = re.compile(r'\*\*|__')
+
+# Tipografia aplicada pelo WordPress ao renderizar (wptexturize): aspas
+# curvas, travessões e reticências voltam à forma simples no fingerprint
+_TYPOGRAPHY = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"', '\u2032': "'", '\u2033': '"',
+    '\u2013': '-', '\u2014': '-', '\u2026': '...', '\u00a0': ' ',
+})
+_DASHES_RE = re.compile(r'-{2,}')
+
+# Tags que separam blocos de texto (evitam palavras coladas ao remover tags)
+_BLOCK_TAGS = frozenset({
+    'p', 'div', 'br', 'li', 'ul', 'ol', 'blockquote', 'figure', 'figcaption',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'table', 'tr', 'td', 'th', 'section',
+})
+_BOLD_TAGS = frozenset({'b', 'strong'})
+_HEADING_TAGS = frozenset({'h1', 'h2', 'h3', 'h4', 'h5', 'h6'})
+_SKIPPED_TAGS = frozenset({'script', 'style'})
+
+@dataclass(frozen=True)
+class Link:
+    """Um link do conteúdo"""
+
+    href: str
+    text: str
+
+@dataclass(frozen=True)
+class ParsedContent:
+    """Representação compacta de um HTML de post, extraída em uma única passada"""
+
+    text: str
+    paragraphs: Tuple[str, ...]
+    bold: Tuple[str, ...]
+    links: Tuple[Link, ...]
+    headings: Tuple[Tuple[int, str], ...]
+    words: Tuple[str, ...]
+
+    @property
+    def word_count(self) -> int:
+        return len(self.words)
+
+def _clean(parts: List[str]) -> str:
+    return ' '.join(''.join(parts).split())
+
+@lru_cache(maxsize=256)
+def parse_html(html: str) -> ParsedContent:
+    """
+    Percorre o HTML uma única vez, separando texto, parágrafos, negritos,
+    links e títulos. O resultado é reaproveitado (cache por conteúdo) por
+    todas as funções de pontuação, palavra-chave e resumo.
+    """
+    text_parts: List[str] = []
+    paragraphs: List[str] = []
+    bold: List[str] = []
+    links: List[Link] = []
+    headings: List[Tuple[int, str]] = []
+
+    # Buffers dos elementos abertos no momento
+    paragraph: Optional[List[str]] = None
+    bold_buffer: Optional[List[str]] = None
+    link: Optional[Tuple[str, List[str]]] = None
+    heading: Optional[Tuple[int, List[str]]] = None
+    skipping = 0
+
+    def add_text(chunk: str):
+        if skipping or not chunk:
+            return
+        chunk = unescape(chunk)
+        text_parts.append(chunk)
+        for buffer in (paragraph, bold_buffer, link[1] if link else None,
+                       heading[1] if heading else None):
+            if buffer is not None:
+                buffer.append(chunk)
+
+    position = 0
+    for match in _TAG_RE.finditer(html):
+        add_text(html[position:match.start()])
+        position = match.end()
+
+        name = match.group(2)
+        if name is None:  # comentário
+            continue
+        name = name.lower()
+        closing = bool(match.group(1))
+
+        if name in _SKIPPED_TAGS:
+            skipping = max(0, skipping - 1) if closing else skipping + 1
+            continue
+
+        if name in _BLOCK_TAGS:
+            text_parts.append(' ')
+            if paragraph is not None:
+                paragraph.append(' ')
+
+        if name == 'p':
+            if paragraph is not None:
+                text = _clean(paragraph)
+                if text:
+                    paragraphs.append(text)
+            paragraph = None if closing else []
+        elif name in _BOLD_TAGS:
+            if closing and bold_buffer is not None:
+                text = _clean(bold_buffer)
+                if text:
+                    bold.append(text)
+                bold_buffer = None
+            elif not closing:
+                bold_buffer = []
+        elif name == 'a':
+            if closing and link is not None:
+                links.append(Link(href=link[0], text=_clean(link[1])))
+                link = None
+            elif not closing:
+                href_match = _HREF_RE.search(match.group(3))
+                if href_match:
+                    href = next(group for group in href_match.groups() if group is not None)
+                    link = (unescape(href), [])
+        elif name in _HEADING_TAGS:
+            if closing and heading is not None:
+                headings.append((heading[0], _clean(heading[1])))
+                heading = None
+            elif not closing:
+                heading = (int(name[1]), [])
+
+    add_text(html[position:])
+    # Parágrafo sem </p> no fim do conteúdo
+    if paragraph is not None:
+        text = _clean(paragraph)
+        if text:
+            paragraphs.append(text)
+
+    text = _clean(text_parts)
+    return ParsedContent(
+        text=text,
+        paragraphs=tuple(paragraphs),
+        bold=tuple(bold),
+        links=tuple(links),
+        headings=tuple(headings),
+        words=tuple(_WORD_RE.findall(text.lower()))
+    )
+
+def strip_html(html: str) -> str:
+    """Texto puro do HTML, com espaços normalizados"""
+    return parse_html(html).text
+
+def clean_title(title: str) -> str:
+    """Remove tags HTML e marcação Markdown de um título"""
+    return ' '.join(_MARKDOWN_EMPHASIS_RE.sub('', strip_html(title)).split())
+
+def normalize_title(title: str) -> str:
+    """Normaliza um título para detecção de duplicatas (sem entidades, pontuação e caixa)"""
+    title = _ENTITY_CODE_RE.sub('', title)
+    return _NON_WORD_RE.sub('', title).lower().strip()
+
+def content_fingerprint(title: str, content: str) -> str:
+    """
+    Hash do que o leitor vê no post: texto do título e do conteúdo, sem
+    HTML, caixa, espaços e tipografia do WordPress. Mudanças só de
+    marcação (links, negritos, parágrafos) não alteram o valor.
+    """
+    text = f"{clean_title(title)}\n{strip_html(content)}".translate(_TYPOGRAPHY).lower()
+    text = _DASHES_RE.sub('-', text)
+    return hashlib.blake2b(' '.join(text.split()).encode('utf-8'), digest_size=16).hexdigest()
+
+def extract_focus_keyword(title: str, content: str) -> str:
+    """Palavra-chave foco: o primeiro termo em negrito ou as primeiras palavras do título"""
+    bold_terms = parse_html(content).bold
+    if bold_terms:
+        return bold_terms[0]
+
+    title_words = title.split()
+    if len(title_words) >= 2:
+        return ' '.join(title_words[:2])
+
+    return title_words[0] if title_words else 'cultura pop'
+
+def truncate_text(html: str, max_length: int = 180) -> str:
+    """
+    Trunca o texto (sem HTML) em um ponto natural: fim de frase, se não
+    perder muito conteúdo, ou fim de palavra, com reticências.
+    """
+    clean = strip_html(html)
+    if len(clean) <= max_length:
+        return clean
+
+    truncated = clean[:max_length]
+
+    # Tenta cortar no final de uma frase (. ! ?)
+    sentence_match = _SENTENCE_END_RE.search(truncated)
+    if sentence_match and len(sentence_match.group(1)) >= max_length * 0.6:
+        return sentence_match.group(1).strip()
+
+    # Senão, corta no último espaço (se mantiver pelo menos 70% do limite)
+    last_space = truncated.rfind(' ')
+    if last_space > max_length * 0.7:
+        truncated = truncated[:last_space]
+
+    # Remove pontuação final incompleta e indica o corte
+    truncated = _TRAILING_PUNCT_RE.sub('', truncated.strip())
+    return (truncated + '...').strip()
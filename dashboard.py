@@ -6,22 +6,73 @@ Interface de monitoramento em tempo real
 
 import os
 import logging
+import queue
 from datetime import datetime, timedelta
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from config import config
-from database import db
-from waitress import serve
+from database import db, LOG_PAGE_MAX
 from seo_optimizer import seo_optimizer
 from gemini_client import gemini_client
+from status_cache import status_aggregator
+from events import event_bus, log_tailer
+from jobs import job_runner
+from webhooks import verify_signature, webhook_dispatcher
+import http_delivery
 
 # Configuração do Flask
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET")
+http_delivery.init_app(app)
+
+# Intervalo entre heartbeats do stream /api/events
+SSE_HEARTBEAT_SECONDS = 15
 
 # Configuração de logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+def snapshot_response(section: str):
+    """
+    Responde com uma seção do snapshot de status, com ETag e Last-Modified.
+    Clientes que enviam If-None-Match/If-Modified-Since recebem 304.
+    """
+    entry = status_aggregator.get_section(section)
+    response = jsonify({
+        'success': True,
+        'data': entry.data
+    })
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def job_response(job, kind: str):
+    """
+    Resposta 202 com o job criado, ou com o job equivalente já em andamento
+    (`coalesced`). O job agrupado mantém o `kind` real: 'run_test' e
+    'auto_process' rodam o mesmo ciclo e se agrupam um no outro.
+    """
+    data = job.to_dict()
+    data['coalesced'] = job.kind != kind or job.submissions > 1
+    response = jsonify({
+        'success': True,
+        'data': data
+    })
+    response.headers['Location'] = f"/api/jobs/{job.id}"
+    return response, 202
+
+def run_and_refresh(func, *args):
+    """Executa uma ação do dashboard e antecipa a atualização do status"""
+    try:
+        return func(*args)
+    finally:
+        request_status_refresh()
+
+def request_status_refresh():
+    """Pede ao agregador uma atualização antecipada após uma ação"""
+    if status_aggregator.is_initialized():
+        status_aggregator.request_refresh()
+
 @app.route('/')
 def dashboard():
     """Página principal do dashboard"""
@@ -31,11 +82,7 @@ def dashboard():
 def api_status():
     """API endpoint para status do sistema"""
     try:
-        status = seo_optimizer.get_system_status()
-        return jsonify({
-            'success': True,
-            'data': status
-        })
+        return snapshot_response('status')
     except Exception as e:
         logger.error(f"Erro ao obter status: {e}")
         return jsonify({
@@ -43,9 +90,50 @@ def api_status():
             'error': str(e)
         }), 500
 
+@app.route('/api/events')
+def api_events():
+    """
+    Stream Server-Sent Events com atualizações ao vivo: início/fim de ciclo,
+    progresso por post, troca de chave Gemini, novos logs e mudanças no
+    snapshot de status. O frontend volta ao polling se a conexão falhar.
+    """
+    if event_bus.subscriber_count() >= config.sse_max_clients:
+        return jsonify({
+            'success': False,
+            'error': 'Limite de conexões de eventos atingido'
+        }), 503
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    subscriber = event_bus.subscribe(last_event_id)
+    log_tailer.start()
+    status_aggregator.start()
+
+    def stream():
+        try:
+            # Tempo de reconexão sugerido ao EventSource
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = subscriber.get(timeout=SSE_HEARTBEAT_SECONDS)
+                except queue.Empty:
+                    # Comentário SSE mantém a conexão viva através de proxies
+                    yield ": ping\n\n"
+                    continue
+                yield event.to_sse()
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/process-post', methods=['POST'])
 def api_process_post():
-    """API endpoint para processar um post específico"""
+    """
+    API endpoint para processar um post específico.
+    O processamento roda em segundo plano; a resposta traz o id do job.
+    """
     try:
         logger.info("=== INICIANDO PROCESSAMENTO VIA DASHBOARD ===")
 
@@ -58,16 +146,12 @@ def api_process_post():
             logger.error("URL não fornecida")
             return jsonify({'success': False, 'error': 'URL é obrigatória'}), 400
 
-        # Processa o post
-        logger.info("Chamando seo_optimizer.process_post_by_url...")
-        result = seo_optimizer.process_post_by_url(post_url)
-
-        logger.info(f"Resultado do processamento: {result}")
-
-        return jsonify({
-            'success': True,
-            'data': result
-        })
+        job = job_runner.submit(
+            'process_post',
+            f"post:{post_url}",
+            lambda: run_and_refresh(seo_optimizer.process_post_by_url, post_url)
+        )
+        return job_response(job, 'process_post')
 
     except Exception as e:
         logger.error(f"Erro no endpoint process-post: {e}", exc_info=True)
@@ -76,33 +160,42 @@ def api_process_post():
             'error': str(e)
         }), 500
 
+@app.route('/api/webhook/post-published', methods=['POST'])
+def api_webhook_post_published():
+    """
+    Webhook chamado pelo WordPress em `publish_post`. Corpo JSON com
+    `post_id`, assinado com HMAC-SHA256 (cabeçalhos X-Webhook-Timestamp e
+    X-Webhook-Signature). O post entra no pipeline após o debounce.
+    """
+    secret = config.webhook_secret
+    if not secret:
+        return jsonify({'success': False, 'error': 'Webhook desativado'}), 404
+
+    body = request.get_data()
+    if not verify_signature(secret,
+                            request.headers.get('X-Webhook-Timestamp'),
+                            request.headers.get('X-Webhook-Signature'),
+                            body):
+        logger.warning(f"Webhook com assinatura inválida de {request.remote_addr}")
+        return jsonify({'success': False, 'error': 'Assinatura inválida'}), 401
+
+    data = request.get_json(silent=True) or {}
+    try:
+        post_id = int(data.get('post_id'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': "Campo 'post_id' inválido"}), 400
+
+    delay = webhook_dispatcher.enqueue(post_id)
+    return jsonify({
+        'success': True,
+        'data': {'post_id': post_id, 'scheduled_in_seconds': delay}
+    }), 202
+
 @app.route('/api/statistics')
 def api_statistics():
     """API endpoint para estatísticas detalhadas"""
     try:
-        stats = db.get_statistics()
-        quota_info = db.get_gemini_quota_info()
-
-        # Estatísticas por período
-        recent_logs = db.get_recent_logs(100)
-
-        # Agrupa logs por data
-        daily_stats = {}
-        for log in recent_logs:
-            date = log['created_at'][:10]  # YYYY-MM-DD
-            if date not in daily_stats:
-                daily_stats[date] = {'success': 0, 'error': 0}
-            daily_stats[date][log['status']] += 1
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'general': stats,
-                'quota': quota_info,
-                'daily_stats': daily_stats,
-                'total_api_keys': len(config.gemini_api_keys)
-            }
-        })
+        return snapshot_response('statistics')
     except Exception as e:
         logger.error(f"Erro ao obter estatísticas: {e}")
         return jsonify({
@@ -133,14 +226,46 @@ def api_stats_by_date():
 
 @app.route('/api/logs')
 def api_logs():
-    """API endpoint para logs recentes"""
+    """
+    API endpoint para logs, paginado por cursor (id) do mais novo ao mais antigo.
+
+    Parâmetros: limit (máx. LOG_PAGE_MAX), cursor, status, action, post_id,
+    date_from e date_to (YYYY-MM-DD, inclusivos).
+    """
     try:
-        limit = int(request.args.get('limit', 50))
-        logs = db.get_recent_logs(limit)
+        limit = request.args.get('limit', 50, type=int)
+        cursor = request.args.get('cursor', type=int)
+        post_id = request.args.get('post_id', type=int)
+        date_from = request.args.get('date_from')
+        date_to = request.args.get('date_to')
+
+        for value in (date_from, date_to):
+            if value:
+                try:
+                    datetime.strptime(value, '%Y-%m-%d')
+                except ValueError:
+                    return jsonify({
+                        'success': False,
+                        'error': "Datas devem estar no formato YYYY-MM-DD"
+                    }), 400
+
+        page = db.query_logs(
+            cursor=cursor,
+            limit=limit,
+            status=request.args.get('status'),
+            action=request.args.get('action'),
+            post_id=post_id,
+            date_from=date_from,
+            date_to=date_to
+        )
 
         return jsonify({
             'success': True,
-            'data': logs
+            'data': page['items'],
+            'pagination': {
+                'limit': min(max(limit, 1), LOG_PAGE_MAX),
+                'next_cursor': page['next_cursor']
+            }
         })
     except Exception as e:
         logger.error(f"Erro ao obter logs: {e}")
@@ -149,17 +274,15 @@ def api_logs():
             'error': str(e)
         }), 500
 
-@app.route('/api/run-test')
+@app.route('/api/run-test', methods=['GET', 'POST'])
 def api_run_test():
-    """API endpoint para executar teste manual"""
+    """API endpoint para executar teste manual (em segundo plano)"""
     try:
         logger.info("Executando teste manual via dashboard")
-        result = seo_optimizer.run_once()
-
-        return jsonify({
-            'success': True,
-            'data': result
-        })
+        job = job_runner.submit(
+            'run_test', 'cycle', lambda: run_and_refresh(seo_optimizer.run_once)
+        )
+        return job_response(job, 'run_test')
     except Exception as e:
         logger.error(f"Erro ao executar teste: {e}")
         return jsonify({
@@ -171,13 +294,15 @@ def api_run_test():
 def api_reset_quota():
     """API endpoint para resetar quota do Gemini"""
     try:
-        db.reset_gemini_quota()
+        db.reset_all_quotas()
 
-        # Reinicializa cliente Gemini
-        gemini_client.current_key_index = 0
-        gemini_client.initialize_client()
+        # Reinicializa cliente Gemini (só se já foi construído neste processo)
+        if gemini_client.is_initialized():
+            gemini_client.current_key_index = 0
+            gemini_client.initialize_client()
 
         logger.info("Quota do Gemini resetada via dashboard")
+        request_status_refresh()
 
         return jsonify({
             'success': True,
@@ -190,17 +315,15 @@ def api_reset_quota():
             'error': str(e)
         }), 500
 
-@app.route('/api/auto-process')
+@app.route('/api/auto-process', methods=['GET', 'POST'])
 def api_auto_process():
-    """API endpoint para executar automação João→Abel"""
+    """API endpoint para executar automação João→Abel (em segundo plano)"""
     try:
         logger.info("Executando automação João→Abel via dashboard")
-        result = seo_optimizer.run_optimization_cycle()
-
-        return jsonify({
-            'success': True,
-            'data': result
-        })
+        job = job_runner.submit(
+            'auto_process', 'cycle', lambda: run_and_refresh(seo_optimizer.run_optimization_cycle)
+        )
+        return job_response(job, 'auto_process')
     except Exception as e:
         logger.error(f"Erro ao executar automação: {e}")
         return jsonify({
@@ -208,27 +331,31 @@ def api_auto_process():
             'error': str(e)
         }), 500
 
+@app.route('/api/jobs')
+def api_jobs():
+    """API endpoint para os jobs recentes"""
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    return jsonify({
+        'success': True,
+        'data': [job.to_dict() for job in job_runner.list_jobs(limit)]
+    })
+
+@app.route('/api/jobs/<job_id>')
+def api_job(job_id):
+    """API endpoint para o estado e o resultado de um job"""
+    job = job_runner.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'error': 'Job não encontrado'}), 404
+    return jsonify({
+        'success': True,
+        'data': job.to_dict()
+    })
+
 @app.route('/api/config')
 def api_config():
     """API endpoint para informações de configuração"""
     try:
-        config_info = {
-            'wordpress_url': config.wordpress_url,
-            'wordpress_username': config.wordpress_username,
-            'target_author_id': config.target_author_id,  # Posts do João (ID 6)
-            'editor_author_id': config.editor_author_id,  # Você editando (ID 9)
-            'movie_category_id': config.movie_category_id,
-            'series_category_id': config.series_category_id,
-            'max_posts_per_cycle': config.max_posts_per_cycle,
-            'check_interval_minutes': config.check_interval_minutes,
-            'gemini_keys_count': len(config.gemini_api_keys),
-            'tmdb_configured': bool(config.tmdb_api_key)
-        }
-
-        return jsonify({
-            'success': True,
-            'data': config_info
-        })
+        return snapshot_response('config')
     except Exception as e:
         logger.error(f"Erro ao obter configuração: {e}")
         return jsonify({
@@ -252,6 +379,8 @@ def internal_error(error):
 
 def main():
     """Função principal do dashboard"""
+    from waitress import serve
+
     print("🌐 WordPress SEO Optimizer - Dashboard Web")
     print("="*50)
     print(f"📍 Acesse: http://localhost:{5000}")
@@ -267,7 +396,8 @@ def main():
     # desenvolvimento do Flask. É mais estável para ambientes como o Replit "Always On".
     # O modo de debug do Flask pode ser reativado descomentando a linha abaixo.
     # app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=False)
-    serve(app, host='0.0.0.0', port=5000)
+    # Cada conexão SSE ocupa uma thread do waitress enquanto estiver aberta
+    serve(app, host='0.0.0.0', port=5000, threads=config.dashboard_threads)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
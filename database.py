@@ -1,15 +1,36 @@
+import os
 import sqlite3
 import json
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional, Any
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Any, Sequence, Set, Tuple
 from contextlib import contextmanager
 
+from config import current_tenant, use_tenant
+from lazy import LazySingleton
+
+# Tamanho máximo de página da API de logs
+LOG_PAGE_MAX = 200
+
+# Espera máxima pelo lock de escrita do SQLite (vários workers no mesmo banco)
+LOCK_TIMEOUT_SECONDS = 30
+
+# A quota diária do Gemini vira à meia-noite do Pacífico. Offset fixo (UTC-8): no
+# horário de verão o dia daqui vira uma hora depois da quota, o que só subestima o saldo
+QUOTA_DAY_TZ = timezone(timedelta(hours=-8))
+
+def quota_day() -> str:
+    """Dia corrente da quota Gemini (AAAA-MM-DD)"""
+    return datetime.now(QUOTA_DAY_TZ).date().isoformat()
+
 class Database:
     """Classe para gerenciar o banco de dados SQLite"""
 
-    def __init__(self, db_path: str = "seo_dashboard.db"):
+    def __init__(self, db_path: str = "seo_dashboard.db", quota_db_path: Optional[str] = None):
         self.db_path = db_path
+        # Quota Gemini compartilhada: bancos de tenants usam a tabela do banco base
+        self.quota_db_path = quota_db_path or db_path
         self.logger = logging.getLogger(__name__)
         self.init_database()
 
@@ -18,6 +39,9 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
+            # WAL: leitores não bloqueiam o escritor (dashboard e workers em paralelo)
+            cursor.execute('PRAGMA journal_mode=WAL')
+
             # Tabela para controle de processamento
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS processing_control (
@@ -44,20 +68,58 @@ class Database:
                 )
             ''')
 
-            # Tabela para controle de quota Gemini - Removida a antiga
-            cursor.execute('DROP TABLE IF EXISTS gemini_quota')
-            
-            # Tabela para controle de quota Gemini (NOVO SCHEMA, 1 linha por chave)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS gemini_quota (
-                    api_key_index INTEGER PRIMARY KEY,
-                    requests_made INTEGER DEFAULT 0,
-                    quota_exceeded BOOLEAN DEFAULT 0,
-                    last_used_at TEXT,
-                    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # Índices para paginação por id e filtros da API de logs
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_status_id ON processing_logs (status, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_action_id ON processing_logs (action, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_post_id_id ON processing_logs (post_id, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_logs_created_at ON processing_logs (created_at)')
+
+            if self.holds_quota:
+                # Schema antigo da quota (sem uma linha por chave): descartado uma única vez.
+                # A tabela atual é compartilhada por processos e hosts e nunca é apagada na inicialização
+                cursor.execute('PRAGMA table_info(gemini_quota)')
+                quota_columns = {row['name'] for row in cursor.fetchall()}
+                if quota_columns and 'api_key_index' not in quota_columns:
+                    cursor.execute('DROP TABLE gemini_quota')
+                
+                # Tabela para controle de quota Gemini (NOVO SCHEMA, 1 linha por chave)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS gemini_quota (
+                        api_key_index INTEGER PRIMARY KEY,
+                        requests_made INTEGER DEFAULT 0,
+                        quota_exceeded BOOLEAN DEFAULT 0,
+                        quota_date TEXT,
+                        last_used_at TEXT,
+                        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+                    )
+                ''')
+                if 'api_key_index' in quota_columns and 'quota_date' not in quota_columns:
+                    # Uso gravado antes do dia da quota: sem data, não conta para hoje
+                    cursor.execute('ALTER TABLE gemini_quota ADD COLUMN quota_date TEXT')
+
+                # Requisições Gemini de cada tenant por dia da quota (divisão justa entre tenants)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS tenant_usage (
+                        quota_date TEXT NOT NULL,
+                        tenant TEXT NOT NULL,
+                        requests_made INTEGER NOT NULL DEFAULT 0,
+                        PRIMARY KEY (quota_date, tenant)
+                    )
+                ''')
+
+                # Circuit breakers das dependências externas, compartilhados por processos e tenants
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS circuit_breakers (
+                        name TEXT PRIMARY KEY,
+                        state TEXT NOT NULL DEFAULT 'closed',
+                        failures INTEGER NOT NULL DEFAULT 0,
+                        opened_at REAL,
+                        retry_at REAL NOT NULL DEFAULT 0,
+                        last_error TEXT,
+                        updated_at REAL
+                    )
+                ''')
 
             # Tabela para estatísticas gerais
             cursor.execute('''
@@ -69,6 +131,126 @@ class Database:
                 )
             ''')
 
+            # Cache persistente de respostas do TMDB (positivas e negativas)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS tmdb_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    endpoint TEXT,
+                    value TEXT,
+                    is_negative BOOLEAN DEFAULT 0,
+                    expires_at REAL,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_tmdb_cache_expires ON tmdb_cache (expires_at)')
+
+            # Pontuações SEO da auditoria do acervo (main.py --audit)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS post_scores (
+                    post_id INTEGER PRIMARY KEY,
+                    title TEXT,
+                    link TEXT,
+                    score INTEGER,
+                    expected_gain REAL,
+                    optimizable BOOLEAN DEFAULT 0,
+                    optimized BOOLEAN DEFAULT 0,
+                    rules TEXT,
+                    post_modified TEXT,
+                    scored_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_post_scores_gain ON post_scores (expected_gain)')
+
+            # Índice LSH de quase duplicatas (SimHash de 64 bits em 5 faixas)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS post_simhash (
+                    post_id INTEGER PRIMARY KEY,
+                    simhash INTEGER,
+                    band0 INTEGER,
+                    band1 INTEGER,
+                    band2 INTEGER,
+                    band3 INTEGER,
+                    band4 INTEGER,
+                    title TEXT,
+                    indexed_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            for band in range(5):
+                cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_post_simhash_band{band} ON post_simhash (band{band})')
+
+            # Catálogo local de tags e categorias do WordPress (links internos)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS wp_terms (
+                    taxonomy TEXT,
+                    term_id INTEGER,
+                    name TEXT,
+                    slug TEXT,
+                    link TEXT,
+                    post_count INTEGER DEFAULT 0,
+                    synced_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (taxonomy, term_id)
+                )
+            ''')
+
+            # Fingerprints por post: original, versão otimizada e último `modified` visto
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS post_fingerprints (
+                    post_id INTEGER PRIMARY KEY,
+                    original_hash TEXT,
+                    optimized_hash TEXT,
+                    wp_modified TEXT,
+                    optimized_at TEXT,
+                    checked_at TEXT
+                )
+            ''')
+
+            # Leases de posts em processamento (vários processos/hosts no mesmo banco)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS post_leases (
+                    post_id INTEGER PRIMARY KEY,
+                    worker_id TEXT,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    leased_at REAL,
+                    expires_at REAL,
+                    last_error TEXT
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_post_leases_expires ON post_leases (expires_at)')
+
+            # Fila de prioridade dos posts descobertos (done_at preenchido = já processado)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS post_queue (
+                    post_id INTEGER PRIMARY KEY,
+                    title TEXT,
+                    tags TEXT,
+                    expected_gain REAL,
+                    published_at REAL,
+                    enqueued_at REAL,
+                    done_at REAL
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_post_queue_published ON post_queue (published_at)')
+
+            # Resultados do modo simulação (DRY_RUN): o que teria sido gravado no WordPress
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS shadow_results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    post_id INTEGER,
+                    post_title TEXT,
+                    optimized_title TEXT,
+                    optimized_excerpt TEXT,
+                    optimized_content TEXT,
+                    focus_keyword TEXT,
+                    seo_score_before INTEGER,
+                    seo_score_after INTEGER,
+                    gemini_seconds REAL,
+                    diff TEXT,
+                    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_shadow_results_post_id ON shadow_results (post_id)')
+
             # Inicializa registros padrão se não existirem
             cursor.execute('SELECT COUNT(*) FROM processing_control')
             if cursor.fetchone()[0] == 0:
@@ -80,24 +262,27 @@ class Database:
             # Popula a tabela de quotas com base na configuração
             from config import config # Import local para evitar dependência circular
             num_keys = len(config.gemini_api_keys)
-            if num_keys > 0:
-                cursor.execute('SELECT COUNT(*) FROM gemini_quota')
-                if cursor.fetchone()[0] != num_keys:
-                    # Limpa e repopula para garantir consistência
-                    cursor.execute('DELETE FROM gemini_quota')
-                    for i in range(num_keys):
-                        cursor.execute('''
-                            INSERT INTO gemini_quota (api_key_index, last_used_at)
-                            VALUES (?, ?)
-                        ''', (i, datetime.now().isoformat()))
+            if num_keys > 0 and self.holds_quota:
+                # Acrescenta chaves novas e remove as que saíram; o uso das demais é preservado
+                cursor.executemany('''
+                    INSERT OR IGNORE INTO gemini_quota (api_key_index, last_used_at)
+                    VALUES (?, ?)
+                ''', [(i, datetime.now().isoformat()) for i in range(num_keys)])
+                cursor.execute('DELETE FROM gemini_quota WHERE api_key_index >= ?', (num_keys,))
 
             conn.commit()
             self.logger.info("Banco de dados inicializado com sucesso")
 
+    @property
+    def holds_quota(self) -> bool:
+        """Indica se a tabela de quota Gemini fica neste banco (banco base)"""
+        return self.quota_db_path == self.db_path
+
     @contextmanager
-    def get_connection(self):
-        """Context manager para conexões com o banco"""
-        conn = sqlite3.connect(self.db_path)
+    def get_connection(self, path: Optional[str] = None):
+        """Context manager para conexões com o banco (ou com outro arquivo, como o da quota)"""
+        # Espera pelo lock de escrita em vez de falhar quando há vários processos
+        conn = sqlite3.connect(path or self.db_path, timeout=LOCK_TIMEOUT_SECONDS)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
@@ -113,12 +298,12 @@ class Database:
             return result[0] if result else 0
 
     def update_last_processed_post_id(self, post_id: int):
-        """Atualiza o ID do último post processado"""
+        """Avança o ID do último post processado (nunca volta, mesmo com workers fora de ordem)"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE processing_control 
-                SET last_processed_post_id = ?, 
+                SET last_processed_post_id = MAX(last_processed_post_id, ?), 
                     last_processed_date = ?,
                     updated_at = ?,
                     total_posts_processed = total_posts_processed + 1
@@ -144,49 +329,145 @@ class Database:
         """Retorna logs recentes"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
+            # O id é crescente com a inserção, então ordena pela chave primária
             cursor.execute('''
                 SELECT * FROM processing_logs 
-                ORDER BY created_at DESC 
+                ORDER BY id DESC 
                 LIMIT ?
-            ''', (limit,))
+            ''', (min(limit, LOG_PAGE_MAX),))
             return [dict(row) for row in cursor.fetchall()]
 
-    def get_best_available_key_index(self) -> Optional[int]:
+    def query_logs(self, cursor: Optional[int] = None, limit: int = 50,
+                   status: Optional[str] = None, action: Optional[str] = None,
+                   post_id: Optional[int] = None, date_from: Optional[str] = None,
+                   date_to: Optional[str] = None) -> Dict:
         """
-        Retorna o índice da melhor chave de API disponível.
-        A melhor chave é a que não excedeu a quota e foi usada menos recentemente.
+        Consulta paginada de logs (keyset por id, do mais novo ao mais antigo).
+
+        Args:
+            cursor: Id do último log da página anterior (retorna ids menores).
+            limit: Tamanho da página, limitado a LOG_PAGE_MAX.
+            status, action, post_id: Filtros exatos opcionais.
+            date_from, date_to: Intervalo de datas 'YYYY-MM-DD' (inclusivo).
+
+        Returns:
+            Dict com 'items' e 'next_cursor' (None na última página).
         """
+        limit = max(1, min(limit, LOG_PAGE_MAX))
+        conditions = []
+        params: List[Any] = []
+
+        if cursor is not None:
+            conditions.append('id < ?')
+            params.append(cursor)
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        if action:
+            conditions.append('action = ?')
+            params.append(action)
+        if post_id is not None:
+            conditions.append('post_id = ?')
+            params.append(post_id)
+        if date_from:
+            conditions.append('created_at >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append("created_at < DATE(?, '+1 day')")
+            params.append(date_to)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        with self.get_connection() as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(f'''
+                SELECT * FROM processing_logs
+                {where}
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (*params, limit + 1))
+            rows = [dict(row) for row in db_cursor.fetchall()]
+
+        # Uma linha extra indica que existe próxima página
+        has_more = len(rows) > limit
+        items = rows[:limit]
+        return {
+            'items': items,
+            'next_cursor': items[-1]['id'] if has_more else None
+        }
+
+    def get_max_log_id(self) -> int:
+        """Retorna o maior id de log existente (0 se não houver logs)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COALESCE(MAX(id), 0) FROM processing_logs')
+            return cursor.fetchone()[0]
+
+    def get_logs_after_id(self, last_id: int, limit: int = 100) -> List[Dict]:
+        """Retorna logs com id maior que `last_id`, em ordem crescente"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
+                SELECT * FROM processing_logs
+                WHERE id > ?
+                ORDER BY id ASC
+                LIMIT ?
+            ''', (last_id, limit))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_best_available_key_index(self, allowed: Optional[Sequence[int]] = None) -> Optional[int]:
+        """
+        Retorna o índice da melhor chave de API disponível.
+        A melhor chave é a que não excedeu a quota hoje e foi usada menos recentemente.
+
+        Args:
+            allowed: Restringe a escolha a estes índices (chaves reservadas a um tenant)
+        """
+        allowed_filter = ''
+        params: Tuple = ()
+        if allowed:
+            allowed_filter = f"AND api_key_index IN ({', '.join('?' * len(allowed))})"
+            params = tuple(allowed)
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
                 SELECT api_key_index FROM gemini_quota
-                WHERE quota_exceeded = 0
+                WHERE (quota_exceeded = 0 OR quota_date IS NOT ?) {allowed_filter}
                 ORDER BY last_used_at ASC
                 LIMIT 1
-            ''')
+            ''', (quota_day(),) + params)
             result = cursor.fetchone()
             return result['api_key_index'] if result else None
 
-    def update_key_usage(self, api_key_index: int, quota_exceeded: bool = False):
+    def update_key_usage(self, api_key_index: int, quota_exceeded: bool = False,
+                         tenant: Optional[str] = None):
         """
         Atualiza o uso de uma chave, incrementando requisições e marcando se a quota foi excedida.
+        A contagem é do dia da quota: a primeira requisição de um novo dia recomeça do zero.
+        Com `tenant`, a requisição também conta no consumo do dia desse tenant.
         """
-        with self.get_connection() as conn:
+        today = quota_day()
+        with self.get_connection(self.quota_db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE gemini_quota
-                SET requests_made = requests_made + 1,
+                SET requests_made = CASE WHEN quota_date = ? THEN requests_made + 1 ELSE 1 END,
                     quota_exceeded = ?,
+                    quota_date = ?,
                     last_used_at = ?,
                     updated_at = ?
                 WHERE api_key_index = ?
-            ''', (quota_exceeded, datetime.now().isoformat(), datetime.now().isoformat(), api_key_index))
+            ''', (today, quota_exceeded, today, datetime.now().isoformat(), datetime.now().isoformat(), api_key_index))
+            if tenant is not None:
+                cursor.execute('''
+                    INSERT INTO tenant_usage (quota_date, tenant, requests_made) VALUES (?, ?, 1)
+                    ON CONFLICT(quota_date, tenant) DO UPDATE SET requests_made = requests_made + 1
+                ''', (today, tenant))
             conn.commit()
             self.logger.info(f"Uso da chave {api_key_index} atualizado. Quota excedida: {quota_exceeded}")
 
     def reset_all_quotas(self):
         """Reseta o status de quota_exceeded para todas as chaves."""
-        with self.get_connection() as conn:
+        with self.get_connection(self.quota_db_path) as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE gemini_quota
@@ -195,13 +476,130 @@ class Database:
             conn.commit()
             self.logger.info("Todas as quotas de chaves Gemini foram resetadas.")
 
+    def get_gemini_quota_info(self) -> Dict:
+        """
+        Retorna um resumo da quota Gemini: a melhor chave disponível (ou a
+        última, se todas excederam) e se ainda há alguma chave utilizável.
+        """
+        keys = self.get_all_keys_status()
+        if not keys:
+            return {'api_key_index': 0, 'requests_made': 0, 'quota_exceeded': False}
+
+        available = [key for key in keys if not key['quota_exceeded']]
+        if available:
+            current = min(available, key=lambda key: key['last_used_at'] or '')
+        else:
+            current = keys[-1]
+
+        return {
+            'api_key_index': current['api_key_index'],
+            'requests_made': current['requests_made'],
+            'quota_exceeded': not available,
+            'last_used_at': current['last_used_at'],
+            'last_reset_date': current['updated_at']
+        }
+
     def get_all_keys_status(self) -> List[Dict]:
-        """Retorna o status de todas as chaves de API do Gemini."""
-        with self.get_connection() as conn:
+        """
+        Retorna o status de todas as chaves de API do Gemini no dia da quota
+        atual: uso e quota excedida de dias anteriores aparecem zerados.
+        """
+        today = quota_day()
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT api_key_index,
+                       CASE WHEN quota_date = ? THEN requests_made ELSE 0 END AS requests_made,
+                       CASE WHEN quota_date = ? THEN quota_exceeded ELSE 0 END AS quota_exceeded,
+                       quota_date, last_used_at, created_at, updated_at
+                FROM gemini_quota ORDER BY api_key_index ASC
+            ''', (today, today))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_tenant_usage(self) -> Dict[str, int]:
+        """Requisições Gemini de cada tenant no dia da quota atual"""
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT tenant, requests_made FROM tenant_usage WHERE quota_date = ?', (quota_day(),))
+            return {row['tenant']: row['requests_made'] for row in cursor.fetchall()}
+
+    def get_circuit_breaker(self, name: str) -> Optional[Dict]:
+        """Estado de um circuit breaker (None = nunca falhou, fechado)"""
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM circuit_breakers WHERE name = ?', (name,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def get_circuit_breakers(self) -> List[Dict]:
+        """Estado de todos os circuit breakers já registrados"""
+        with self.get_connection(self.quota_db_path) as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM gemini_quota ORDER BY api_key_index ASC')
+            cursor.execute('SELECT * FROM circuit_breakers ORDER BY name ASC')
             return [dict(row) for row in cursor.fetchall()]
 
+    def claim_circuit_probe(self, name: str, retry_at: float) -> bool:
+        """
+        Passa um circuito aberto (com a espera vencida) para meio-aberto e
+        reserva a chamada de teste. Operação atômica: só um chamador, entre
+        todos os processos, ganha a vez até `retry_at`.
+        """
+        now = time.time()
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE circuit_breakers SET state = 'half_open', retry_at = ?, updated_at = ?
+                WHERE name = ? AND state != 'closed' AND retry_at <= ?
+            ''', (retry_at, now, name, now))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def record_circuit_failure(self, name: str, error: str, threshold: int, retry_at: float) -> Dict:
+        """
+        Conta uma falha da dependência. O circuito abre (até `retry_at`) ao
+        atingir `threshold` falhas seguidas ou quando a chamada de teste do
+        estado meio-aberto falha. Retorna o estado atualizado.
+        """
+        now = time.time()
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO circuit_breakers (name, state, failures, opened_at, retry_at, last_error, updated_at)
+                VALUES (:name, CASE WHEN :threshold <= 1 THEN 'open' ELSE 'closed' END, 1,
+                        CASE WHEN :threshold <= 1 THEN :now END,
+                        CASE WHEN :threshold <= 1 THEN :retry_at ELSE 0 END, :error, :now)
+                ON CONFLICT (name) DO UPDATE SET
+                    state = CASE WHEN state = 'half_open' OR failures + 1 >= :threshold
+                                 THEN 'open' ELSE state END,
+                    opened_at = CASE WHEN state = 'closed' AND failures + 1 >= :threshold
+                                     THEN :now ELSE opened_at END,
+                    retry_at = CASE WHEN state = 'half_open' OR (state = 'closed' AND failures + 1 >= :threshold)
+                                    THEN :retry_at ELSE retry_at END,
+                    failures = failures + 1,
+                    last_error = :error,
+                    updated_at = :now
+            ''', {'name': name, 'threshold': threshold, 'now': now, 'retry_at': retry_at, 'error': error})
+            conn.commit()
+            cursor.execute('SELECT * FROM circuit_breakers WHERE name = ?', (name,))
+            return dict(cursor.fetchone())
+
+    def close_circuit_breaker(self, name: str) -> bool:
+        """Fecha o circuito e zera as falhas; retorna se ele estava aberto ou meio-aberto"""
+        with self.get_connection(self.quota_db_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT state, failures FROM circuit_breakers WHERE name = ?', (name,))
+            row = cursor.fetchone()
+            # Caso comum (fechado e sem falhas): nenhuma escrita
+            if not row or (row['state'] == 'closed' and not row['failures']):
+                return False
+            cursor.execute('''
+                UPDATE circuit_breakers SET state = 'closed', failures = 0, opened_at = NULL,
+                    retry_at = 0, updated_at = ?
+                WHERE name = ?
+            ''', (time.time(), name))
+            conn.commit()
+            return row['state'] != 'closed'
+
     def get_statistics(self) -> Dict:
         """Retorna estatísticas gerais do sistema"""
         try:
@@ -215,21 +613,21 @@ class Database:
                 # Posts processados hoje
                 cursor.execute('''
                     SELECT COUNT(*) FROM processing_logs 
-                    WHERE DATE(created_at) = DATE('now') AND status = 'success'
+                    WHERE created_at >= DATE('now') AND status = 'success'
                 ''')
                 today_processed = cursor.fetchone()[0]
 
                 # Posts com erro hoje
                 cursor.execute('''
                     SELECT COUNT(*) FROM processing_logs 
-                    WHERE DATE(created_at) = DATE('now') AND status = 'error'
+                    WHERE created_at >= DATE('now') AND status = 'error'
                 ''')
                 today_errors = cursor.fetchone()[0]
 
                 # Último processamento
                 cursor.execute('''
                     SELECT created_at FROM processing_logs 
-                    ORDER BY created_at DESC LIMIT 1
+                    ORDER BY id DESC LIMIT 1
                 ''')
                 last_processing = cursor.fetchone()
                 last_processing = last_processing[0] if last_processing else None
@@ -276,6 +674,398 @@ class Database:
                     return result[0]
             return None
 
+    def get_tmdb_cache_entry(self, cache_key: str) -> Optional[Dict]:
+        """Retorna uma entrada válida (não expirada) do cache do TMDB"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT value, is_negative, expires_at FROM tmdb_cache
+                WHERE cache_key = ? AND expires_at > ?
+            ''', (cache_key, time.time()))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            return {
+                'value': json.loads(row['value']) if row['value'] is not None else None,
+                'is_negative': bool(row['is_negative']),
+                'expires_at': row['expires_at']
+            }
+
+    def set_tmdb_cache_entry(self, cache_key: str, endpoint: str, value: Any, expires_at: float):
+        """Grava (ou substitui) uma entrada do cache do TMDB; value None = resultado negativo"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO tmdb_cache (cache_key, endpoint, value, is_negative, expires_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (cache_key, endpoint, json.dumps(value) if value is not None else None,
+                  value is None, expires_at))
+            conn.commit()
+
+    def purge_expired_tmdb_cache(self) -> int:
+        """Remove entradas expiradas do cache do TMDB e retorna quantas foram removidas"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM tmdb_cache WHERE expires_at <= ?', (time.time(),))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_optimized_post_ids(self) -> Set[int]:
+        """IDs de posts que já foram otimizados com sucesso"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT DISTINCT post_id FROM processing_logs
+                WHERE action = 'optimization' AND status = 'success'
+            ''')
+            return {row[0] for row in cursor.fetchall()}
+
+    def save_post_scores(self, scores: List[Dict]):
+        """Grava (ou atualiza) as pontuações de auditoria de um lote de posts"""
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO post_scores
+                    (post_id, title, link, score, expected_gain, optimizable, optimized,
+                     rules, post_modified, scored_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (item['post_id'], item['title'], item['link'], item['score'],
+                 item['expected_gain'], item['optimizable'], item['optimized'],
+                 json.dumps(item['rules'], ensure_ascii=False), item['post_modified'], now)
+                for item in scores
+            ])
+            conn.commit()
+
+    def get_top_post_scores(self, limit: int = 20, optimizable_only: bool = True) -> List[Dict]:
+        """Posts ainda não otimizados com maior ganho esperado, do maior para o menor"""
+        query = 'SELECT * FROM post_scores WHERE optimized = 0 AND expected_gain > 0'
+        if optimizable_only:
+            query += ' AND optimizable = 1'
+        query += ' ORDER BY expected_gain DESC, post_id DESC LIMIT ?'
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, (limit,))
+            rows = []
+            for row in cursor.fetchall():
+                item = dict(row)
+                item['rules'] = json.loads(item['rules']) if item['rules'] else {}
+                rows.append(item)
+            return rows
+
+    def save_post_simhashes(self, items: List[tuple]):
+        """Indexa SimHashes de posts: lista de (post_id, simhash, faixas, título)"""
+        rows = []
+        for post_id, value, bands, title in items:
+            # SQLite guarda inteiros de 64 bits com sinal
+            signed = value - (1 << 64) if value >= 1 << 63 else value
+            rows.append((post_id, signed, *bands, title))
+
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT OR REPLACE INTO post_simhash
+                    (post_id, simhash, band0, band1, band2, band3, band4, title)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            conn.commit()
+
+    def find_simhash_candidates(self, bands: tuple) -> List[tuple]:
+        """Posts que compartilham ao menos uma faixa do SimHash: lista de (post_id, simhash)"""
+        query = ' UNION ALL '.join(
+            f'SELECT post_id, simhash FROM post_simhash WHERE band{band} = ?'
+            for band in range(len(bands))
+        )
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(bands))
+            return [(row[0], row[1] % (1 << 64)) for row in cursor.fetchall()]
+
+    def save_wp_terms(self, taxonomy: str, terms: List[Dict], replace: bool = False):
+        """
+        Grava termos (formato da API do WordPress) no catálogo local.
+        Com replace=True, os termos atuais da taxonomia são substituídos
+        (sincronização completa, remove termos apagados no site).
+        """
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            if replace:
+                cursor.execute('DELETE FROM wp_terms WHERE taxonomy = ?', (taxonomy,))
+            cursor.executemany('''
+                INSERT OR REPLACE INTO wp_terms (taxonomy, term_id, name, slug, link, post_count, synced_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (taxonomy, term['id'], term.get('name', ''), term.get('slug', ''),
+                 term.get('link', ''), term.get('count', 0), now)
+                for term in terms
+            ])
+            conn.commit()
+
+    def get_max_wp_term_id(self, taxonomy: str) -> int:
+        """Maior ID de termo já catalogado na taxonomia (0 se vazia)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(term_id) FROM wp_terms WHERE taxonomy = ?', (taxonomy,))
+            return cursor.fetchone()[0] or 0
+
+    def get_wp_terms(self) -> List[Dict]:
+        """Todos os termos do catálogo local"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT taxonomy, term_id, name, slug, link, post_count FROM wp_terms')
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_post_fingerprint(self, post_id: int) -> Optional[Dict]:
+        """Fingerprint gravado na última otimização do post (ou None)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM post_fingerprints WHERE post_id = ?', (post_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
+
+    def save_post_fingerprint(self, post_id: int, original_hash: str, optimized_hash: str):
+        """Registra o conteúdo original e o otimizado de um post recém-otimizado"""
+        now = datetime.now().isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT OR REPLACE INTO post_fingerprints
+                    (post_id, original_hash, optimized_hash, wp_modified, optimized_at, checked_at)
+                VALUES (?, ?, ?, NULL, ?, ?)
+            ''', (post_id, original_hash, optimized_hash, now, now))
+            conn.commit()
+
+    def touch_post_fingerprint(self, post_id: int, wp_modified: str):
+        """Guarda o `modified` de uma versão já conferida como sem mudanças"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE post_fingerprints SET wp_modified = ?, checked_at = ? WHERE post_id = ?
+            ''', (wp_modified, datetime.now().isoformat(), post_id))
+            conn.commit()
+
+    def claim_post_lease(self, post_id: int, worker_id: str, ttl_seconds: float,
+                         max_attempts: Optional[int] = None) -> bool:
+        """
+        Reserva um post para um worker. Operação atômica: só tem sucesso se
+        não há lease ou a atual expirou (e, com `max_attempts`, se o post
+        ainda não falhou esse número de vezes).
+        """
+        now = time.time()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO post_leases (post_id, worker_id, status, attempts, leased_at, expires_at)
+                VALUES (?, ?, 'leased', 1, ?, ?)
+                ON CONFLICT (post_id) DO UPDATE SET
+                    worker_id = excluded.worker_id,
+                    status = 'leased',
+                    attempts = post_leases.attempts + 1,
+                    leased_at = excluded.leased_at,
+                    expires_at = excluded.expires_at
+                WHERE post_leases.expires_at <= ? AND (? IS NULL OR post_leases.attempts < ?)
+            ''', (post_id, worker_id, now, now + ttl_seconds, now, max_attempts, max_attempts))
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def renew_post_leases(self, worker_id: str, ttl_seconds: float) -> int:
+        """Heartbeat: estende as leases ativas de um worker"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE post_leases SET expires_at = ?
+                WHERE worker_id = ? AND status = 'leased'
+            ''', (time.time() + ttl_seconds, worker_id))
+            conn.commit()
+            return cursor.rowcount
+
+    def release_post_lease(self, post_id: int, worker_id: Optional[str] = None):
+        """Libera a lease de um post concluído (worker_id=None: de qualquer worker)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                DELETE FROM post_leases WHERE post_id = ? AND (? IS NULL OR worker_id = ?)
+            ''', (post_id, worker_id, worker_id))
+            conn.commit()
+
+    def fail_post_lease(self, post_id: int, worker_id: str, retry_after_seconds: float, error: str = ''):
+        """Marca a falha de um post; a lease vence em `retry_after_seconds` para nova tentativa"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE post_leases SET status = 'failed', expires_at = ?, last_error = ?
+                WHERE post_id = ? AND worker_id = ?
+            ''', (time.time() + retry_after_seconds, error, post_id, worker_id))
+            conn.commit()
+
+    def interrupt_post_lease(self, post_id: int, worker_id: str, error: str = ''):
+        """Devolve um post interrompido por fatores externos: disponível já, sem gastar a tentativa"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                UPDATE post_leases SET status = 'interrupted', expires_at = ?, last_error = ?,
+                    attempts = MAX(attempts - 1, 0)
+                WHERE post_id = ? AND worker_id = ?
+            ''', (time.time(), error, post_id, worker_id))
+            conn.commit()
+
+    def get_recoverable_post_leases(self, below_or_equal_id: int, max_attempts: int, limit: int) -> List[int]:
+        """
+        Posts abandonados que o polling não vê mais (ID até o cursor): leases
+        vencidas de workers que morreram ou de falhas com tentativas restantes.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT post_id FROM post_leases
+                WHERE expires_at <= ? AND post_id <= ? AND attempts < ?
+                ORDER BY post_id ASC
+                LIMIT ?
+            ''', (time.time(), below_or_equal_id, max_attempts, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+    def get_post_lease_summary(self) -> Dict:
+        """Leases ativas por worker e falhas pendentes, para o status do sistema"""
+        now = time.time()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT worker_id, COUNT(*) FROM post_leases
+                WHERE status = 'leased' AND expires_at > ?
+                GROUP BY worker_id
+            ''', (now,))
+            active = {row[0]: row[1] for row in cursor.fetchall()}
+            cursor.execute("SELECT COUNT(*) FROM post_leases WHERE status = 'failed'")
+            failed = cursor.fetchone()[0]
+            return {'active': active, 'failed': failed}
+
+    def enqueue_posts(self, entries: List[Dict]):
+        """
+        Coloca posts na fila de prioridade. Um post já pendente mantém o
+        horário de entrada (a espera conta para o envelhecimento); um já
+        processado que volta a ser descoberto entra de novo.
+        """
+        now = time.time()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany('''
+                INSERT INTO post_queue (post_id, title, tags, expected_gain, published_at, enqueued_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (post_id) DO UPDATE SET
+                    title = excluded.title,
+                    tags = excluded.tags,
+                    expected_gain = excluded.expected_gain,
+                    published_at = excluded.published_at,
+                    enqueued_at = CASE WHEN post_queue.done_at IS NULL
+                                       THEN post_queue.enqueued_at ELSE excluded.enqueued_at END,
+                    done_at = NULL
+            ''', [
+                (entry['post_id'], entry['title'], json.dumps(entry['tags']), entry['expected_gain'],
+                 entry['published_at'], now)
+                for entry in entries
+            ])
+            conn.commit()
+
+    def get_queued_posts(self, max_attempts: int) -> List[Dict]:
+        """
+        Posts pendentes na fila que podem ser processados agora: sem lease
+        ativa de outro worker e sem ter esgotado as tentativas.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT q.* FROM post_queue q
+                WHERE q.done_at IS NULL AND NOT EXISTS (
+                    SELECT 1 FROM post_leases l
+                    WHERE l.post_id = q.post_id AND (l.expires_at > ? OR l.attempts >= ?)
+                )
+            ''', (time.time(), max_attempts))
+            rows = []
+            for row in cursor.fetchall():
+                item = dict(row)
+                item['tags'] = json.loads(item['tags']) if item['tags'] else []
+                rows.append(item)
+            return rows
+
+    def get_queue_tags_since(self, published_after: float) -> List[List[int]]:
+        """Tags dos posts da fila (pendentes ou processados) publicados depois de um horário"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT tags FROM post_queue WHERE published_at >= ?', (published_after,))
+            return [json.loads(row[0]) if row[0] else [] for row in cursor.fetchall()]
+
+    def complete_queued_post(self, post_id: int):
+        """Marca o post da fila como processado (continua contando para as tags em alta)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('UPDATE post_queue SET done_at = ? WHERE post_id = ? AND done_at IS NULL',
+                           (time.time(), post_id))
+            conn.commit()
+
+    def remove_queued_post(self, post_id: int):
+        """Tira da fila um post que não deve mais ser processado (apagado ou despublicado)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM post_queue WHERE post_id = ?', (post_id,))
+            conn.commit()
+
+    def prune_post_queue(self, published_before: float) -> int:
+        """Apaga da fila os posts já processados publicados antes de um horário"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('DELETE FROM post_queue WHERE done_at IS NOT NULL AND published_at < ?',
+                           (published_before,))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_post_queue_summary(self, max_attempts: int) -> Dict:
+        """Posts pendentes na fila e quantos deles esgotaram as tentativas"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM post_queue WHERE done_at IS NULL')
+            pending = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT COUNT(*) FROM post_queue q JOIN post_leases l ON l.post_id = q.post_id
+                WHERE q.done_at IS NULL AND l.attempts >= ? AND l.status = 'failed'
+            ''', (max_attempts,))
+            return {'pending': pending, 'exhausted': cursor.fetchone()[0]}
+
+    def save_shadow_result(self, result: Dict):
+        """Grava o resultado de um post processado em modo simulação"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO shadow_results
+                    (post_id, post_title, optimized_title, optimized_excerpt, optimized_content,
+                     focus_keyword, seo_score_before, seo_score_after, gemini_seconds, diff, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (result['post_id'], result['post_title'], result['optimized_title'],
+                  result['optimized_excerpt'], result['optimized_content'], result['focus_keyword'],
+                  result['seo_score_before'], result['seo_score_after'], result['gemini_seconds'],
+                  result['diff'], datetime.now().isoformat()))
+            conn.commit()
+
+    def get_shadow_results(self, limit: int = 20) -> List[Dict]:
+        """Resultados mais recentes do modo simulação"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT * FROM shadow_results ORDER BY id DESC LIMIT ?', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def get_shadow_summary(self) -> Dict:
+        """Totais do modo simulação: posts, pontuação média antes/depois e tempo do Gemini"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT COUNT(*) AS posts, AVG(seo_score_before) AS avg_score_before,
+                       AVG(seo_score_after) AS avg_score_after, AVG(gemini_seconds) AS avg_gemini_seconds
+                FROM shadow_results
+            ''')
+            return dict(cursor.fetchone())
+
     def get_processed_count_for_date(self, target_date: str) -> int:
         """
         Retorna o número de posts otimizados com sucesso em uma data específica.
@@ -290,9 +1080,58 @@ class Database:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT COUNT(*) FROM processing_logs 
-                WHERE action = 'optimization' AND status = 'success' AND DATE(created_at) = ?
-            ''', (target_date,))
+                WHERE action = 'optimization' AND status = 'success'
+                  AND created_at >= DATE(?) AND created_at < DATE(?, '+1 day')
+            ''', (target_date, target_date))
             return cursor.fetchone()[0]
 
-# Instância global do banco
-db = Database()
\ No newline at end of file
+def shadow_database_path(path: str) -> str:
+    """Banco usado no modo simulação (`seo_dashboard.db` -> `seo_dashboard.shadow.db`)"""
+    root, extension = os.path.splitext(path)
+    return f"{root}.shadow{extension or '.db'}"
+
+# Tabelas do banco base usadas também pelo modo simulação
+_QUOTA_TABLES = ('gemini_quota', 'tenant_usage', 'circuit_breakers')
+
+def _has_quota_tables(path: str) -> bool:
+    """Indica, só com leitura, se o banco base já tem as tabelas compartilhadas no schema atual"""
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path, timeout=LOCK_TIMEOUT_SECONDS)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        quota_columns = {row[1] for row in conn.execute('PRAGMA table_info(gemini_quota)')}
+    finally:
+        conn.close()
+    return set(_QUOTA_TABLES) <= tables and 'quota_date' in quota_columns
+
+def _open_database() -> 'Database':
+    """
+    Banco do tenant ativo; a quota Gemini fica sempre no banco base,
+    compartilhada. No modo simulação, cursor, fila, leases e logs ficam em
+    um banco à parte, e a quota (as requisições ao Gemini são reais) no base,
+    que só é inicializado se ainda não tem as tabelas compartilhadas (no
+    schema atual): a simulação não mexe no schema nem nos dados da produção.
+    """
+    from config import config
+
+    base_path = config.base_snapshot().database_path
+    path = config.database_path
+    if config.dry_run:
+        path = shadow_database_path(path)
+    if path != base_path:
+        # Garante a tabela de quota no banco base antes do primeiro uso
+        with use_tenant(None):
+            if not config.dry_run:
+                db.get_instance()
+            elif base_path not in _quota_databases:
+                if not _has_quota_tables(base_path):
+                    Database(base_path)
+                _quota_databases.add(base_path)
+    return Database(path, quota_db_path=base_path)
+
+# Bancos base já inicializados só para a quota (modo simulação)
+_quota_databases: Set[str] = set()
+
+# Instância global do banco, uma por tenant (schema inicializado no primeiro uso)
+db = LazySingleton(_open_database, scope=current_tenant)
\ No newline at end of file
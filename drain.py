@@ -0,0 +1,231 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from config import config
+from database import db
+from events import Event, event_bus
+from gemini_client import gemini_client
+from seo_optimizer import seo_optimizer
+
+# Duração desejada de um lote: entre lotes a quota é relida e o estado salvo
+TARGET_BATCH_SECONDS = 120
+
+# Estimativa inicial de um post (Gemini + WordPress) antes da primeira medição
+DEFAULT_POST_SECONDS = 30.0
+
+# Peso da medição mais recente nas médias móveis exponenciais
+EWMA_ALPHA = 0.3
+
+# Estatística com o progresso da drenagem (retomada após interrupção)
+_STATE_KEY = 'drain_state'
+
+# Etapas publicadas por `_process_single_post` (cada evento encerra a anterior)
+_STAGE_NAMES = {'started': 'preparo', 'gemini': 'gemini', 'wordpress': 'wordpress'}
+
+def _ewma(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + EWMA_ALPHA * (value - previous)
+
+class BacklogDrainer:
+    """
+    Drena o backlog de posts (main.py --drain) o mais rápido que as quotas
+    Gemini e o ritmo de escrita no WordPress permitem, em lotes em vez de
+    MAX_POSTS_PER_CYCLE por ciclo:
+
+    - o tempo de cada etapa (preparo, Gemini, WordPress) é medido pelos
+      eventos `post_progress`; o lote tem os posts que cabem em
+      TARGET_BATCH_SECONDS, limitado por DRAIN_MAX_BATCH e pela quota
+      restante no dia da quota (GEMINI_DAILY_REQUESTS_PER_KEY menos o uso
+      de hoje de cada chave) dividida pelas requisições Gemini por post,
+      medidas pelo próprio cliente Gemini deste processo;
+    - as atualizações no WordPress respeitam WORDPRESS_WRITES_PER_MINUTE;
+    - o cursor é o mesmo `last_processed_post_id` do modo contínuo e o
+      progresso fica na estatística `drain_state`, então uma drenagem
+      interrompida continua de onde parou;
+    - `stop()` (SIGTERM/SIGINT) termina o post atual e encerra.
+    """
+
+    def __init__(self, stop_event: Optional[threading.Event] = None):
+        self.logger = logging.getLogger(__name__)
+        self._stop = stop_event or threading.Event()
+        self._stage_seconds: Dict[str, float] = {}
+        self._requests_per_post: Optional[float] = None
+        self._current_stage: Optional[Tuple[str, float]] = None
+        self._next_write_at = 0.0
+        self._state: Dict = {}
+
+    def stop(self):
+        """Pede o encerramento após o post em andamento"""
+        self._stop.set()
+
+    def run(self) -> Dict:
+        """Processa lotes até esvaziar o backlog, esgotar a quota ou receber stop()"""
+        self._load_state()
+        event_bus.add_listener(self._on_event)
+
+        reason = 'backlog vazio'
+        while True:
+            if self._stop.is_set():
+                reason = 'interrompido'
+                break
+
+            batch_size, limit_reason = self.next_batch_size()
+            if not batch_size:
+                reason = limit_reason
+                break
+
+            self.logger.info(f"Drenagem: lote de até {batch_size} posts ({limit_reason})")
+            requests_before = self._requests_made()
+            result = seo_optimizer.run_optimization_cycle(max_posts=batch_size,
+                                                          before_post=self._pace)
+            self._record_batch(result, self._requests_made() - requests_before)
+
+            if result.get('circuit_open'):
+                # Dependência fora do ar: o próximo ciclo agendado (ou --drain) retoma a fila
+                reason = f"{result['circuit_open']} indisponível (circuito aberto)"
+                break
+            if result.get('errors') and not result.get('posts_processed'):
+                reason = 'falha no ciclo'
+                break
+            if not result.get('posts_found'):
+                break
+            if not result.get('posts_processed'):
+                reason = 'posts restantes em processamento por outros workers'
+                break
+            if result.get('posts_processed') and not result.get('posts_success'):
+                # O cursor não avançou: repetir o lote só repetiria os mesmos erros
+                reason = 'lote sem nenhum sucesso'
+                break
+
+        self._state['status'] = 'interrompido' if reason == 'interrompido' else 'concluído'
+        self._state['stop_reason'] = reason
+        self._save_state()
+        self.logger.info(
+            f"Drenagem encerrada ({reason}): {self._state['posts_success']} sucessos, "
+            f"{self._state['posts_error']} erros em {self._state['batches']} lotes"
+        )
+        return dict(self._state)
+
+    def next_batch_size(self) -> Tuple[int, str]:
+        """Tamanho do próximo lote e o fator que o limitou (0 = não há como continuar)"""
+        settings = config.snapshot()
+        if db.get_best_available_key_index(settings.gemini_key_indexes) is None:
+            return 0, 'todas as chaves Gemini esgotadas'
+
+        write_interval = 0 if settings.dry_run else 60 / settings.wordpress_writes_per_minute
+        post_seconds = max(self.post_seconds(), write_interval)
+        size = max(1, int(TARGET_BATCH_SECONDS // post_seconds))
+        limit_reason = f"~{post_seconds:.1f}s por post"
+        if size >= settings.drain_max_batch:
+            size, limit_reason = settings.drain_max_batch, 'DRAIN_MAX_BATCH'
+
+        remaining = self.remaining_requests()
+        if remaining is not None:
+            affordable = int(remaining // (self._requests_per_post or 1.0))
+            if affordable < size:
+                size = affordable
+                limit_reason = f"quota restante de {remaining} requisições"
+            if not size:
+                return 0, 'quota diária estimada esgotada'
+        return size, limit_reason
+
+    def post_seconds(self) -> float:
+        """Tempo medido de um post somando as etapas (estimativa padrão antes de medir)"""
+        return sum(self._stage_seconds.values()) or DEFAULT_POST_SECONDS
+
+    def remaining_requests(self) -> Optional[int]:
+        """Requisições Gemini restantes hoje nas chaves disponíveis (None = sem limite configurado)"""
+        settings = config.snapshot()
+        daily_limit = settings.gemini_daily_requests_per_key
+        if not daily_limit:
+            return None
+        return sum(
+            max(0, daily_limit - key['requests_made'])
+            for key in db.get_all_keys_status()
+            if not key['quota_exceeded']
+            and (not settings.gemini_key_indexes or key['api_key_index'] in settings.gemini_key_indexes)
+        )
+
+    def _requests_made(self) -> int:
+        """Requisições Gemini deste processo (outros workers, tenants e o painel não contam)"""
+        return gemini_client.requests_made if gemini_client.is_initialized() else 0
+
+    def _pace(self) -> bool:
+        """Chamado antes de cada post: espera a vez de escrever no WordPress"""
+        if config.dry_run:
+            # Simulação não escreve no WordPress: o ritmo é só o do pipeline
+            return not self._stop.is_set()
+        write_interval = 60 / config.wordpress_writes_per_minute
+        wait = self._next_write_at - time.monotonic()
+        if wait > 0 and self._stop.wait(wait):
+            return False
+        self._next_write_at = time.monotonic() + write_interval
+        return not self._stop.is_set()
+
+    def _on_event(self, event: Event):
+        """Mede a duração de cada etapa a partir do andamento dos posts"""
+        if event.type != 'post_progress':
+            return
+        stage = event.data.get('stage')
+        now = time.monotonic()
+        # Etapas interrompidas por erro não entram na média
+        if self._current_stage and stage != 'error':
+            previous, started_at = self._current_stage
+            name = _STAGE_NAMES[previous]
+            self._stage_seconds[name] = _ewma(self._stage_seconds.get(name), now - started_at)
+        self._current_stage = (stage, now) if stage in _STAGE_NAMES else None
+
+    def _record_batch(self, result: Dict, requests_used: int):
+        processed = result.get('posts_processed', 0)
+        if processed:
+            self._requests_per_post = _ewma(self._requests_per_post, max(1.0, requests_used / processed))
+
+        state = self._state
+        state['batches'] += 1
+        state['posts_processed'] += processed
+        state['posts_success'] += result.get('posts_success', 0)
+        state['posts_error'] += result.get('posts_error', 0)
+        self._save_state()
+
+        elapsed = time.time() - state['started_epoch']
+        rate = state['posts_success'] / elapsed * 3600 if elapsed else 0
+        self.logger.info(
+            f"Drenagem: lote {state['batches']} concluído, {state['posts_success']} sucessos no total "
+            f"({rate:.0f} posts/h, etapas: {self._format_stages()})"
+        )
+
+    def _format_stages(self) -> str:
+        return ', '.join(f"{name} {seconds:.1f}s" for name, seconds in self._stage_seconds.items()) or 'sem medições'
+
+    def _load_state(self):
+        """Retoma a drenagem interrompida (contadores e medições) ou inicia uma nova"""
+        previous = db.get_statistic(_STATE_KEY) or {}
+        if previous.get('status') in ('em andamento', 'interrompido'):
+            self._state = previous
+            self._stage_seconds = dict(previous.get('stage_seconds') or {})
+            self._requests_per_post = previous.get('requests_per_post')
+            self.logger.info(
+                f"Retomando drenagem iniciada em {previous['started_at']} "
+                f"({previous['posts_success']} sucessos até agora, cursor no post "
+                f"{db.get_last_processed_post_id()})"
+            )
+        else:
+            self._state = {
+                'started_at': datetime.now().isoformat(),
+                'started_epoch': time.time(),
+                'batches': 0,
+                'posts_processed': 0,
+                'posts_success': 0,
+                'posts_error': 0,
+            }
+            self.logger.info(f"Iniciando drenagem do backlog a partir do post {db.get_last_processed_post_id()}")
+        self._state['status'] = 'em andamento'
+        self._save_state()
+
+    def _save_state(self):
+        self._state['stage_seconds'] = self._stage_seconds
+        self._state['requests_per_post'] = self._requests_per_post
+        self._state['updated_at'] = datetime.now().isoformat()
+        db.set_statistic(_STATE_KEY, self._state)
@@ -0,0 +1,161 @@
+import itertools
+import json
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, List, Optional, Set
+
+@dataclass(frozen=True)
+class Event:
+    """Evento publicado no barramento e enviado aos clientes SSE"""
+
+    id: int
+    type: str
+    data: Any
+    created_at: float
+
+    def to_sse(self) -> str:
+        """Serializa o evento no formato text/event-stream"""
+        payload = json.dumps(self.data, default=str, ensure_ascii=False)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+class EventBus:
+    """
+    Barramento de eventos em memória (publish/subscribe) entre threads.
+
+    Cada assinante recebe uma fila limitada; um assinante lento perde os
+    eventos mais antigos em vez de bloquear quem publica. Os últimos eventos
+    ficam em um buffer para reenvio após reconexão (Last-Event-ID).
+    """
+
+    def __init__(self, max_queue_size: int = 200, history_size: int = 200):
+        self.logger = logging.getLogger(__name__)
+        self.max_queue_size = max_queue_size
+        self._ids = itertools.count(1)
+        self._history: Deque[Event] = deque(maxlen=history_size)
+        self._subscribers: Set[queue.Queue] = set()
+        self._listeners: List[Callable[[Event], None]] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: Any = None) -> Event:
+        """Publica um evento para todos os assinantes atuais"""
+        with self._lock:
+            event = Event(next(self._ids), event_type, data, time.time())
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                self.logger.error(f"Erro em listener do evento '{event_type}': {e}")
+
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # Descarta o evento mais antigo para abrir espaço
+                try:
+                    subscriber.get_nowait()
+                    subscriber.put_nowait(event)
+                except (queue.Empty, queue.Full):
+                    pass
+        return event
+
+    def add_listener(self, listener: Callable[[Event], None]):
+        """
+        Registra um callback síncrono chamado a cada evento publicado.
+        Deve ser rápido: roda na thread de quem publica.
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> queue.Queue:
+        """
+        Registra um novo assinante. Se `last_event_id` for informado, os
+        eventos posteriores ainda no histórico são enfileirados primeiro.
+        """
+        subscriber: queue.Queue = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._history:
+                    if event.id > last_event_id and not subscriber.full():
+                        subscriber.put_nowait(event)
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        """Remove um assinante"""
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscriber_count(self) -> int:
+        """Número de assinantes conectados"""
+        with self._lock:
+            return len(self._subscribers)
+
+    def recent(self, limit: int = 50) -> List[Event]:
+        """Retorna os eventos mais recentes do histórico"""
+        with self._lock:
+            return list(self._history)[-limit:]
+
+class LogTailer:
+    """
+    Acompanha novas linhas de `processing_logs` pelo id (chave primária) e as
+    publica como eventos 'log'. Uma única thread por processo atende todos
+    os assinantes, e também captura logs gravados por outros processos
+    (ex.: `python main.py` rodando ao lado do dashboard).
+    """
+
+    def __init__(self, bus: EventBus, interval_seconds: float = 1.0, batch_size: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.bus = bus
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._last_id: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Inicia a thread de acompanhamento (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='log-tailer', daemon=True)
+            self._thread.start()
+
+    def poll(self) -> int:
+        """Publica as linhas novas desde a última verificação e retorna quantas"""
+        from database import db
+
+        if self._last_id is None:
+            self._last_id = db.get_max_log_id()
+            return 0
+
+        rows = db.get_logs_after_id(self._last_id, self.batch_size)
+        for row in rows:
+            self.bus.publish('log', row)
+            self._last_id = row['id']
+        return len(rows)
+
+    def _run(self):
+        while True:
+            # Sem assinantes não há por que consultar o banco
+            if self.bus.subscriber_count() == 0:
+                self._last_id = None
+            else:
+                try:
+                    self.poll()
+                except Exception as e:
+                    self.logger.error(f"Erro ao acompanhar novos logs: {e}")
+            time.sleep(self.interval_seconds)
+
+# Instância global do barramento de eventos
+event_bus = EventBus()
+
+# Instância global do acompanhador de logs (thread iniciada sob demanda)
+log_tailer = LogTailer(event_bus)
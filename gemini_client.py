@@ -1,15 +1,15 @@
-import json
 import logging
+import threading
 import time
-import re
 import random
 from typing import Dict, Optional
 
-import google.generativeai as genai
-from google.generativeai.types import generation_types
-
-from config import config
+from breakers import GEMINI, circuit_breakers
+from config import config, current_tenant
+from content_analysis import clean_title
 from database import db
+from events import event_bus
+from lazy import LazySingleton
 
 class AllKeysExhaustedError(Exception):
     """Exceção para quando todas as chaves de API atingiram a quota."""
@@ -18,31 +18,55 @@ class AllKeysExhaustedError(Exception):
 class GeminiClient:
     """Cliente para integração com Google Gemini AI com gerenciamento de múltiplas chaves."""
 
+    MODEL_NAME = 'gemini-1.5-flash'
+
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.api_keys = config.gemini_api_keys
-        self.current_key_index = db.get_gemini_quota_info().get('api_key_index', 0)
+        best_key_index = db.get_best_available_key_index(config.gemini_key_indexes)
+        self.current_key_index = best_key_index if best_key_index is not None else 0
         self.client = None
+        # Requisições feitas por este cliente (só deste processo e tenant)
+        self.requests_made = 0
+        self._requests_lock = threading.Lock()
         self.initialize_client()
     
     def initialize_client(self):
         """Inicializa o cliente Gemini com a chave atual"""
-            current_key = self.api_keys[self.current_key_index]
-            genai.configure(api_key=current_key)
+        # Import adiado: o SDK do Gemini é pesado e só é necessário ao otimizar
+        import google.generativeai as genai
+
+        current_key = self.api_keys[self.current_key_index]
+        genai.configure(api_key=current_key)
+        self.client = genai.GenerativeModel(self.MODEL_NAME)
+        self.logger.info(f"Cliente Gemini inicializado com chave {self.current_key_index + 1}")
     
     def switch_api_key(self):
-        """Alterna para a próxima chave API disponível"""
-        self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-        db.update_gemini_quota(self.current_key_index, 0, False)
+        """Alterna para a melhor chave API disponível"""
+        previous_key_index = self.current_key_index
+        next_key_index = db.get_best_available_key_index(config.gemini_key_indexes)
+        if next_key_index is None:
+            event_bus.publish('keys_exhausted', {'total_keys': len(self.api_keys)})
+            raise AllKeysExhaustedError("Todas as chaves Gemini atingiram a quota")
+        self.current_key_index = next_key_index
         self.initialize_client()
         self.logger.info(f"Alternado para chave API {self.current_key_index + 1}")
+        event_bus.publish('key_switched', {
+            'from_key_index': previous_key_index,
+            'to_key_index': self.current_key_index,
+            'total_keys': len(self.api_keys)
+        })
     
+    def _record_request(self, quota_exceeded: bool = False):
+        """Conta uma requisição feita: no cliente, na chave atual e no consumo do tenant ativo"""
+        with self._requests_lock:
+            self.requests_made += 1
+        db.update_key_usage(self.current_key_index, quota_exceeded=quota_exceeded, tenant=current_tenant())
+
     def create_seo_prompt(self, title: str, excerpt: str, content: str, 
                          tags_text: str) -> str:
         """Cria o prompt otimizado para SEO jornalístico"""
         
-        domain = config.wordpress_domain.rstrip('/')
-        
         prompt = f"""Você é um jornalista digital especializado em cultura pop, cinema e séries, com experiência em otimização para Google News e SEO técnico. Sua tarefa é revisar e otimizar o conteúdo abaixo sem alterar o sentido original, aprimorando sua estrutura, legibilidade e potencial de ranqueamento.
 
 ✅ Diretrizes obrigatórias para otimização:
@@ -71,17 +95,15 @@ class GeminiClient:
 - Destaque os termos mais relevantes usando apenas a tag HTML <b>.
 - Ex: nomes de filmes, personagens, diretores, plataformas, datas, eventos.
 
-**Links internos:**
-- Baseando-se nas tags fornecidas, insira links internos usando a estrutura:
-  <a href="{domain}/tag/NOME-DA-TAG">Texto âncora</a>
-- Quando possível, aplique negrito combinado com link:
-  <b><a href="{domain}/tag/stranger-things">Stranger Things</a></b>
+**Links:**
+- Não crie links novos: os links internos são inseridos automaticamente depois.
+- Mantenha os links que já existem no conteúdo original.
 
 ⚠️ **Regras Técnicas:**
-- Use somente HTML puro: <b>, <a>.
+- Use somente HTML puro: <p>, <b> e os <a> já existentes.
 - Não utilize Markdown (**texto** ou [link](url)).
 - Não adicione informações novas que não estejam no texto original ou na mídia fornecida.
-- Utilize o conteúdo do campo Tags para decidir onde inserir links internos relevantes.
+- Use as Tags apenas como contexto sobre os temas do post.
 
 🔽 **DADOS DISPONÍVEIS PARA OTIMIZAÇÃO**
 
@@ -106,7 +128,7 @@ Responda exatamente no seguinte formato:
 (resumo otimizado)
 
 ## Novo Conteúdo:
-(conteúdo reestruturado com parágrafos curtos, <b>negrito</b> e <a href="">links internos</a>)
+(conteúdo reestruturado com parágrafos curtos e <b>negrito</b>)
 
 """
         return prompt
@@ -123,23 +145,37 @@ Responda exatamente no seguinte formato:
                 'excerpt': str, 
                 'content': str
             }
+        
+        Raises:
+            CircuitOpenError: Gemini fora do ar (circuito aberto antes ou durante as tentativas)
         """
         
         prompt = self.create_seo_prompt(title, excerpt, content, tags_text)
         
+        # O cliente é compartilhado entre tenants: usa uma chave reservada ao tenant ativo
+        allowed_keys = config.gemini_key_indexes
+        if allowed_keys and self.current_key_index not in allowed_keys:
+            self.switch_api_key()
+        
+        # Gemini fora do ar: recusa na hora em vez de esperar o backoff a cada post
+        breaker = circuit_breakers.get(GEMINI)
+        breaker.check()
+        
         for attempt in range(max_retries):
+            responded = False
             try:
                 self.logger.info(f"Tentativa {attempt + 1} de otimização com Gemini")
                 
                 # Faz a requisição para o Gemini
                 response = self.client.generate_content(prompt)
+                responded = True
+                breaker.record_success()
+                
+                # Atualiza contador de requisições (da chave e do tenant ativo)
+                self._record_request()
                 
-                # Atualiza contador de requisições
-                quota_info = db.get_gemini_quota_info()
-                requests_made = quota_info.get('requests_made', 0) + 1
                 # Processa a resposta
                 optimized_content = self._parse_gemini_response(response.text)
-                self.logger.info(f"Tentativa {attempt + 1} de otimização com Gemini")
                 if optimized_content:
                     self.logger.info("Conteúdo otimizado com sucesso pelo Gemini")
                     return optimized_content
@@ -154,30 +190,42 @@ Responda exatamente no seguinte formato:
 
                 # Se erro de quota ou chave inválida, tenta a próxima chave
                 if is_api_key_error:
+                    self._record_request(quota_exceeded=True)
                     if len(self.api_keys) > 1:
                         self.logger.info("Erro de API (quota/inválida), alternando para a próxima chave...")
-                        db.update_gemini_quota(self.current_key_index, 999999, True)
-                        self.switch_api_key()
+                        try:
+                            self.switch_api_key()
+                        except AllKeysExhaustedError as exhausted:
+                            self.logger.error(str(exhausted))
+                            return None
                         continue  # Tenta novamente com a nova chave
-                    raise ValueError("Erro ao processar resposta do Gemini")
-                        self.logger.error("Erro de API e apenas uma chave disponível. Abortando.")
-                        db.update_gemini_quota(self.current_key_index, 999999, True)
-                        return None # Aborta se não há mais chaves
+                    self.logger.error("Erro de API e apenas uma chave disponível. Abortando.")
+                    return None # Aborta se não há mais chaves
+                
+                # Falha do serviço (não da resposta): conta para o circuit breaker
+                if not responded:
+                    breaker.record_failure(e)
+                    if not breaker.available():
+                        raise breaker.open_error() from e
                 
                 # Backoff exponencial
                 if attempt < max_retries - 1:
                     wait_time = (2 ** attempt) + random.uniform(0, 1)
                     self.logger.info(f"Aguardando {wait_time:.2f}s antes da próxima tentativa")
                     time.sleep(wait_time)
-                    if len(self.api_keys) > 1:
-                        self.logger.info("Erro de API (quota/inválida), alternando para a próxima chave...")
-                        db.update_gemini_quota(self.current_key_index, 999999, True)
+        
+        self.logger.error("Todas as tentativas de otimização falharam")
+        return None
+    
+    def _strip_html_from_title(self, title: str) -> str:
+        """Remove qualquer tag HTML e marcação Markdown do título"""
+        return clean_title(title)
+    
+    def _parse_gemini_response(self, response_text: str) -> Optional[Dict]:
+        """Faz parse da resposta do Gemini no formato de seções '## Novo ...'"""
+        try:
+            lines = response_text.split('\n')
             result = {}
-                        continue  # Tenta novamente com a nova chave
-                    else:
-                        self.logger.error("Erro de API e apenas uma chave disponível. Abortando.")
-                        db.update_gemini_quota(self.current_key_index, 999999, True)
-                        return None # Aborta se não há mais chaves
             current_section = None
             current_content = []
             
@@ -206,6 +254,8 @@ Responda exatamente no seguinte formato:
                     current_content = [line.replace('## Novo Conteúdo:', '').strip()]
                 
                 elif current_section and line:
+                    if current_section == 'title':
+                        line = self._strip_html_from_title(line)
                     current_content.append(line)
             
             # Adiciona a última seção
@@ -237,5 +287,5 @@ Responda exatamente no seguinte formato:
             'last_reset': quota_info.get('last_reset_date')
         }
 
-# Instância global do cliente Gemini
-gemini_client = GeminiClient()
+# Instância global do cliente Gemini (construída no primeiro uso)
+gemini_client = LazySingleton(GeminiClient)
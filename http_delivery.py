@@ -0,0 +1,169 @@
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, Response, request
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele usamos apenas gzip
+    brotli = None
+
+# Tipos de conteúdo que valem a pena comprimir
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+    'image/svg+xml',
+}
+
+# Respostas menores que isso não compensam o custo da compressão
+MIN_COMPRESS_SIZE = 512
+
+# Assets com ?v=<hash> nunca mudam naquele endereço
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+logger = logging.getLogger(__name__)
+
+class StaticFingerprints:
+    """Calcula (e guarda em cache por mtime) o hash de conteúdo dos arquivos estáticos"""
+
+    def __init__(self, static_folder: str):
+        self.static_folder = static_folder
+        self._cache: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, filename: str) -> Optional[str]:
+        path = os.path.join(self.static_folder, filename)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(filename)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()[:12]
+
+        with self._lock:
+            self._cache[filename] = (mtime, digest)
+        return digest
+
+class CompressedStaticCache:
+    """Guarda os bytes comprimidos de arquivos estáticos, indexados pelo ETag"""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple[str, str, str], bytes] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[bytes]:
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key: Tuple[str, str, str], data: bytes):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = data
+
+def choose_encoding() -> Optional[str]:
+    """Escolhe a codificação preferida aceita pelo cliente"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Comprime com a codificação informada"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+def init_app(app: Flask):
+    """
+    Configura a entrega HTTP do dashboard:
+    - `url_for('static', ...)` ganha `?v=<hash do conteúdo>`, e esses
+      endereços são servidos com cache de longa duração (immutable);
+    - respostas JSON/HTML/CSS/JS são comprimidas com brotli (se instalado)
+      ou gzip, mantendo o ETag como validador fraco para GET condicional.
+    """
+    fingerprints = StaticFingerprints(app.static_folder)
+    static_cache = CompressedStaticCache()
+
+    @app.url_defaults
+    def add_static_fingerprint(endpoint, values):
+        if endpoint == 'static' and 'filename' in values and 'v' not in values:
+            digest = fingerprints.get(values['filename'])
+            if digest:
+                values['v'] = digest
+
+    @app.after_request
+    def optimize_response(response: Response) -> Response:
+        if request.endpoint == 'static' and request.args.get('v'):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = STATIC_MAX_AGE
+            response.cache_control.immutable = True
+
+        response.vary.add('Accept-Encoding')
+
+        if (response.status_code != 200
+                or (response.is_streamed and not response.direct_passthrough)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or request.method == 'HEAD'):
+            return response
+
+        encoding = choose_encoding()
+        if not encoding:
+            return response
+
+        etag, _ = response.get_etag()
+        cache_key = None
+        if request.endpoint == 'static' and etag:
+            cache_key = (request.path, etag, encoding)
+            cached = static_cache.get(cache_key)
+            if cached is not None:
+                return _set_compressed_body(response, cached, encoding)
+
+        # Arquivos estáticos chegam como passthrough; lê o conteúdo para comprimir
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return response
+
+        compressed = compress(data, encoding)
+        if cache_key:
+            static_cache.put(cache_key, compressed)
+        return _set_compressed_body(response, compressed, encoding)
+
+    logger.debug(f"Entrega HTTP configurada (brotli: {'sim' if brotli else 'não'})")
+
+def _set_compressed_body(response: Response, data: bytes, encoding: str) -> Response:
+    # Garante o fechamento do arquivo original quando o corpo vem do cache
+    close = getattr(response.response, 'close', None)
+    if close:
+        response.call_on_close(close)
+
+    response.direct_passthrough = False
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+
+    # O corpo mudou de representação: o ETag forte vira fraco, o que ainda
+    # permite a comparação fraca usada por If-None-Match
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
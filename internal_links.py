@@ -0,0 +1,322 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from html import escape, unescape
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import urlsplit
+
+from config import config, current_tenant
+from database import db
+from lazy import LazySingleton
+from wordpress_client import wordpress_client
+
+# Taxonomias do catálogo (rotas da API do WordPress)
+TERM_TAXONOMIES = ('tags', 'categories')
+
+# Nomes curtos demais ("TV", "HQ") casam por acaso e não viram link
+MIN_TERM_LENGTH = 3
+
+# Estatística com o horário (epoch) da última sincronização completa
+_LAST_FULL_SYNC_KEY = 'term_catalog_full_sync'
+
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)\b[^>]*>|<!--.*?-->', re.S)
+_ANCHOR_RE = re.compile(r'<a\b([^>]*)>(.*?)</a\s*>', re.S | re.I)
+_HREF_RE = re.compile(r'''href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.I)
+_TERM_PATH_RE = re.compile(r'/(?:tag|category)/')
+
+# Elementos cujo texto nunca recebe link
+_NO_LINK_TAGS = frozenset({
+    'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'script', 'style', 'code', 'pre', 'figcaption',
+})
+
+@dataclass(frozen=True)
+class Term:
+    """Uma tag ou categoria do catálogo local"""
+
+    taxonomy: str
+    term_id: int
+    name: str
+    link: str
+    post_count: int
+
+def _fold(text: str) -> str:
+    """Minúsculas sem alterar o tamanho do texto (as posições continuam valendo no original)"""
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+def _normalize_link(url: str, default_host: str = '') -> str:
+    """Host (sem www) + caminho sem barra final, para comparar links; relativos usam `default_host`"""
+    parts = urlsplit(unescape(url.strip()))
+    host = parts.netloc.lower() or default_host
+    if host.startswith('www.'):
+        host = host[4:]
+    return host + parts.path.rstrip('/')
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+class AhoCorasick:
+    """
+    Autômato de Aho-Corasick: encontra em uma única passada pelo texto
+    todas as ocorrências de todos os padrões, independentemente de quantos
+    sejam.
+    """
+
+    def __init__(self, patterns: Iterable[Tuple[str, object]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]
+        for pattern, payload in patterns:
+            if pattern:
+                self._add(pattern, payload)
+        self._build()
+
+    def _add(self, pattern: str, payload: object):
+        node = 0
+        for char in pattern:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = child
+        self._out[node].append((len(pattern), payload))
+
+    def _build(self):
+        """Calcula os links de falha em largura e herda as saídas de cada sufixo"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, object]]:
+        """Gera (início, fim, payload) de cada ocorrência, em ordem de fim"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, payload in out[node]:
+                yield index + 1 - length, index + 1, payload
+
+class TermCatalog:
+    """
+    Catálogo local de tags e categorias do WordPress (tabela `wp_terms`).
+    A sincronização normal só busca termos com ID acima do maior já visto
+    (uma requisição por taxonomia); a cada TERM_CATALOG_SYNC_HOURS ela é
+    completa, atualizando contagens e removendo termos apagados. O
+    autômato com os nomes é montado sob demanda e refeito após mudanças.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._matcher: Optional[AhoCorasick] = None
+        self._links: Set[str] = set()
+        self._size = 0
+
+    def sync(self, full: Optional[bool] = None) -> Dict[str, int]:
+        """
+        Sincroniza o catálogo com o WordPress.
+
+        Args:
+            full: Força (True) ou evita (False) a sincronização completa;
+                  None decide pelo intervalo configurado.
+
+        Returns:
+            Termos gravados por taxonomia.
+        """
+        if full is None:
+            last_full_sync = db.get_statistic(_LAST_FULL_SYNC_KEY) or 0
+            full = time.time() - last_full_sync >= config.term_catalog_sync_hours * 3600
+
+        synced = {}
+        for taxonomy in TERM_TAXONOMIES:
+            synced[taxonomy] = self._sync_all(taxonomy) if full else self._sync_new(taxonomy)
+
+        if full:
+            db.set_statistic(_LAST_FULL_SYNC_KEY, time.time())
+        if full or any(synced.values()):
+            self.invalidate()
+
+        kind = 'completa' if full else 'incremental'
+        self.logger.info(f"Catálogo de termos: sincronização {kind} ({synced})")
+        return synced
+
+    def _sync_all(self, taxonomy: str) -> int:
+        terms = [term for page in wordpress_client.iter_terms(taxonomy) for term in page]
+        db.save_wp_terms(taxonomy, terms, replace=True)
+        return len(terms)
+
+    def _sync_new(self, taxonomy: str) -> int:
+        known_id = db.get_max_wp_term_id(taxonomy)
+        new_terms = []
+        # Páginas em ordem decrescente de ID: para na primeira já conhecida
+        for page in wordpress_client.iter_terms(taxonomy):
+            new_terms.extend(term for term in page if term['id'] > known_id)
+            if page[-1]['id'] <= known_id:
+                break
+        if new_terms:
+            db.save_wp_terms(taxonomy, new_terms)
+        return len(new_terms)
+
+    def invalidate(self):
+        """Descarta o autômato; o próximo uso relê o catálogo do banco"""
+        with self._lock:
+            self._matcher = None
+
+    def matcher(self) -> AhoCorasick:
+        """Autômato com os nomes de todos os termos (payload: `Term`)"""
+        with self._lock:
+            if self._matcher is None:
+                terms = [
+                    Term(row['taxonomy'], row['term_id'], row['name'], row['link'], row['post_count'] or 0)
+                    for row in db.get_wp_terms()
+                    if row['link'] and len(row['name'].strip()) >= MIN_TERM_LENGTH
+                ]
+                # A API devolve nomes com entidades ("Marvel &amp; DC"); o texto pode ter qualquer forma
+                patterns = [
+                    (_fold(variant.strip()), term)
+                    for term in terms
+                    for variant in {term.name, unescape(term.name)}
+                ]
+                self._matcher = AhoCorasick(patterns)
+                self._links = {_normalize_link(term.link) for term in terms}
+                self._size = len(terms)
+            return self._matcher
+
+    def is_known_link(self, url: str, default_host: str = '') -> bool:
+        """Indica se o link aponta para um termo existente no catálogo"""
+        self.matcher()
+        return _normalize_link(url, default_host) in self._links
+
+    def stats(self) -> Dict:
+        self.matcher()
+        return {'terms': self._size}
+
+class InternalLinker:
+    """
+    Insere links internos verificados no HTML já otimizado: cada termo do
+    catálogo citado no texto vira link para a página dele (o `link` do
+    próprio WordPress), uma vez por termo e fora de títulos e links
+    existentes. Links de tag/categoria do site que não existem no catálogo
+    são desfeitos, mantendo o texto.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def insert_links(self, html: str, post_terms: Iterable[Dict] = (),
+                     max_links: Optional[int] = None) -> Tuple[str, List[str]]:
+        """
+        Args:
+            html: Conteúdo do post
+            post_terms: Tags/categorias do próprio post (formato da API),
+                        que têm prioridade e dispensam o mínimo de posts
+            max_links: Limite de links internos no post (padrão da configuração)
+
+        Returns:
+            (HTML com os links, nomes dos termos que viraram link)
+        """
+        settings = config.snapshot()
+        if max_links is None:
+            max_links = settings.internal_links_max
+        own_links = {_normalize_link(term['link']) for term in post_terms if term.get('link')}
+
+        matcher = term_catalog.matcher()
+        html, linked = self._drop_unknown_links(html, own_links, settings.wordpress_domain)
+        budget = max_links - len(linked)
+        if budget <= 0:
+            return html, []
+
+        # Primeira ocorrência de cada termo, sem sobreposição (a mais longa vence)
+        chosen: List[Tuple[int, int, Term]] = []
+        taken_end = 0
+        for start, end, term in sorted(self._candidates(html, matcher),
+                                       key=lambda match: (match[0], match[0] - match[1])):
+            target = _normalize_link(term.link)
+            if start < taken_end or target in linked:
+                continue
+            if target not in own_links and term.post_count < settings.internal_link_min_posts:
+                continue
+            chosen.append((start, end, term))
+            linked.add(target)
+            taken_end = end
+
+        # Termos do próprio post primeiro, depois os mais populares
+        chosen.sort(key=lambda match: (_normalize_link(match[2].link) not in own_links,
+                                       -match[2].post_count))
+        chosen = sorted(chosen[:budget], key=lambda match: match[0], reverse=True)
+
+        for start, end, term in chosen:
+            html = (f'{html[:start]}<a href="{escape(term.link, quote=True)}">'
+                    f'{html[start:end]}</a>{html[end:]}')
+        return html, [term.name for _, _, term in reversed(chosen)]
+
+    def _candidates(self, html: str, matcher: AhoCorasick) -> Iterator[Tuple[int, int, Term]]:
+        """Ocorrências de termos, com limites de palavra, no texto fora de tags e links"""
+        depth = 0
+        position = 0
+        segments = []
+        for match in _TAG_RE.finditer(html):
+            if not depth and match.start() > position:
+                segments.append((position, match.start()))
+            position = match.end()
+            name = match.group(2)
+            if name and name.lower() in _NO_LINK_TAGS:
+                depth = max(0, depth - 1) if match.group(1) else depth + 1
+        if not depth and position < len(html):
+            segments.append((position, len(html)))
+
+        for offset, stop in segments:
+            text = html[offset:stop]
+            for start, end, term in matcher.iter_matches(_fold(text)):
+                before = text[start - 1] if start else ' '
+                after = text[end] if end < len(text) else ' '
+                # Fora de palavras maiores e de entidades HTML (&amp;)
+                if _is_word_char(before) or _is_word_char(after) or before in '&#':
+                    continue
+                yield offset + start, offset + end, term
+
+    def _drop_unknown_links(self, html: str, own_links: Set[str],
+                            site_domain: str) -> Tuple[str, Set[str]]:
+        """Desfaz links de tag/categoria inexistentes; retorna o HTML e os links internos mantidos"""
+        site_host = _normalize_link(site_domain).split('/', 1)[0]
+        kept: Set[str] = set()
+
+        def replace(match):
+            href_match = _HREF_RE.search(match.group(1))
+            if not href_match:
+                return match.group(0)
+            href = next(group for group in href_match.groups() if group is not None)
+            target = _normalize_link(href, site_host)
+            host, _, path = target.partition('/')
+            if host != site_host:
+                return match.group(0)
+            if target in own_links or term_catalog.is_known_link(href, site_host):
+                kept.add(target)
+                return match.group(0)
+            if _TERM_PATH_RE.search(f'/{path}/'):
+                self.logger.info(f"Removendo link interno inexistente: {href}")
+                return match.group(2)
+            return match.group(0)
+
+        return _ANCHOR_RE.sub(replace, html), kept
+
+# Instâncias globais do catálogo de termos e do inseridor de links
+term_catalog = LazySingleton(TermCatalog, scope=current_tenant)
+internal_linker = LazySingleton(InternalLinker)
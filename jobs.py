@@ -0,0 +1,148 @@
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from events import event_bus
+from lazy import LazySingleton
+
+# Estados possíveis de um job
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCESS = 'success'
+JOB_ERROR = 'error'
+
+@dataclass
+class Job:
+    """Uma execução em segundo plano disparada pelo dashboard"""
+
+    id: str
+    kind: str
+    key: str
+    func: Callable[[], Any] = field(repr=False)
+    status: str = JOB_QUEUED
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    submissions: int = 1
+
+    @property
+    def active(self) -> bool:
+        return self.status in (JOB_QUEUED, JOB_RUNNING)
+
+    def to_dict(self) -> Dict:
+        """Representação serializável (para a API e para eventos SSE)"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'submissions': self.submissions
+        }
+
+class JobRunner:
+    """
+    Executa ciclos de otimização e processamentos avulsos fora da thread da
+    requisição HTTP.
+
+    Um único worker processa a fila, então nunca há dois ciclos disputando o
+    `last_processed_post_id` neste processo. Submissões com a mesma chave
+    enquanto um job equivalente está na fila ou rodando são agrupadas nele.
+    """
+
+    def __init__(self, history_size: int = 100):
+        self.logger = logging.getLogger(__name__)
+        self.history_size = history_size
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._active_by_key: Dict[str, Job] = {}
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, key: str, func: Callable[[], Any]) -> Job:
+        """
+        Enfileira um job, ou retorna o job ativo com a mesma chave.
+
+        Args:
+            kind: Tipo do job exibido ao usuário (ex.: 'auto_process').
+            key: Chave de deduplicação (ex.: 'cycle' ou 'post:<url>').
+            func: Função sem argumentos executada pelo worker.
+        """
+        with self._lock:
+            existing = self._active_by_key.get(key)
+            if existing:
+                existing.submissions += 1
+                self.logger.info(f"Job {existing.id} ({existing.kind}) já em andamento, reaproveitando")
+                return existing
+
+            job = Job(id=uuid.uuid4().hex, kind=kind, key=key, func=func)
+            self._jobs[job.id] = job
+            self._active_by_key[key] = job
+            self._trim_history()
+            self._ensure_worker()
+
+        self._queue.put(job)
+        self.logger.info(f"Job {job.id} ({kind}) enfileirado")
+        self._publish(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Retorna um job pelo id, se ainda estiver no histórico"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 20) -> List[Job]:
+        """Retorna os jobs mais recentes primeiro"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))[:limit]
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name='job-runner', daemon=True)
+        self._worker.start()
+
+    def _trim_history(self):
+        # Descarta os jobs finalizados mais antigos além do limite
+        while len(self._jobs) > self.history_size:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].active:
+                break
+            self._jobs.pop(oldest_id)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            self._publish(job)
+
+            try:
+                job.result = job.func()
+                job.status = JOB_SUCCESS
+            except Exception as e:
+                self.logger.error(f"Erro no job {job.id} ({job.kind}): {e}", exc_info=True)
+                job.error = str(e)
+                job.status = JOB_ERROR
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    self._active_by_key.pop(job.key, None)
+                self._publish(job)
+                self._queue.task_done()
+
+    def _publish(self, job: Job):
+        event_bus.publish('job_updated', job.to_dict())
+
+# Instância global do executor de jobs (worker iniciado na primeira submissão)
+job_runner = LazySingleton(JobRunner)
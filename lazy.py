@@ -0,0 +1,70 @@
+import threading
+from typing import Any, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+class LazySingleton(Generic[T]):
+    """
+    Proxy que adia a construção de uma instância global até o primeiro uso.
+
+    Permite manter o padrão `from database import db` sem que o simples
+    import do módulo abra o banco, configure o logging ou importe SDKs pesados.
+    Com `scope`, mantém uma instância por valor de `scope()` (ex.: uma por
+    site/tenant ativo), construída no contexto desse valor.
+    """
+
+    def __init__(self, factory: Callable[[], T], scope: Optional[Callable[[], Hashable]] = None):
+        object.__setattr__(self, '_factory', factory)
+        object.__setattr__(self, '_scope', scope)
+        object.__setattr__(self, '_instance', None)
+        object.__setattr__(self, '_scoped', {})
+        # Reentrante: a construção de um escopo pode depender de outro (ex.: banco base)
+        object.__setattr__(self, '_lock', threading.RLock())
+
+    def get_instance(self) -> T:
+        """Retorna a instância real, construindo-a na primeira chamada"""
+        scope = object.__getattribute__(self, '_scope')
+        if scope is not None:
+            return self._get_scoped(scope())
+
+        instance = object.__getattribute__(self, '_instance')
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = object.__getattribute__(self, '_instance')
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    object.__setattr__(self, '_instance', instance)
+        return instance
+
+    def _get_scoped(self, key: Hashable) -> T:
+        scoped: Dict[Hashable, T] = object.__getattribute__(self, '_scoped')
+        instance = scoped.get(key)
+        if instance is None:
+            with object.__getattribute__(self, '_lock'):
+                instance = scoped.get(key)
+                if instance is None:
+                    instance = object.__getattribute__(self, '_factory')()
+                    scoped[key] = instance
+        return instance
+
+    def is_initialized(self) -> bool:
+        """Indica se a instância real (de algum escopo) já foi construída"""
+        return (object.__getattribute__(self, '_instance') is not None
+                or bool(object.__getattribute__(self, '_scoped')))
+
+    def reset(self):
+        """Descarta as instâncias atuais (de todos os escopos); a próxima chamada reconstrói"""
+        with object.__getattribute__(self, '_lock'):
+            object.__setattr__(self, '_instance', None)
+            object.__getattribute__(self, '_scoped').clear()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any):
+        setattr(self.get_instance(), name, value)
+
+    def __repr__(self) -> str:
+        factory = object.__getattribute__(self, '_factory')
+        state = 'inicializado' if self.is_initialized() else 'pendente'
+        return f"<LazySingleton {getattr(factory, '__name__', factory)} ({state})>"
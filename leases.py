@@ -0,0 +1,104 @@
+import contextvars
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional, Set
+
+from config import config, current_tenant
+from database import db
+from lazy import LazySingleton
+
+# Tentativas de um post (falhas ou workers que morreram) antes de desistir dele
+MAX_ATTEMPTS = 3
+
+class PostLeaseManager:
+    """
+    Coordena vários processos (ou hosts com o mesmo banco) processando
+    posts: antes de otimizar um post, o worker o reserva com uma lease
+    atômica na tabela `post_leases`. Enquanto o worker segura leases, uma
+    thread de heartbeat as renova a cada LEASE_TTL_SECONDS / 3; se o
+    processo morre, as leases vencem e outro worker retoma os posts.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._held: Set[int] = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def claim(self, post_id: int, force: bool = False) -> bool:
+        """
+        Reserva um post para este worker.
+
+        Args:
+            force: Ignora o limite de tentativas (processamento manual);
+                   uma lease ativa de outro worker continua valendo.
+        """
+        claimed = db.claim_post_lease(post_id, self.worker_id, config.lease_ttl_seconds,
+                                      None if force else MAX_ATTEMPTS)
+        if claimed:
+            with self._lock:
+                self._held.add(post_id)
+                self._ensure_heartbeat()
+        return claimed
+
+    def release(self, post_id: int):
+        """Libera um post concluído (ou que não precisava ser processado)"""
+        db.release_post_lease(post_id, self.worker_id)
+        self._forget(post_id)
+
+    def fail(self, post_id: int, error: str = ''):
+        """Registra a falha; o post volta a ficar disponível depois de uma TTL"""
+        db.fail_post_lease(post_id, self.worker_id, config.lease_ttl_seconds, error)
+        self._forget(post_id)
+
+    def interrupt(self, post_id: int, error: str = ''):
+        """Devolve um post que parou por uma dependência fora do ar, sem contar como tentativa"""
+        db.interrupt_post_lease(post_id, self.worker_id, error)
+        self._forget(post_id)
+
+    def discard(self, post_id: int):
+        """Apaga a lease de um post que não deve mais ser processado (de qualquer worker)"""
+        db.release_post_lease(post_id)
+        self._forget(post_id)
+
+    def recoverable(self, limit: int) -> List[int]:
+        """Posts já abaixo do cursor cujas leases venceram (worker morto ou falha)"""
+        return db.get_recoverable_post_leases(db.get_last_processed_post_id(), MAX_ATTEMPTS, limit)
+
+    def held(self) -> List[int]:
+        with self._lock:
+            return sorted(self._held)
+
+    def _forget(self, post_id: int):
+        with self._lock:
+            self._held.discard(post_id)
+
+    def _ensure_heartbeat(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # A thread herda o tenant ativo: renova as leases no banco do site certo
+        context = contextvars.copy_context()
+        self._thread = threading.Thread(target=context.run, args=(self._heartbeat,),
+                                        name='lease-heartbeat', daemon=True)
+        self._thread.start()
+
+    def _heartbeat(self):
+        while True:
+            self._wakeup.wait(config.lease_ttl_seconds / 3)
+            with self._lock:
+                if not self._held:
+                    # Sem leases: a thread termina e o próximo claim cria outra
+                    self._thread = None
+                    return
+            try:
+                db.renew_post_leases(self.worker_id, config.lease_ttl_seconds)
+            except Exception as e:
+                self.logger.error(f"Erro ao renovar leases do worker {self.worker_id}: {e}")
+
+# Instância global do gerenciador de leases (uma identidade de worker por processo e tenant)
+post_leases = LazySingleton(PostLeaseManager, scope=current_tenant)
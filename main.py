@@ -5,19 +5,40 @@ Autor: Sistema baseado nas especificações fornecidas
 """
 
 import argparse
-import schedule
 import time
 import logging
+import os
 import signal
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
 
-from config import config
+from config import config, current_tenant, set_process_env, use_tenant
 from seo_optimizer import seo_optimizer
 from database import db
+from scheduler import AdaptiveScheduler
+from wordpress_client import wordpress_client
+from gemini_client import gemini_client
+from tmdb_client import tmdb_client
 
-# Importa o app Flask do dashboard para compatibilidade com gunicorn
-from dashboard import app
+# Campos de configuração dos quais cada cliente depende na construção
+CLIENT_SETTINGS = (
+    (wordpress_client, {'wordpress_url', 'wordpress_username', 'wordpress_password'}),
+    (gemini_client, {'gemini_api_keys'}),
+    (tmdb_client, {'tmdb_api_key', 'tmdb_read_token', 'tmdb_base_url', 'tmdb_image_url',
+                   'tmdb_rate_limit', 'tmdb_pool_size', 'tmdb_timeout_seconds', 'tmdb_max_retries'}),
+)
+
+def __getattr__(name):
+    """
+    Expõe `main:app` para o gunicorn sem importar Flask e o dashboard
+    quando o módulo é usado apenas pela CLI.
+    """
+    if name == 'app':
+        from dashboard import app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class SEOOptimizerApp:
     """Aplicação principal do WordPress SEO Optimizer"""
@@ -25,15 +46,44 @@ class SEOOptimizerApp:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.running = False
+        # Acorda o loop contínuo antes da hora (encerramento ou SIGHUP)
+        self._wakeup = threading.Event()
+        # Pedido de encerramento (a drenagem termina o post atual e sai)
+        self._stop_requested = threading.Event()
         
         # Configura handler para sinais de sistema
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self._reload_handler)
     
     def _signal_handler(self, signum, frame):
         """Handler para sinais de sistema (Ctrl+C, etc.)"""
         self.logger.info(f"Recebido sinal {signum}, encerrando...")
         self.running = False
+        self._stop_requested.set()
+        self._wakeup.set()
+    
+    def _reload_handler(self, signum, frame):
+        """Handler de SIGHUP: recarrega a configuração sem reiniciar o processo"""
+        self.logger.info("Recebido SIGHUP, recarregando configuração...")
+        try:
+            changed = set(config.reload())
+        except ValueError as e:
+            self.logger.error(f"Nova configuração inválida, mantendo a anterior: {e}")
+            return
+        
+        # Clientes já construídos com valores antigos são recriados no próximo uso
+        for client, fields in CLIENT_SETTINGS:
+            if changed & fields and client.is_initialized():
+                client.reset()
+        
+        # Reajusta a tabela de quotas se o número de chaves mudou
+        if 'gemini_api_keys' in changed and db.is_initialized():
+            db.init_database()
+        
+        # Reagenda o próximo ciclo com os intervalos novos
+        self._wakeup.set()
     
     def run_once(self):
         """Executa otimização uma única vez"""
@@ -45,8 +95,8 @@ class SEOOptimizerApp:
             self.logger.info("Validando configuração...")
             config.validate_config()
             
-            # Executa ciclo de otimização
-            result = seo_optimizer.run_once()
+            # Executa ciclo de otimização (uma rodada por todos os sites, com TENANTS_FILE)
+            result = self._run_cycle()
             
             # Exibe resultados
             self.logger.info("="*50)
@@ -101,13 +151,132 @@ class SEOOptimizerApp:
             print(f"Índice da chave atual: {quota_info.get('api_key_index', 0)}")
             print(f"Requisições feitas (chave atual): {quota_info.get('requests_made', 0)}")
             print(f"Quota excedida: {'Sim' if quota_info.get('quota_exceeded') else 'Não'}")
+            if config.dry_run:
+                from shadow import shadow_store
+                shadow = shadow_store.summary()
+                print("-"*50)
+                print("🧪 Modo Simulação (sem escritas no WordPress)")
+                print(f"Posts simulados: {shadow['posts']}")
+                if shadow['posts']:
+                    print(f"Pontuação SEO média: {shadow['avg_score_before']:.0f} -> {shadow['avg_score_after']:.0f}")
+                    print(f"Tempo médio no Gemini: {shadow['avg_gemini_seconds']:.1f}s")
             print("="*50 + "\n")
         except Exception as e:
             self.logger.error(f"Erro ao buscar estatísticas: {e}", exc_info=True)
             sys.exit(1)
     
+    def build_tmdb_index(self):
+        """Gera (ou atualiza) o índice local de títulos do TMDB e sai."""
+        from tmdb_index import title_index
+
+        self.logger.info(f"Gerando índice local do TMDB em {title_index.path}...")
+        try:
+            counts = title_index.build()
+        except Exception as e:
+            self.logger.error(f"Erro ao gerar índice do TMDB: {e}", exc_info=True)
+            sys.exit(1)
+        self.logger.info(
+            f"Índice do TMDB gerado: {counts.get('movie', 0)} filmes, {counts.get('tv', 0)} séries"
+        )
+    
+    def run_audit(self, limit: int = 20, workers: Optional[int] = None):
+        """Pontua todo o acervo publicado e exibe os posts com maior ganho esperado."""
+        from audit import ArchiveAuditor
+
+        self.logger.info("WordPress SEO Optimizer - Modo AUDITORIA")
+        self.logger.info("="*50)
+        try:
+            summary = ArchiveAuditor(workers=workers).run()
+            top_posts = db.get_top_post_scores(limit)
+        except Exception as e:
+            self.logger.error(f"Erro durante a auditoria: {e}", exc_info=True)
+            sys.exit(1)
+
+        print("\n" + "="*50)
+        print("🔎 AUDITORIA DE SEO DO ACERVO")
+        print("="*50)
+        print(f"Posts pontuados: {summary['posts_scored']}")
+        print(f"Nota média: {summary['average_score']:.1f}")
+        print(f"Tempo total: {summary['processing_time']:.1f}s")
+        print("-"*50)
+        print(f"🎯 Prioridades para otimização (top {limit}, ainda não otimizados)")
+        if top_posts:
+            for position, post in enumerate(top_posts, 1):
+                failed = [name for name, rule in post['rules'].items() if rule['points'] < rule['max']]
+                print(f"{position:>3}. [{post['score']:>3}] +{post['expected_gain']:.0f}  "
+                      f"ID {post['post_id']} - {post['title']}")
+                print(f"       {post['link']}")
+                if failed:
+                    print(f"       A melhorar: {', '.join(failed)}")
+        else:
+            print("  - Nenhum post com ganho esperado.")
+        print("="*50 + "\n")
+    
+    def run_drain(self):
+        """Processa o backlog em lotes até esvaziá-lo, esgotar a quota ou receber SIGTERM"""
+        from drain import BacklogDrainer
+
+        self.logger.info("WordPress SEO Optimizer - Modo DRENAGEM")
+        self.logger.info("="*50)
+        try:
+            config.validate_config()
+            summary = BacklogDrainer(stop_event=self._stop_requested).run()
+        except Exception as e:
+            self.logger.error(f"Erro durante a drenagem: {e}", exc_info=True)
+            sys.exit(1)
+
+        print("\n" + "="*50)
+        print("🚰 DRENAGEM DO BACKLOG")
+        print("="*50)
+        print(f"Situação: {summary['status']} ({summary['stop_reason']})")
+        print(f"Lotes: {summary['batches']}")
+        print(f"Posts processados: {summary['posts_processed']}")
+        print(f"Sucessos: {summary['posts_success']}")
+        print(f"Erros: {summary['posts_error']}")
+        print(f"Cursor: post {db.get_last_processed_post_id()}")
+        if summary['status'] == 'interrompido':
+            print("Rode `python main.py --drain` novamente para continuar de onde parou.")
+        print("="*50 + "\n")
+    
+    def run_processes(self, count: int):
+        """
+        Executa `count` processos no modo contínuo. Eles dividem os posts
+        por leases no banco, então nenhum post é otimizado duas vezes.
+        """
+        import multiprocessing
+
+        self.logger.info(f"WordPress SEO Optimizer - Modo PRODUÇÃO com {count} processos")
+        config.validate_config()
+        db.init_database()
+
+        # spawn: cada processo cria seus próprios clientes e sua identidade de worker
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=_run_worker, args=(current_tenant(),), name=f"worker-{index + 1}")
+                   for index in range(count)]
+        for worker in workers:
+            worker.start()
+            self.logger.info(f"Processo {worker.name} iniciado (PID {worker.pid})")
+
+        if hasattr(signal, 'SIGHUP'):
+            # O SIGHUP recarrega a configuração de cada processo
+            signal.signal(signal.SIGHUP, lambda signum, frame: self._forward_signal(workers, signum))
+
+        self.running = True
+        while self.running and any(worker.is_alive() for worker in workers):
+            self._stop_requested.wait(5)
+
+        self._forward_signal(workers, signal.SIGTERM)
+        for worker in workers:
+            worker.join()
+        self.logger.info("Sistema encerrado")
+
+    def _forward_signal(self, workers, signum):
+        for worker in workers:
+            if worker.is_alive():
+                os.kill(worker.pid, signum)
+    
     def run_continuous(self):
-        """Executa otimização continuamente"""
+        """Executa otimização continuamente, com intervalo adaptativo entre ciclos"""
         self.logger.info("WordPress SEO Optimizer - Modo PRODUÇÃO")
         self.logger.info("="*50)
         
@@ -116,24 +285,32 @@ class SEOOptimizerApp:
             self.logger.info("Validando configuração...")
             config.validate_config()
             
-            # Configura agendamento
-            interval_minutes = config.check_interval_minutes
-            self.logger.info(f"Agendando execução a cada {interval_minutes} minutos")
-            
-            schedule.every(interval_minutes).minutes.do(self._scheduled_optimization)
+            scheduler = AdaptiveScheduler()
+            self.running = True
+            self.logger.info("Sistema iniciado! Pressione Ctrl+C para parar")
             
             # Primeira execução imediata
             self.logger.info("Executando primeira otimização...")
-            self._scheduled_optimization()
-            
-            self.running = True
-            self.logger.info("Sistema iniciado! Pressione Ctrl+C para parar")
-            self.logger.info(f"⏰ Próxima execução em {interval_minutes} minutos")
+            scheduler.record(self._scheduled_optimization(), self._keys_available())
+            finished = time.monotonic()
             
-            # Loop principal
+            # Loop principal: dorme exatamente até o próximo ciclo, sem polling
             while self.running:
-                schedule.run_pending()
-                time.sleep(30)  # Verifica a cada 30 segundos
+                delay, reason = scheduler.next_delay()
+                remaining = delay - (time.monotonic() - finished)
+                if remaining > 0:
+                    next_run = datetime.now() + timedelta(seconds=remaining)
+                    self.logger.info(f"⏰ Próxima execução em {remaining / 60:.1f} minutos ({reason})")
+                    db.set_statistic('next_cycle', {'at': next_run.isoformat(), 'reason': reason})
+                    if self._wakeup.wait(remaining):
+                        # Encerramento ou configuração recarregada: reavalia o prazo
+                        self._wakeup.clear()
+                        continue
+                else:
+                    self.logger.info(f"Executando próximo ciclo imediatamente ({reason})")
+                
+                scheduler.record(self._scheduled_optimization(), self._keys_available())
+                finished = time.monotonic()
                 
         except Exception as e:
             self.logger.error(f"Erro durante execução contínua: {e}")
@@ -141,27 +318,50 @@ class SEOOptimizerApp:
         
         self.logger.info("Sistema encerrado")
     
-    def _scheduled_optimization(self):
-        """Função chamada pelo agendador"""
+    def _keys_available(self) -> bool:
+        """Indica se ainda há alguma chave Gemini com quota"""
+        try:
+            return db.get_best_available_key_index() is not None
+        except Exception as e:
+            self.logger.error(f"Erro ao consultar quotas: {e}")
+            return True
+    
+    def _scheduled_optimization(self) -> Optional[Dict]:
+        """Executa um ciclo agendado; retorna as estatísticas ou None em caso de falha"""
         try:
             self.logger.info("Executando otimização agendada...")
-            result = seo_optimizer.run_optimization_cycle()
+            result = self._run_cycle()
             
             # Log resumido dos resultados
             self.logger.info(f"Resumo: {result.get('posts_success', 0)} sucessos, "
                            f"{result.get('posts_error', 0)} erros em "
                            f"{result.get('processing_time', 0):.2f}s")
             
-            # Salva estatísticas no banco
-            db.set_statistic('last_cycle_result', result)
-            
-            if result.get('posts_success', 0) > 0:
-                next_run = datetime.now().strftime("%H:%M")
-                self.logger.info(f"Otimização concluída. Próxima execução: {next_run}")
+            # Salva estatísticas no banco (com tenants, cada um já salvou as suas)
+            if 'tenants' not in result:
+                db.set_statistic('last_cycle_result', result)
+            return result
             
         except Exception as e:
             self.logger.error(f"Erro na otimização agendada: {e}")
             db.log_processing(0, "Sistema", "scheduled_optimization", "error", str(e))
+            return None
+
+    def _run_cycle(self) -> Dict:
+        """
+        Um ciclo do site ativo ou, com TENANTS_FILE e sem --tenant, uma
+        rodada por todos os tenants com a quota dividida entre eles.
+        """
+        if current_tenant() is None and config.tenants():
+            from tenants import tenant_scheduler
+            return tenant_scheduler.run_round()
+        return seo_optimizer.run_optimization_cycle()
+
+def _run_worker(tenant: Optional[str] = None):
+    """Ponto de entrada de cada processo de `--processes`"""
+    config.get_instance()
+    with use_tenant(tenant):
+        SEOOptimizerApp().run_continuous()
 
 def main():
     """Função principal"""
@@ -172,6 +372,12 @@ def main():
 Exemplos de uso:
   python main.py --once     # Executa uma vez (teste)
   python main.py --stats    # Exibe estatísticas e sai
+  python main.py --build-tmdb-index  # Baixa as exportações do TMDB e gera o índice local
+  python main.py --audit    # Pontua todo o acervo e lista os posts com maior ganho
+  python main.py --drain    # Processa o backlog em lotes até esvaziá-lo
+  python main.py --processes 4  # Executa continuamente com 4 processos coordenados
+  python main.py --tenant blog2 --drain  # Qualquer modo, restrito a um site de TENANTS_FILE
+  python main.py --dry-run --once  # Pipeline completo sem escrever no WordPress
   python main.py           # Executa continuamente (produção)
 
 Para acessar o painel web:
@@ -191,14 +397,89 @@ Para acessar o painel web:
         help='Exibe estatísticas de otimização e sai'
     )
     
+    parser.add_argument(
+        '--build-tmdb-index',
+        action='store_true',
+        help='Gera o índice local de títulos a partir das exportações diárias do TMDB e sai'
+    )
+    
+    parser.add_argument(
+        '--audit',
+        action='store_true',
+        help='Pontua o SEO de todos os posts publicados e lista os de maior ganho esperado'
+    )
+    
+    parser.add_argument(
+        '--drain',
+        action='store_true',
+        help='Processa o backlog em lotes dimensionados pela quota e pelo ritmo medido, até esvaziá-lo'
+    )
+    
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=1,
+        help='Processos do modo contínuo, coordenados por leases no banco (padrão: 1)'
+    )
+    
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Modo simulação: roda o pipeline inteiro, mas guarda resultados e diffs no banco '
+             'de simulação em vez de alterar o WordPress (o mesmo que DRY_RUN=true)'
+    )
+    
+    parser.add_argument(
+        '--tenant',
+        default=None,
+        help='Executa o modo escolhido apenas para este site/autor de TENANTS_FILE'
+    )
+    
+    parser.add_argument(
+        '--audit-limit',
+        type=int,
+        default=20,
+        help='Quantidade de posts na lista priorizada da auditoria (padrão: 20)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=None,
+        help='Processos de trabalho da auditoria (padrão: número de CPUs)'
+    )
+    
     args = parser.parse_args()
     
+    if args.dry_run:
+        # Antes do primeiro uso da configuração; processos filhos herdam a variável
+        set_process_env('DRY_RUN', 'true')
+    
+    # Garante o logging configurado antes da primeira mensagem da CLI
+    config.get_instance()
+    
+    if args.tenant and args.tenant not in {profile.name for profile in config.tenants()}:
+        parser.error(f"tenant desconhecido: {args.tenant} (confira TENANTS_FILE)")
+    
+    with use_tenant(args.tenant):
+        _dispatch(args)
+
+def _dispatch(args):
+    """Executa o modo escolhido na linha de comando"""
     app = SEOOptimizerApp()
     
     if args.stats:
         app.show_stats()
+    elif args.build_tmdb_index:
+        app.build_tmdb_index()
+    elif args.audit:
+        app.run_audit(args.audit_limit, args.workers)
+    elif args.drain:
+        app.run_drain()
     elif args.once:
         app.run_once()
+    elif args.processes > 1:
+        app.run_processes(args.processes)
     else:
         app.run_continuous()
 
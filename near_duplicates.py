@@ -0,0 +1,130 @@
+import hashlib
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from content_analysis import normalize_title, parse_html
+from config import current_tenant
+from database import db
+from lazy import LazySingleton
+
+# SimHash de 64 bits dividido em 5 faixas (LSH): pelo princípio da casa dos
+# pombos, dois posts a até MAX_DISTANCE (= faixas - 1) bits de distância têm
+# ao menos uma faixa idêntica. Faixas de 12-13 bits mantêm poucos candidatos
+# por busca mesmo com centenas de milhares de posts indexados.
+SIMHASH_BITS = 64
+BAND_WIDTHS = (13, 13, 13, 13, 12)
+BANDS = len(BAND_WIDTHS)
+MAX_DISTANCE = BANDS - 1
+
+# Palavras por shingle do conteúdo e peso extra dos shingles do título
+CONTENT_SHINGLE_SIZE = 3
+TITLE_SHINGLE_SIZE = 2
+TITLE_WEIGHT = 3
+
+_MASK = (1 << SIMHASH_BITS) - 1
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def _shingles(words: List[str], size: int) -> Iterable[str]:
+    if len(words) <= size:
+        if words:
+            yield ' '.join(words)
+        return
+    for index in range(len(words) - size + 1):
+        yield ' '.join(words[index:index + size])
+
+def simhash(title: str, content: str) -> int:
+    """
+    SimHash de 64 bits do título (normalizado, com peso maior) mais o
+    conteúdo em shingles de palavras. Textos quase iguais (título
+    reescrito, parágrafo a mais) geram hashes a poucos bits de distância.
+    """
+    features: Dict[int, int] = {}
+    for shingle in _shingles(normalize_title(parse_html(title).text).split(), TITLE_SHINGLE_SIZE):
+        key = _hash64('t:' + shingle)
+        features[key] = features.get(key, 0) + TITLE_WEIGHT
+    for shingle in _shingles(list(parse_html(content).words), CONTENT_SHINGLE_SIZE):
+        key = _hash64(shingle)
+        features[key] = features.get(key, 0) + 1
+
+    # Soma os pesos por (posição do byte, valor do byte) e só depois
+    # distribui pelos bits: 8 operações por shingle em vez de 64
+    byte_weights = [[0] * 256 for _ in range(8)]
+    for key, weight in features.items():
+        for position in range(8):
+            byte_weights[position][(key >> (position * 8)) & 0xFF] += weight
+
+    total = sum(features.values())
+    bit_weights = [0] * SIMHASH_BITS
+    for position, counts in enumerate(byte_weights):
+        for value, weight in enumerate(counts):
+            if weight and value:
+                for bit in range(8):
+                    if value >> bit & 1:
+                        bit_weights[position * 8 + bit] += weight
+
+    # Bit ligado quando os shingles com o bit pesam mais que os sem ele
+    return sum(1 << bit for bit, weight in enumerate(bit_weights) if 2 * weight > total)
+
+def bands(value: int) -> Tuple[int, ...]:
+    """Faixas do SimHash, usadas como chaves do índice LSH"""
+    result = []
+    shift = 0
+    for width in BAND_WIDTHS:
+        result.append((value >> shift) & ((1 << width) - 1))
+        shift += width
+    return tuple(result)
+
+def hamming(a: int, b: int) -> int:
+    return ((a ^ b) & _MASK).bit_count()
+
+class NearDuplicateIndex:
+    """
+    Índice persistente (tabela `post_simhash`) de quase duplicatas entre
+    todos os posts já vistos: cada post entra com seu SimHash e as
+    faixas indexadas; a busca consulta só os candidatos que compartilham
+    uma faixa e confirma pela distância de Hamming.
+    """
+
+    def __init__(self, max_distance: int = MAX_DISTANCE):
+        self.logger = logging.getLogger(__name__)
+        self.max_distance = max_distance
+
+    def fingerprint(self, post: Dict) -> int:
+        """SimHash de um post no formato da API do WordPress"""
+        return simhash(
+            post.get('title', {}).get('rendered', ''),
+            post.get('content', {}).get('rendered', '')
+        )
+
+    def find(self, value: int, exclude_ids: Iterable[int] = ()) -> Optional[Tuple[int, int]]:
+        """
+        Procura o post indexado mais parecido.
+
+        Returns:
+            (post_id, distância) do melhor candidato dentro do limite, ou None.
+        """
+        excluded = set(exclude_ids)
+        best = None
+        for post_id, other in db.find_simhash_candidates(bands(value)):
+            if post_id in excluded:
+                continue
+            distance = hamming(value, other)
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (post_id, distance)
+        return best
+
+    def add(self, post_id: int, value: int, title: str = ''):
+        """Indexa (ou reindexa) um post"""
+        self.add_many([(post_id, value, title)])
+
+    def add_many(self, items: List[Tuple[int, int, str]]):
+        """Indexa vários posts de uma vez: (post_id, simhash, título)"""
+        if items:
+            db.save_post_simhashes([
+                (post_id, value, bands(value), title) for post_id, value, title in items
+            ])
+
+# Instância global do índice de quase duplicatas
+near_duplicate_index = LazySingleton(NearDuplicateIndex, scope=current_tenant)
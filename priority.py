@@ -0,0 +1,140 @@
+import logging
+import time
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from audit import TARGET_SCORE
+from config import config
+from database import db
+from lazy import LazySingleton
+from leases import MAX_ATTEMPTS
+from seo_scoring import seo_scorer
+
+# Janela em que posts com a mesma tag indicam um assunto em alta
+TRENDING_WINDOW_HOURS = 48
+
+# Outros posts recentes com a mesma tag para os pontos de "em alta" serem integrais
+TRENDING_SATURATION = 4
+
+# Posts da fila exibidos no status do sistema
+STATUS_PREVIEW = 5
+
+@dataclass(frozen=True)
+class QueuedPost:
+    """Um post pendente na fila, com a prioridade calculada e as parcelas dela"""
+
+    post_id: int
+    title: str
+    priority: float
+    components: Dict[str, float]
+
+    def to_dict(self) -> Dict:
+        return {'post_id': self.post_id, 'title': self.title,
+                'priority': self.priority, 'components': self.components}
+
+def _tag_ids(post: Dict) -> List[int]:
+    """IDs das tags de um post da API (embutidas com _embed ou só os IDs)"""
+    embedded_terms = post.get('_embedded', {}).get('wp:term', [])
+    if len(embedded_terms) > 1:
+        return sorted({term['id'] for term in embedded_terms[1] if 'id' in term})
+    return sorted({tag for tag in post.get('tags', []) if isinstance(tag, int)})
+
+def _published_epoch(post: Dict) -> Optional[float]:
+    """Horário de publicação (date_gmt da API) em epoch"""
+    raw = post.get('date_gmt')
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw).replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+class PostPriorityQueue:
+    """
+    Fila de prioridade dos posts descobertos (tabela `post_queue`): com
+    quota Gemini limitada, os posts que mais importam são otimizados
+    primeiro, em vez da ordem de ID. A prioridade soma, em pontos:
+
+    - recência: PRIORITY_RECENCY_WEIGHT, caindo pela metade a cada
+      PRIORITY_RECENCY_HALF_LIFE_HOURS desde a publicação;
+    - tag em alta: PRIORITY_TRENDING_WEIGHT quando outros posts das
+      últimas TRENDING_WINDOW_HOURS têm a mesma tag;
+    - ganho esperado: PRIORITY_GAIN_WEIGHT proporcional à distância entre
+      a pontuação SEO atual e a meta da auditoria;
+    - envelhecimento: PRIORITY_AGING_PER_HOUR por hora de espera, para
+      que posts de baixa prioridade não fiquem para sempre na fila.
+
+    A prioridade é recalculada a cada ciclo (a idade e a espera mudam).
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def enqueue(self, posts: List[Dict]):
+        """Coloca posts descobertos na fila (formato da API do WordPress)"""
+        if not posts:
+            return
+        reports = seo_scorer.score_many(posts)
+        db.enqueue_posts([
+            {
+                'post_id': post['id'],
+                'title': post.get('title', {}).get('rendered', ''),
+                'tags': _tag_ids(post),
+                'expected_gain': max(0, TARGET_SCORE - report.score),
+                'published_at': _published_epoch(post),
+            }
+            for post, report in zip(posts, reports)
+        ])
+        self.logger.info(f"{len(posts)} posts colocados na fila de prioridade")
+
+    def prune(self) -> int:
+        """Apaga os posts já processados que saíram da janela de tags em alta (só no ciclo)"""
+        return db.prune_post_queue(time.time() - TRENDING_WINDOW_HOURS * 3600)
+
+    def ranked(self) -> List[QueuedPost]:
+        """Posts que podem ser processados agora, do mais prioritário para o menos (só leitura)"""
+        settings = config.snapshot()
+        now = time.time()
+        window_start = now - TRENDING_WINDOW_HOURS * 3600
+
+        tag_counts = Counter(tag for tags in db.get_queue_tags_since(window_start) for tag in set(tags))
+        ranked = []
+        for row in db.get_queued_posts(MAX_ATTEMPTS):
+            published_at = row['published_at'] or row['enqueued_at']
+            age_hours = max(0.0, now - published_at) / 3600
+            others = max([tag_counts[tag] - 1 for tag in row['tags']] + [0])
+            gain = row['expected_gain'] / TARGET_SCORE if row['expected_gain'] is not None else 0.5
+
+            components = {
+                'recency': settings.priority_recency_weight
+                           * 0.5 ** (age_hours / settings.priority_recency_half_life_hours),
+                'trending': settings.priority_trending_weight * min(1.0, others / TRENDING_SATURATION),
+                'gain': settings.priority_gain_weight * min(1.0, gain),
+                'aging': settings.priority_aging_per_hour * max(0.0, now - row['enqueued_at']) / 3600,
+            }
+            components = {name: round(points, 1) for name, points in components.items()}
+            ranked.append(QueuedPost(row['post_id'], row['title'] or '',
+                                     round(sum(components.values()), 1), components))
+
+        # Empate: o post mais antigo primeiro
+        ranked.sort(key=lambda post: (-post.priority, post.post_id))
+        return ranked
+
+    def complete(self, post_id: int):
+        """Tira o post dos pendentes (otimizado ou sem necessidade de otimizar)"""
+        db.complete_queued_post(post_id)
+
+    def remove(self, post_id: int):
+        """Descarta o post da fila (apagado ou despublicado no WordPress)"""
+        db.remove_queued_post(post_id)
+
+    def summary(self) -> Dict:
+        """Pendentes, tentativas esgotadas e os próximos posts, para o status do sistema"""
+        summary = db.get_post_queue_summary(MAX_ATTEMPTS)
+        summary['next'] = [post.to_dict() for post in self.ranked()[:STATUS_PREVIEW]]
+        return summary
+
+# Instância global da fila de prioridade (o estado fica no banco do tenant ativo)
+post_queue = LazySingleton(PostPriorityQueue)
@@ -0,0 +1,68 @@
+import logging
+from typing import Dict, Optional, Tuple
+
+from config import config
+
+class AdaptiveScheduler:
+    """
+    Decide quando rodar o próximo ciclo de otimização a partir do
+    resultado do anterior, em vez de um intervalo fixo:
+
+    - backlog (mais posts novos do que o limite por ciclo): próximo ciclo
+      imediatamente;
+    - autores publicando (o ciclo encontrou posts novos): intervalo mínimo;
+    - ociosidade: o intervalo base (CHECK_INTERVAL_MINUTES) dobra a cada
+      ciclo vazio seguido, até o máximo;
+    - todas as chaves Gemini esgotadas: intervalo máximo;
+    - webhook de publicação ativo: sem backlog, o polling só cobre avisos
+      perdidos e usa o intervalo máximo.
+
+    Os limites são lidos da configuração a cada decisão, então um SIGHUP
+    vale já para o próximo agendamento.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.idle_cycles = 0
+        self.backlog = 0
+        self.found = 0
+        self.failed = False
+        self.keys_available = True
+
+    def record(self, result: Optional[Dict], keys_available: bool = True):
+        """Registra o resultado de um ciclo (None = o ciclo falhou)"""
+        self.keys_available = keys_available
+        if not result:
+            self.failed = True
+            self.backlog = 0
+            self.found = 0
+            return
+
+        self.found = result.get('posts_found', 0)
+        self.backlog = max(0, self.found - result.get('posts_processed', 0))
+        # Só insiste no backlog se o ciclo conseguiu otimizar algo
+        self.failed = bool(result.get('errors') or result.get('posts_error')) and not result.get('posts_success')
+        self.idle_cycles = 0 if self.found else self.idle_cycles + 1
+
+    def next_delay(self) -> Tuple[float, str]:
+        """Segundos até o próximo ciclo e o motivo da decisão"""
+        settings = config.snapshot()
+        minimum = settings.scheduler_min_interval_minutes * 60
+        maximum = settings.scheduler_max_interval_minutes * 60
+        base = min(maximum, max(minimum, settings.check_interval_minutes * 60))
+
+        if not self.keys_available:
+            return maximum, "todas as chaves Gemini esgotadas"
+        if self.failed:
+            return base, "último ciclo falhou"
+        if self.backlog:
+            return 0, f"backlog de {self.backlog} posts"
+        if settings.webhook_secret:
+            return maximum, "webhook ativo, polling como rede de segurança"
+        if self.found:
+            return minimum, "autores publicando"
+        if self.idle_cycles <= 1:
+            return base, "sem posts novos"
+
+        delay = min(maximum, base * 2 ** (self.idle_cycles - 1))
+        return delay, f"{self.idle_cycles} ciclos sem posts novos"
@@ -1,33 +1,58 @@
 import logging
 import time
-import re
 from datetime import datetime
-from typing import Dict, List, Optional
-from config import config
+from typing import Callable, Dict, List, Optional, Tuple
+from breakers import GEMINI, CircuitOpenError, circuit_breakers
+from config import config, current_tenant
+from content_analysis import content_fingerprint, normalize_title
 from database import db
 from wordpress_client import wordpress_client
 from gemini_client import gemini_client
 from tmdb_client import tmdb_client
+from events import event_bus
+from internal_links import internal_linker, term_catalog
+from leases import post_leases
+from near_duplicates import hamming, near_duplicate_index
+from priority import post_queue
+from shadow import shadow_store
+from seo_scoring import seo_scorer
+from lazy import LazySingleton
 
 class SEOOptimizer:
     """Classe principal que orquestra todo o processo de otimização SEO"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
-        self.target_author_id = config.target_author_id  # Posts do João (ID 6)
-        self.editor_author_id = config.editor_author_id  # Você editando (ID 9)
-        self.max_posts_per_cycle = config.max_posts_per_cycle
+        self._refresh_settings()
+    
+    def _refresh_settings(self):
+        """Fixa o snapshot de configuração usado até o fim do ciclo atual"""
+        self.settings = config.snapshot()
+        self.target_author_id = self.settings.target_author_id  # Posts do João (ID 6)
+        self.editor_author_id = self.settings.editor_author_id  # Você editando (ID 9)
+        self.max_posts_per_cycle = self.settings.max_posts_per_cycle
         
-    def run_optimization_cycle(self) -> Dict:
+    def run_optimization_cycle(self, max_posts: Optional[int] = None,
+                               before_post: Optional[Callable[[], bool]] = None,
+                               fetch_pages: Optional[int] = None) -> Dict:
         """
         Executa um ciclo completo de otimização
         
+        Args:
+            max_posts: Limite de posts do ciclo (padrão: MAX_POSTS_PER_CYCLE)
+            before_post: Chamado antes de cada post; retornar False encerra
+                o ciclo sem processar os posts restantes
+            fetch_pages: Limite de páginas de WORDPRESS_FETCH_LIMIT posts
+                buscadas (padrão: até alcançar o último post processado)
+        
         Returns:
             Dict com estatísticas do ciclo
         """
         cycle_start = time.time()
+        self._refresh_settings()
         
-        self.logger.info("=== INICIANDO CICLO DE OTIMIZAÇÃO SEO ===")
+        mode = " (SIMULAÇÃO, SEM ESCRITAS NO WORDPRESS)" if self.settings.dry_run else ""
+        self.logger.info(f"=== INICIANDO CICLO DE OTIMIZAÇÃO SEO{mode} ===")
         
         stats = {
             'cycle_start': datetime.now().isoformat(),
@@ -38,48 +63,77 @@ class SEOOptimizer:
             'processing_time': 0,
             'errors': []
         }
+        event_bus.publish('cycle_started', {'cycle_start': stats['cycle_start']})
         
         try:
-            # 1. Testa conexão com WordPress
+            # 1. Testa conexão com WordPress (dependência fora do ar: o ciclo termina na hora)
+            self._check_circuits()
             if not wordpress_client.test_connection():
                 raise Exception("Falha na conexão com WordPress")
+            self._sync_term_catalog()
+            limit = max_posts or self.max_posts_per_cycle
+            
+            # 2. Retoma posts abandonados (worker que morreu ou falha com tentativas restantes)
+            self._recover_abandoned_posts(stats, limit, before_post)
             
-            # 2. Busca posts novos
-            new_posts = self._find_new_posts()
-            stats['posts_found'] = len(new_posts)
+            # 3. Busca posts novos e os coloca na fila de prioridade
+            new_posts = {post['id']: post for post in self._find_new_posts(fetch_pages)}
+            post_queue.prune()
+            queued = post_queue.ranked()
+            stats['posts_found'] = len(queued)
             
-            if not new_posts:
-                self.logger.info("Nenhum post novo encontrado")
+            if not queued:
+                self.logger.info("Nenhum post pendente na fila")
                 stats['processing_time'] = time.time() - cycle_start
+                event_bus.publish('cycle_finished', stats)
                 return stats
             
-            # 3. Processa posts (máximo por ciclo)
-            posts_to_process = new_posts[:self.max_posts_per_cycle]
-            stats['posts_processed'] = len(posts_to_process)
-            
-            for post in posts_to_process:
+            # 4. Processa a fila por prioridade (máximo por ciclo); posts com outro worker ficam para ele
+            for entry in queued:
+                if stats['posts_processed'] >= limit:
+                    break
+                if before_post and not before_post():
+                    self.logger.info("Ciclo interrompido antes do próximo post")
+                    break
+                self._check_circuits()
                 try:
-                    optimized_result = self._process_single_post(post)
+                    self.logger.info(f"Post {entry.post_id} da fila: prioridade {entry.priority} {entry.components}")
+                    post = new_posts.get(entry.post_id) or self._fetch_queued_post(entry.post_id)
+                    if not post:
+                        continue
+                    optimized_result, skip_reason = self._process_with_lease(post)
+                    if skip_reason:
+                        continue
+                    stats['posts_processed'] += 1
                     if optimized_result:
                         stats['posts_success'] += 1
                     else:
                         stats['posts_error'] += 1
                         
+                except CircuitOpenError:
+                    raise
                 except Exception as e:
-                    error_msg = f"Erro ao processar post {post['id']}: {e}"
+                    error_msg = f"Erro ao processar post {entry.post_id}: {e}"
                     self.logger.error(error_msg)
                     stats['errors'].append(error_msg)
+                    stats['posts_processed'] += 1
                     stats['posts_error'] += 1
                     
                     # Log no banco
                     db.log_processing(
-                        post['id'],
-                        post.get('title', {}).get('rendered', 'N/A'),
+                        entry.post_id,
+                        entry.title or 'N/A',
                         'optimization',
                         'error',
                         str(e)
                     )
         
+        except CircuitOpenError as e:
+            # Um único aviso por ciclo: os posts restantes ficam na fila para o próximo
+            self.logger.warning(f"Ciclo interrompido: {e}")
+            stats['errors'].append(str(e))
+            stats['circuit_open'] = e.name
+        
         except Exception as e:
             error_msg = f"Erro geral no ciclo de otimização: {e}"
             self.logger.error(error_msg)
@@ -91,82 +145,257 @@ class SEOOptimizer:
         self.logger.info(f"Posts processados: {stats['posts_processed']}")
         self.logger.info(f"Sucessos: {stats['posts_success']}")
         self.logger.info(f"Erros: {stats['posts_error']}")
+        event_bus.publish('cycle_finished', stats)
         
         return stats
     
-    def _find_new_posts(self) -> List[Dict]:
-        """Encontra posts novos para processar e remove duplicados."""
+    def _recover_abandoned_posts(self, stats: Dict, limit: int,
+                                 before_post: Optional[Callable[[], bool]] = None):
+        """Reprocessa posts cujas leases venceram abaixo do cursor (o polling não os vê mais)"""
+        for post_id in post_leases.recoverable(limit):
+            if stats['posts_processed'] >= limit or (before_post and not before_post()):
+                return
+            self._check_circuits()
+            post_data = wordpress_client.get_post_full_data(post_id)
+            if not post_data:
+                # Sem resposta porque o WordPress caiu: o post não pode ser descartado
+                self._check_circuits()
+            if not post_data or post_data.get('status', 'publish') != 'publish':
+                self.logger.info(f"Post abandonado {post_id} não está mais publicado, descartando")
+                post_leases.discard(post_id)
+                continue
+            
+            self.logger.info(f"Retomando post abandonado {post_id}")
+            optimized_result, skip_reason = self._process_with_lease(post_data)
+            if skip_reason:
+                continue
+            stats['posts_processed'] += 1
+            stats['posts_success' if optimized_result else 'posts_error'] += 1
+
+    def _check_circuits(self):
+        """Levanta CircuitOpenError se o WordPress ou o Gemini estão fora do ar (circuito aberto)"""
+        for breaker in (circuit_breakers.wordpress(), circuit_breakers.get(GEMINI)):
+            if not breaker.available():
+                raise breaker.open_error()
+
+    def _fetch_queued_post(self, post_id: int) -> Optional[Dict]:
+        """Busca um post que entrou na fila em um ciclo anterior; descarta os que sumiram"""
+        post_data = wordpress_client.get_post_full_data(post_id)
+        if not post_data:
+            # Sem resposta porque o WordPress caiu: o post continua na fila
+            self._check_circuits()
+        if not post_data or post_data.get('status', 'publish') != 'publish':
+            self.logger.info(f"Post {post_id} da fila não está mais publicado, descartando")
+            post_queue.remove(post_id)
+            return None
+        return post_data
+
+    def _process_with_lease(self, post_data: Dict, advance_cursor: bool = True,
+                            force: bool = False) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Reserva o post (lease) e o processa, para que dois workers nunca
+        otimizem o mesmo post.
+        
+        Returns:
+            (dados otimizados ou None, motivo de o post ter sido pulado ou None)
+        """
+        post_id = post_data['id']
+        if not post_leases.claim(post_id, force=force):
+            reason = "em processamento por outro worker ou aguardando nova tentativa"
+            self.logger.info(f"Post {post_id} ignorado: {reason}")
+            return None, reason
+        
+        optimized_result = None
+        skip_reason = None
+        interrupted = None
+        try:
+            # Outro worker pode ter otimizado o post depois da busca
+            skip_reason = self._unchanged_reason(post_data)
+            if skip_reason:
+                self.logger.info(f"Post {post_id} ignorado: {skip_reason}")
+                db.log_processing(post_id, post_data.get('title', {}).get('rendered', 'N/A'),
+                                  'optimization', 'skipped', skip_reason)
+            else:
+                optimized_result = self._process_single_post(post_data, advance_cursor)
+        except CircuitOpenError as e:
+            interrupted = str(e)
+            raise
+        finally:
+            if interrupted:
+                # Dependência fora do ar: o post volta sem gastar uma das tentativas
+                post_leases.interrupt(post_id, interrupted)
+            elif optimized_result or skip_reason:
+                post_leases.release(post_id)
+                post_queue.complete(post_id)
+            else:
+                post_leases.fail(post_id, "Falha no processamento do post")
+        return optimized_result, skip_reason
+
+    def _find_new_posts(self, fetch_pages: Optional[int] = None) -> List[Dict]:
+        """
+        Encontra posts novos, remove duplicados e coloca os otimizáveis na
+        fila de prioridade. O cursor avança até o post mais novo visto só
+        quando a busca alcançou o cursor atual: a partir daí, a fila (e não
+        o cursor) guarda o que falta processar. Se a busca parou antes, os
+        posts lidos entram na fila e o cursor fica onde está, para que a
+        próxima busca volte a cobrir os posts mais antigos.
+        
+        Returns:
+            Os posts colocados na fila (dados completos da API)
+        """
         try:
             last_processed_id = db.get_last_processed_post_id()
             self.logger.info(f"Último post processado: {last_processed_id}")
             
             # Busca posts novos do autor alvo (João - ID 6)
             # Aumentamos a busca para ter mais chance de encontrar duplicatas no mesmo ciclo
-            new_posts_raw = wordpress_client.get_new_posts_since_id(
+            new_posts_raw, reached_cursor = wordpress_client.get_new_posts_since_id(
                 self.target_author_id, 
                 last_processed_id,
-                per_page=config.wordpress_fetch_limit
+                per_page=self.settings.wordpress_fetch_limit,
+                max_pages=fetch_pages
             )
 
             if not new_posts_raw:
                 return []
 
-            # --- Lógica de de-duplicação ---
+            # --- Lógica de de-duplicação (quase duplicatas por SimHash) ---
             self.logger.info(f"Verificando {len(new_posts_raw)} posts por duplicatas...")
-            posts_by_title = {}
-            
-            def normalize_title(title):
-                # Remove entidades HTML, pontuação e converte para minúsculas
-                title = re.sub(r'&#\d+;', '', title)
-                title = re.sub(r'[^\w\s]', '', title).lower().strip()
-                return title
-
-            for post in new_posts_raw:
-                title = post.get('title', {}).get('rendered', '')
-                norm_title = normalize_title(title)
-                if norm_title not in posts_by_title:
-                    posts_by_title[norm_title] = []
-                posts_by_title[norm_title].append(post)
-
-            unique_posts = []
-            for norm_title, post_group in posts_by_title.items():
-                if len(post_group) > 1:
-                    self.logger.warning(f"Encontrado grupo de {len(post_group)} posts duplicados com título: '{post_group[0]['title']['rendered']}'")
-                    post_group.sort(key=lambda p: p['id'], reverse=True)
-                    post_to_keep = post_group[0]
-                    posts_to_delete = post_group[1:]
-                    
-                    unique_posts.append(post_to_keep)
-                    self.logger.info(f"Mantendo post ID {post_to_keep['id']} e removendo os outros.")
-                    
-                    for post_to_del in posts_to_delete:
-                        self.logger.info(f"Movendo post duplicado ID {post_to_del['id']} para a lixeira...")
-                        deleted = wordpress_client.delete_post(post_to_del['id'], force=False)
-                        if deleted:
-                            self.logger.info(f"Post ID {post_to_del['id']} movido para a lixeira com sucesso.")
-                        else:
-                            self.logger.error(f"Falha ao mover post ID {post_to_del['id']} para a lixeira.")
-                else:
-                    unique_posts.append(post_group[0])
+            unique_posts = self._remove_duplicates(new_posts_raw)
 
             # Filtra apenas posts otimizáveis (filmes/séries)
             optimizable_posts = []
             for post in unique_posts:
-                if wordpress_client.is_post_optimizable(post):
-                    optimizable_posts.append(post)
-                    self.logger.info(f"Post otimizável encontrado: {post['id']} - {post.get('title', {}).get('rendered', 'N/A')}")
-                else:
+                title = post.get('title', {}).get('rendered', 'N/A')
+                if not wordpress_client.is_post_optimizable(post):
                     self.logger.info(f"Post {post['id']} não é otimizável (não é filme/série)")
+                    continue
+
+                # Evita gastar quota e escrita no WordPress com posts já otimizados
+                skip_reason = self._unchanged_reason(post)
+                if skip_reason:
+                    self.logger.info(f"Post {post['id']} ignorado: {skip_reason}")
+                    db.log_processing(post['id'], title, 'optimization', 'skipped', skip_reason)
+                    continue
+
+                optimizable_posts.append(post)
+                self.logger.info(f"Post otimizável encontrado: {post['id']} - {title}")
             
+            # Enfileira antes de mover o cursor: uma falha entre os dois só repete a busca
+            post_queue.enqueue(optimizable_posts)
+            if reached_cursor:
+                db.update_last_processed_post_id(max(post['id'] for post in new_posts_raw))
+            else:
+                self.logger.warning(
+                    f"Busca não alcançou o post {last_processed_id}: {len(new_posts_raw)} posts lidos "
+                    f"foram para a fila e o cursor fica onde está até a busca chegar nele"
+                )
             return optimizable_posts
             
         except Exception as e:
             self.logger.error(f"Erro ao buscar posts novos: {e}")
             return []
 
+    def _remove_duplicates(self, posts: List[Dict]) -> List[Dict]:
+        """
+        Agrupa os posts do lote com o mesmo título normalizado, mantém o mais
+        novo de cada grupo e move os demais para a lixeira. Quase duplicatas
+        (SimHash próximo de um post mantido no lote ou de ciclos anteriores,
+        índice `post_simhash`) são apenas ignoradas, sem gastar uma chamada ao
+        Gemini: a semelhança é estimada, então nunca apaga um post.
+        """
+        fingerprints = {post['id']: near_duplicate_index.fingerprint(post) for post in posts}
+        titles = {post['id']: normalize_title(post.get('title', {}).get('rendered', '')) for post in posts}
+        batch_ids = set(fingerprints)
+
+        # Agrupa dentro do lote só pelo título normalizado (duplicata exata)
+        groups: Dict[str, List[Dict]] = {}
+        for post in sorted(posts, key=lambda p: p['id'], reverse=True):
+            groups.setdefault(titles[post['id']], []).append(post)
+
+        unique_posts = []
+        for post_group in groups.values():
+            post_to_keep = post_group[0]
+            if len(post_group) > 1:
+                self.logger.warning(f"Encontrado grupo de {len(post_group)} posts duplicados com título: '{post_to_keep['title']['rendered']}'")
+                self.logger.info(f"Mantendo post ID {post_to_keep['id']} e removendo os outros.")
+
+                for post_to_del in post_group[1:]:
+                    if self.settings.dry_run:
+                        self.logger.info(f"Simulação: post duplicado ID {post_to_del['id']} iria para a lixeira")
+                        continue
+                    self.logger.info(f"Movendo post duplicado ID {post_to_del['id']} para a lixeira...")
+                    deleted = wordpress_client.delete_post(post_to_del['id'], force=False)
+                    if deleted:
+                        self.logger.info(f"Post ID {post_to_del['id']} movido para a lixeira com sucesso.")
+                    else:
+                        self.logger.error(f"Falha ao mover post ID {post_to_del['id']} para a lixeira.")
+
+            # Compara com os posts mantidos do lote (mais novos) e com todo o histórico já indexado
+            match = None
+            for kept in unique_posts:
+                distance = hamming(fingerprints[kept['id']], fingerprints[post_to_keep['id']])
+                if distance <= near_duplicate_index.max_distance:
+                    match = (kept['id'], distance)
+                    break
+            if match is None:
+                match = near_duplicate_index.find(fingerprints[post_to_keep['id']], exclude_ids=batch_ids)
+            if match:
+                other_id, distance = match
+                title = post_to_keep.get('title', {}).get('rendered', 'N/A')
+                self.logger.warning(f"Post {post_to_keep['id']} é quase duplicata do post {other_id} (distância {distance}), ignorando")
+                db.log_processing(
+                    post_to_keep['id'], title, 'deduplication', 'skipped',
+                    f"Quase duplicata do post {other_id} (distância {distance})"
+                )
+            else:
+                unique_posts.append(post_to_keep)
+
+        near_duplicate_index.add_many([
+            (post['id'], fingerprints[post['id']], post.get('title', {}).get('rendered', ''))
+            for post in unique_posts
+        ])
+        return unique_posts
+
+    def _unchanged_reason(self, post: Dict) -> Optional[str]:
+        """
+        Compara o post com o fingerprint da última otimização. Retorna o
+        motivo para pular o post, ou None se ele precisa ser otimizado.
+        """
+        record = db.get_post_fingerprint(post['id'])
+        if not record:
+            return None
+
+        modified = post.get('modified')
+        if modified and modified == record['wp_modified']:
+            return "sem alterações desde a última verificação"
+
+        current = content_fingerprint(
+            post.get('title', {}).get('rendered', ''),
+            post.get('content', {}).get('rendered', '')
+        )
+        if current == record['optimized_hash']:
+            reason = "conteúdo já é a versão otimizada"
+        elif current == record['original_hash']:
+            reason = "conteúdo original sem mudanças relevantes"
+        else:
+            return None
+
+        # Próximas verificações desta versão nem precisam calcular o hash
+        if modified:
+            db.touch_post_fingerprint(post['id'], modified)
+        return reason
+
+    def _sync_term_catalog(self):
+        """Atualiza o catálogo de tags/categorias; uma falha não interrompe o ciclo"""
+        try:
+            term_catalog.sync()
+        except Exception as e:
+            self.logger.warning(f"Falha ao sincronizar o catálogo de termos (usando o local): {e}")
+
     def _calculate_seo_score(self, optimized_data: Dict, focus_keyword: str) -> int:
         """
-        Calcula uma pontuação de SEO com base em critérios objetivos.
+        Calcula uma pontuação de SEO com o motor de regras (`seo_scoring`).
 
         Args:
             optimized_data: Dicionário com 'title', 'excerpt', 'content'.
@@ -175,49 +404,28 @@ class SEOOptimizer:
         Returns:
             Uma pontuação de 0 a 100.
         """
-        score = 0
-        reasons = []
-
-        title = optimized_data.get('title', '').lower()
-        excerpt = optimized_data.get('excerpt', '').lower()
-        content = optimized_data.get('content', '')
-        keyword = focus_keyword.lower()
-
-        # 1. Palavra-chave no Título (20 pontos)
-        if keyword in title:
-            score += 20
-            reasons.append("KW no título")
-        
-        # 2. Palavra-chave no Resumo (20 pontos)
-        if keyword in excerpt:
-            score += 20
-            reasons.append("KW no resumo")
-
-        # 3. Links Internos (20 pontos)
-        if '<a href=' in content:
-            score += 20
-            reasons.append("Links internos")
-
-        # 4. Uso de Negrito (20 pontos)
-        if '<b>' in content:
-            score += 20
-            reasons.append("Uso de negrito")
+        report = seo_scorer.score(
+            optimized_data.get('title', ''),
+            optimized_data.get('excerpt', ''),
+            optimized_data.get('content', ''),
+            focus_keyword
+        )
 
-        # 5. Estrutura de Parágrafos (20 pontos)
-        # Mais de 2 parágrafos indica boa quebra de texto
-        if content.count('<p>') > 2:
-            score += 20
-            reasons.append("Boa estrutura de parágrafos")
-        
-        self.logger.info(f"Cálculo do SEO Score: {score}/100. Fatores: {', '.join(reasons) or 'Nenhum'}")
-        return score
+        self.logger.info(
+            f"Cálculo do SEO Score: {report.score}/100. "
+            f"Fatores: {', '.join(report.passed) or 'Nenhum'}. "
+            f"A melhorar: {', '.join(report.failed) or 'Nada'}"
+        )
+        return report.score
     
-    def _process_single_post(self, post_data: Dict) -> Optional[Dict]:
+    def _process_single_post(self, post_data: Dict, advance_cursor: bool = True) -> Optional[Dict]:
         """
         Processa um único post
         
         Args:
             post_data: Dados completos do post
+            advance_cursor: Atualiza o `last_processed_post_id` do polling
+                (False para posts recebidos fora de ordem, como via webhook)
             
         Returns:
             Dict com dados otimizados em caso de sucesso, None caso contrário.
@@ -227,6 +435,7 @@ class SEOOptimizer:
         
         process_start = time.time()
         self.logger.info(f"--- Processando post {post_id}: {post_title} ---")
+        self._publish_progress(post_id, post_title, 'started')
         
         try:
             # 1. Extrai dados do post
@@ -235,30 +444,52 @@ class SEOOptimizer:
             content = post_data.get('content', {}).get('rendered', '')
             
             embedded_terms = post_data.get('_embedded', {}).get('wp:term', [[], []])
+            categories = embedded_terms[0] if embedded_terms else []
             tags = embedded_terms[1] if len(embedded_terms) > 1 else []
             
             if not title or not content:
                 raise ValueError("Post sem título ou conteúdo")
             
-            # 2. Busca de mídia no TMDB desativada temporariamente
-            self.logger.info("Busca de mídia no TMDB desativada para simplificar a otimização.")
+            # 2. Busca de mídia no TMDB (opcional; consultas repetidas vêm do cache)
             media_data = None
+            if self.settings.tmdb_enrichment_enabled:
+                media_data = tmdb_client.get_media_for_post({
+                    'title': {'rendered': title},
+                    'content': {'rendered': content},
+                    'categories': categories,
+                    'tags': tags
+                })
             
             # 3. Prepara tags para o prompt
             tags_text = ", ".join([tag.get('name', '') for tag in tags])
             if not tags_text:
                 tags_text = "Nenhuma tag disponível"
+            if media_data:
+                release = media_data.get('release_date') or media_data.get('first_air_date') or ''
+                tags_text += f". Título oficial (TMDB): {media_data['title']}"
+                if release:
+                    tags_text += f" ({release[:4]})"
             
             # 4. Otimiza conteúdo com Gemini
             self.logger.info("Otimizando conteúdo com Gemini...")
+            self._publish_progress(post_id, post_title, 'gemini')
+            gemini_start = time.time()
             optimized_data = gemini_client.optimize_content(
                 title, excerpt, content, tags_text
             )
+            gemini_seconds = time.time() - gemini_start
             
             if not optimized_data:
                 raise ValueError("Falha na otimização com Gemini")
             
-            # 5. Calcula o SEO Score
+            # 5. Insere links internos verificados (catálogo local de tags/categorias)
+            optimized_data['content'], linked_terms = internal_linker.insert_links(
+                optimized_data['content'], tags + categories
+            )
+            if linked_terms:
+                self.logger.info(f"Links internos inseridos: {', '.join(linked_terms)}")
+            
+            # 6. Calcula o SEO Score
             focus_keyword = wordpress_client._extract_focus_keyword(
                 optimized_data.get('title', ''),
                 optimized_data.get('content', '')
@@ -266,16 +497,21 @@ class SEOOptimizer:
             seo_score = self._calculate_seo_score(optimized_data, focus_keyword)
             optimized_data['seo_score'] = seo_score
             
-            # 6. Atualiza post no WordPress
-            self.logger.info("Atualizando post no WordPress...")
-            update_success = wordpress_client.update_post_complete(
-                post_id, optimized_data, focus_keyword
-            )
+            # 7. Atualiza post no WordPress (na simulação, só guarda o resultado e o diff)
+            self._publish_progress(post_id, post_title, 'wordpress')
+            if self.settings.dry_run:
+                shadow_store.record(post_id, {'title': title, 'excerpt': excerpt, 'content': content},
+                                    optimized_data, focus_keyword, gemini_seconds)
+            else:
+                self.logger.info("Atualizando post no WordPress...")
+                update_success = wordpress_client.update_post_complete(
+                    post_id, optimized_data, focus_keyword
+                )
 
-            if not update_success:
-                raise ValueError("Falha ao atualizar post no WordPress")
+                if not update_success:
+                    raise ValueError("Falha ao atualizar post no WordPress")
             
-            # 6. Registra sucesso
+            # 8. Registra sucesso
             processing_time = time.time() - process_start
             
             db.log_processing(
@@ -288,13 +524,25 @@ class SEOOptimizer:
             )
             
             # Atualiza último post processado
-            db.update_last_processed_post_id(post_id)
+            if advance_cursor:
+                db.update_last_processed_post_id(post_id)
+            db.save_post_fingerprint(
+                post_id,
+                content_fingerprint(title, content),
+                content_fingerprint(optimized_data.get('title', ''), optimized_data.get('content', ''))
+            )
             
             self.logger.info(f"Post {post_id} otimizado com sucesso em {processing_time:.2f}s")
             self.logger.info(f"SEO Score: {optimized_data.get('seo_score', 'N/A')}")
+            self._publish_progress(post_id, post_title, 'success', seo_score=seo_score)
             
             return optimized_data
             
+        except CircuitOpenError as e:
+            self.logger.warning(f"Post {post_id} interrompido: {e}")
+            self._publish_progress(post_id, post_title, 'error', error=str(e))
+            raise
+            
         except Exception as e:
             processing_time = time.time() - process_start
             self.logger.error(f"Erro ao processar post {post_id}: {e}")
@@ -307,17 +555,28 @@ class SEOOptimizer:
                 str(e),
                 processing_time
             )
+            self._publish_progress(post_id, post_title, 'error', error=str(e))
             
             return None
     
+    def _publish_progress(self, post_id: int, post_title: str, stage: str, **extra):
+        """Publica o andamento de um post no barramento de eventos"""
+        event_bus.publish('post_progress', {
+            'post_id': post_id,
+            'post_title': post_title,
+            'stage': stage,
+            **extra
+        })
+    
     def get_system_status(self) -> Dict:
         """Retorna status atual do sistema"""
         try:
             stats = db.get_statistics()
             quota_status = gemini_client.get_quota_status()
             
-            # Testa conexões
+            # Testa conexões (com o circuito aberto, falha na hora sem chamar o WordPress)
             wp_connected = wordpress_client.test_connection()
+            breakers = circuit_breakers.summary()
             
             return {
                 'timestamp': datetime.now().isoformat(),
@@ -325,7 +584,12 @@ class SEOOptimizer:
                 'gemini_quota': quota_status,
                 'statistics': stats,
                 'last_processed_post_id': db.get_last_processed_post_id(),
-                'system_healthy': wp_connected and not quota_status.get('quota_exceeded', False)
+                'leases': db.get_post_lease_summary(),
+                'queue': post_queue.summary(),
+                'tmdb': tmdb_client.get_stats() if tmdb_client.is_initialized() else None,
+                'circuit_breakers': breakers,
+                'system_healthy': (wp_connected and not quota_status.get('quota_exceeded', False)
+                                   and breakers[GEMINI]['state'] == 'closed')
             }
             
         except Exception as e:
@@ -352,6 +616,7 @@ class SEOOptimizer:
             Dict com resultado do processamento
         """
         process_start = time.time()
+        self._refresh_settings()
         
         self.logger.info(f"=== PROCESSANDO POST ESPECÍFICO: {post_url} ===")
         
@@ -361,7 +626,8 @@ class SEOOptimizer:
             'error': None,
             'processing_time': 0,
             'before': None,
-            'after': None
+            'after': None,
+            'skipped': None
         }
         
         try:
@@ -370,6 +636,7 @@ class SEOOptimizer:
             if not wordpress_client.test_connection():
                 raise Exception("Falha na conexão com WordPress")
             self.logger.info("✅ Conexão com WordPress OK")
+            self._sync_term_catalog()
             
             # 2. Busca post pela URL
             self.logger.info("Etapa 2: Buscando post pela URL...")
@@ -397,11 +664,15 @@ class SEOOptimizer:
             
             self.logger.info("✅ Post é otimizável")
             
-            # 4. Processa o post
+            # 4. Reserva o post e o processa (pula posts sem mudanças desde a última otimização)
             self.logger.info("Etapa 4: Processando o post...")
-            optimized_result = self._process_single_post(post_data)
+            optimized_result, skip_reason = self._process_with_lease(post_data, force=True)
             
-            if optimized_result:
+            if skip_reason:
+                self.logger.info(f"✅ Post ignorado: {skip_reason}")
+                result['success'] = True
+                result['skipped'] = skip_reason
+            elif optimized_result:
                 result['success'] = True
                 result['after'] = optimized_result
                 self.logger.info(f"✅ Post processado com sucesso! Score: {optimized_result.get('seo_score')}")
@@ -418,5 +689,59 @@ class SEOOptimizer:
         
         return result
 
-# Instância global do otimizador
-seo_optimizer = SEOOptimizer()
+    def process_post_by_id(self, post_id: int) -> Dict:
+        """
+        Processa um post avisado pelo WordPress (webhook de publicação) com as
+        mesmas regras do ciclo: autor alvo, categoria otimizável, quase
+        duplicatas e posts sem mudanças. Não mexe no cursor do polling, que
+        continua cobrindo posts cujo aviso se perdeu.
+        
+        Returns:
+            Dict com resultado do processamento
+        """
+        process_start = time.time()
+        self._refresh_settings()
+        
+        result = {
+            'post_id': post_id,
+            'success': False,
+            'skipped': None,
+            'error': None,
+            'seo_score': None,
+            'processing_time': 0
+        }
+        
+        try:
+            post_data = wordpress_client.get_post_full_data(post_id)
+            if not post_data:
+                raise Exception("Post não encontrado ou não acessível")
+            if post_data.get('status', 'publish') != 'publish':
+                result['skipped'] = f"post não publicado ({post_data.get('status')})"
+            elif post_data.get('author') != self.target_author_id:
+                result['skipped'] = f"autor {post_data.get('author')} não é o autor alvo"
+            elif not wordpress_client.is_post_optimizable(post_data):
+                result['skipped'] = "não é filme/série"
+            elif not self._remove_duplicates([post_data]):
+                result['skipped'] = "quase duplicata de um post anterior"
+            
+            if result['skipped']:
+                self.logger.info(f"Post {post_id} ignorado: {result['skipped']}")
+                result['success'] = True
+            else:
+                self._sync_term_catalog()
+                optimized_result, result['skipped'] = self._process_with_lease(post_data, advance_cursor=False)
+                if not optimized_result and not result['skipped']:
+                    raise Exception("Falha no processamento do post")
+                result['success'] = True
+                if optimized_result:
+                    result['seo_score'] = optimized_result.get('seo_score')
+        
+        except Exception as e:
+            self.logger.error(f"Erro ao processar post {post_id}: {e}")
+            result['error'] = str(e)
+        
+        result['processing_time'] = time.time() - process_start
+        return result
+
+# Instância global do otimizador, uma por tenant (construída no primeiro uso)
+seo_optimizer = LazySingleton(SEOOptimizer, scope=current_tenant)
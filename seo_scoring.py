@@ -0,0 +1,258 @@
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import config, current_tenant
+from content_analysis import ParsedContent, extract_focus_keyword, parse_html, strip_html
+from lazy import LazySingleton
+
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+(?:\s|$)')
+_WORD_RE = re.compile(r'\w+', re.U)
+
+@dataclass(frozen=True)
+class ScoringInput:
+    """Tudo que as regras precisam sobre um post, já analisado uma única vez"""
+
+    title: str
+    excerpt: str
+    content: ParsedContent
+    keyword: str
+    keyword_words: Tuple[str, ...]
+    site_host: str
+
+@dataclass(frozen=True)
+class RuleResult:
+    """Resultado de uma regra: pontos obtidos de um máximo, com o motivo"""
+
+    rule: str
+    points: float
+    max_points: int
+    message: str
+
+@dataclass(frozen=True)
+class SEORule:
+    """Uma verificação de SEO registrada no motor de pontuação"""
+
+    name: str
+    max_points: int
+    check: Callable[[ScoringInput], Tuple[float, str]]
+
+@dataclass
+class ScoreReport:
+    """Pontuação final (0-100) e o detalhamento por regra"""
+
+    score: int
+    results: List[RuleResult] = field(default_factory=list)
+
+    @property
+    def passed(self) -> List[str]:
+        return [result.message for result in self.results if result.points >= result.max_points]
+
+    @property
+    def failed(self) -> List[str]:
+        return [result.message for result in self.results if result.points < result.max_points]
+
+    def to_dict(self) -> Dict:
+        return {
+            'score': self.score,
+            'rules': {
+                result.rule: {'points': result.points, 'max': result.max_points, 'message': result.message}
+                for result in self.results
+            }
+        }
+
+# Regras padrão, na ordem em que são avaliadas; novas regras entram com @rule
+RULES: List[SEORule] = []
+
+def rule(name: str, max_points: int):
+    """Registra uma função `check(inp) -> (fração 0..1, mensagem)` como regra padrão"""
+    def decorator(check: Callable[[ScoringInput], Tuple[float, str]]):
+        RULES.append(SEORule(name, max_points, check))
+        return check
+    return decorator
+
+def _host(url: str) -> str:
+    host = urlsplit(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+def _count_phrase(words: Tuple[str, ...], phrase: Tuple[str, ...]) -> int:
+    """Ocorrências da sequência de palavras `phrase` em `words`"""
+    size = len(phrase)
+    if not size:
+        return 0
+    first = phrase[0]
+    return sum(
+        1 for index, word in enumerate(words)
+        if word == first and words[index:index + size] == phrase
+    )
+
+def _in_range(value: float, ideal: Tuple[float, float], acceptable: Tuple[float, float]) -> float:
+    if ideal[0] <= value <= ideal[1]:
+        return 1.0
+    if acceptable[0] <= value <= acceptable[1]:
+        return 0.5
+    return 0.0
+
+@rule('keyword_in_title', 15)
+def _keyword_in_title(inp: ScoringInput) -> Tuple[float, str]:
+    title = inp.title.lower()
+    position = title.find(inp.keyword)
+    if position < 0:
+        return 0.0, "KW ausente do título"
+    if position <= len(title) // 2:
+        return 1.0, "KW no início do título"
+    return 0.7, "KW no final do título"
+
+@rule('keyword_in_excerpt', 10)
+def _keyword_in_excerpt(inp: ScoringInput) -> Tuple[float, str]:
+    if inp.keyword in inp.excerpt.lower():
+        return 1.0, "KW no resumo"
+    return 0.0, "KW ausente do resumo"
+
+@rule('keyword_in_intro', 10)
+def _keyword_in_intro(inp: ScoringInput) -> Tuple[float, str]:
+    intro = inp.content.paragraphs[0] if inp.content.paragraphs else inp.content.text[:300]
+    if inp.keyword in intro.lower():
+        return 1.0, "KW no primeiro parágrafo"
+    return 0.0, "KW ausente do primeiro parágrafo"
+
+@rule('keyword_density', 10)
+def _keyword_density(inp: ScoringInput) -> Tuple[float, str]:
+    total = inp.content.word_count
+    if not total:
+        return 0.0, "Conteúdo vazio"
+    occurrences = _count_phrase(inp.content.words, inp.keyword_words)
+    density = occurrences / total * 100
+    fraction = _in_range(density, (0.5, 3.0), (0.2, 4.0))
+    return fraction, f"Densidade da KW {density:.1f}%"
+
+@rule('internal_links', 10)
+def _internal_links(inp: ScoringInput) -> Tuple[float, str]:
+    internal = sum(
+        1 for link in inp.content.links
+        if not link.href.startswith(('#', 'mailto:', 'tel:'))
+        and (not _host(link.href) or _host(link.href) == inp.site_host)
+    )
+    if internal >= 2:
+        return 1.0, f"{internal} links internos"
+    if internal == 1:
+        return 0.5, "Apenas 1 link interno"
+    return 0.0, "Sem links internos"
+
+@rule('external_links', 5)
+def _external_links(inp: ScoringInput) -> Tuple[float, str]:
+    external = sum(
+        1 for link in inp.content.links
+        if _host(link.href) and _host(link.href) != inp.site_host
+    )
+    if external:
+        return 1.0, f"{external} link(s) externo(s)"
+    return 0.0, "Sem links externos (fontes)"
+
+@rule('bold_usage', 5)
+def _bold_usage(inp: ScoringInput) -> Tuple[float, str]:
+    count = len(inp.content.bold)
+    if 2 <= count <= 12:
+        return 1.0, f"Uso de negrito ({count})"
+    if count:
+        return 0.5, f"Negrito pouco equilibrado ({count})"
+    return 0.0, "Sem negrito"
+
+@rule('paragraph_length', 10)
+def _paragraph_length(inp: ScoringInput) -> Tuple[float, str]:
+    paragraphs = inp.content.paragraphs
+    if len(paragraphs) <= 2:
+        return 0.0, "Poucos parágrafos"
+    short = sum(1 for paragraph in paragraphs if len(_WORD_RE.findall(paragraph)) <= 60)
+    share = short / len(paragraphs)
+    fraction = 1.0 if share >= 0.8 else 0.5 if share >= 0.5 else 0.0
+    return fraction, f"{short}/{len(paragraphs)} parágrafos curtos"
+
+@rule('title_length', 10)
+def _title_length(inp: ScoringInput) -> Tuple[float, str]:
+    length = len(inp.title)
+    return _in_range(length, (40, 65), (30, 75)), f"Título com {length} caracteres"
+
+@rule('excerpt_length', 5)
+def _excerpt_length(inp: ScoringInput) -> Tuple[float, str]:
+    length = len(inp.excerpt)
+    return _in_range(length, (120, 160), (80, 180)), f"Resumo com {length} caracteres"
+
+@rule('headings', 5)
+def _headings(inp: ScoringInput) -> Tuple[float, str]:
+    subheadings = sum(1 for level, _ in inp.content.headings if level in (2, 3))
+    if subheadings:
+        return 1.0, f"{subheadings} intertítulos"
+    if inp.content.word_count < 300:
+        return 1.0, "Texto curto dispensa intertítulos"
+    return 0.0, "Texto longo sem intertítulos (h2/h3)"
+
+@rule('readability', 5)
+def _readability(inp: ScoringInput) -> Tuple[float, str]:
+    sentences = [s for s in _SENTENCE_SPLIT_RE.split(inp.content.text) if s.strip()]
+    if not sentences:
+        return 0.0, "Sem frases"
+    average = inp.content.word_count / len(sentences)
+    fraction = 1.0 if average <= 20 else 0.5 if average <= 25 else 0.0
+    return fraction, f"Média de {average:.0f} palavras por frase"
+
+class SEOScorer:
+    """
+    Motor de pontuação SEO baseado em regras. Cada regra recebe o post já
+    analisado (`ParsedContent`) e devolve uma fração dos seus pontos; a
+    soma dos máximos das regras padrão é 100.
+    """
+
+    def __init__(self, rules: Optional[List[SEORule]] = None, site_domain: Optional[str] = None):
+        self.rules = list(rules if rules is not None else RULES)
+        self.max_points = sum(r.max_points for r in self.rules) or 1
+        self.site_host = _host(site_domain if site_domain is not None else config.wordpress_domain)
+
+    def score(self, title: str, excerpt: str, content: str,
+              focus_keyword: Optional[str] = None) -> ScoreReport:
+        """Pontua um post (título, resumo e conteúdo em HTML)"""
+        title = strip_html(title)
+        keyword = (focus_keyword or extract_focus_keyword(title, content)).lower().strip()
+        inp = ScoringInput(
+            title=title,
+            excerpt=strip_html(excerpt),
+            content=parse_html(content),
+            keyword=keyword,
+            keyword_words=tuple(_WORD_RE.findall(keyword)),
+            site_host=self.site_host
+        )
+
+        results = []
+        total = 0.0
+        for seo_rule in self.rules:
+            fraction, message = seo_rule.check(inp)
+            points = round(seo_rule.max_points * fraction, 1)
+            total += points
+            results.append(RuleResult(seo_rule.name, points, seo_rule.max_points, message))
+
+        return ScoreReport(score=round(total * 100 / self.max_points), results=results)
+
+    def score_many(self, posts: Iterable[Dict]) -> List[ScoreReport]:
+        """
+        Pontua vários posts de uma vez. Cada item aceita 'title', 'excerpt'
+        e 'content' como string ou no formato da API do WordPress
+        ({'rendered': ...}), e opcionalmente 'focus_keyword'.
+        """
+        reports = []
+        for post in posts:
+            reports.append(self.score(
+                _rendered(post.get('title')),
+                _rendered(post.get('excerpt')),
+                _rendered(post.get('content')),
+                post.get('focus_keyword')
+            ))
+        return reports
+
+def _rendered(value) -> str:
+    if isinstance(value, dict):
+        return value.get('rendered', '')
+    return value or ''
+
+# Instância global do motor de pontuação (domínio lido da configuração)
+seo_scorer = LazySingleton(SEOScorer, scope=current_tenant)
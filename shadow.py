@@ -0,0 +1,73 @@
+import difflib
+import logging
+import re
+from typing import Dict, List
+
+from database import db
+from lazy import LazySingleton
+from seo_scoring import seo_scorer
+
+# Fim de bloco HTML: cada bloco vira uma linha do diff
+_BLOCK_END_RE = re.compile(r'(</(?:p|h[1-6]|li|ul|ol|blockquote|figure|div|table)>|<br\s*/?>)', re.I)
+
+# Campos comparados no diff, na ordem em que aparecem
+_DIFF_FIELDS = ('title', 'excerpt', 'content')
+
+def _html_lines(html: str) -> List[str]:
+    return [line.strip() for line in _BLOCK_END_RE.sub(r'\1\n', html or '').splitlines() if line.strip()]
+
+def content_diff(original: Dict[str, str], optimized: Dict[str, str]) -> str:
+    """Diff unificado de título, resumo e conteúdo (um bloco HTML por linha)"""
+    lines = []
+    for field in _DIFF_FIELDS:
+        lines.extend(difflib.unified_diff(
+            _html_lines(original.get(field, '')), _html_lines(optimized.get(field, '')),
+            f'original/{field}', f'otimizado/{field}', lineterm=''
+        ))
+    return '\n'.join(lines)
+
+class ShadowStore:
+    """
+    Destino do modo simulação (DRY_RUN): em vez de atualizar o WordPress,
+    guarda na tabela `shadow_results` (do banco de simulação) o texto
+    otimizado, o diff em relação ao original, a pontuação SEO antes e
+    depois e o tempo gasto no Gemini, para comparar prompts e medir a
+    etapa do LLM sem tocar no site.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def record(self, post_id: int, original: Dict[str, str], optimized: Dict,
+               focus_keyword: str, gemini_seconds: float) -> Dict:
+        """
+        Args:
+            original: Título, resumo e conteúdo originais (HTML)
+            optimized: Resultado do pipeline (com `seo_score`)
+        """
+        before = seo_scorer.score(original['title'], original['excerpt'], original['content'], focus_keyword)
+        result = {
+            'post_id': post_id,
+            'post_title': original['title'],
+            'optimized_title': optimized.get('title', ''),
+            'optimized_excerpt': optimized.get('excerpt', ''),
+            'optimized_content': optimized.get('content', ''),
+            'focus_keyword': focus_keyword,
+            'seo_score_before': before.score,
+            'seo_score_after': optimized.get('seo_score'),
+            'gemini_seconds': round(gemini_seconds, 3),
+            'diff': content_diff(original, optimized),
+        }
+        db.save_shadow_result(result)
+        self.logger.info(
+            f"Simulação: post {post_id} não foi gravado no WordPress "
+            f"(SEO {result['seo_score_before']} -> {result['seo_score_after']}, "
+            f"Gemini {gemini_seconds:.1f}s, {len(result['diff'].splitlines())} linhas de diff)"
+        )
+        return result
+
+    def summary(self) -> Dict:
+        return db.get_shadow_summary()
+
+# Instância global do destino do modo simulação
+shadow_store = LazySingleton(ShadowStore)
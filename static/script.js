@@ -6,6 +6,11 @@
 class SEODashboard {
     constructor() {
         this.refreshInterval = null;
+        this.eventSource = null;
+        this.reconnectTimeout = null;
+        this.logLimit = 50;
+        this.logsCursor = null;
+        this.pendingJobs = new Map();
         this.chart = null;
         this.init();
     }
@@ -19,8 +24,8 @@ class SEODashboard {
         // Initial data load
         this.loadAllData();
 
-        // Start auto-refresh
-        this.startAutoRefresh();
+        // Live updates via SSE, with polling as fallback
+        this.connectEvents();
     }
 
     bindEvents() {
@@ -39,6 +44,11 @@ class SEODashboard {
             this.runAutoProcessing();
         });
 
+        // Process specific post button
+        document.getElementById('processPostBtn').addEventListener('click', () => {
+            this.processSpecificPost();
+        });
+
         // Reset quota button
         document.getElementById('resetQuotaBtn').addEventListener('click', () => {
             this.resetQuota();
@@ -46,7 +56,8 @@ class SEODashboard {
 
         // Log limit selector
         document.getElementById('logLimit').addEventListener('change', (e) => {
-            this.loadLogs(parseInt(e.target.value));
+            this.logLimit = parseInt(e.target.value);
+            this.loadLogs(this.logLimit);
         });
     }
 
@@ -62,7 +73,7 @@ class SEODashboard {
                 this.loadSystemStatus(),
                 this.loadStatistics(),
                 this.loadConfiguration(),
-                this.loadLogs()
+                this.loadLogs(this.logLimit)
             ]);
 
             console.log('✅ Dados carregados com sucesso');
@@ -126,6 +137,7 @@ class SEODashboard {
 
             if (result.success) {
                 this.updateLogs(result.data);
+                this.updateLogsPager(result.pagination?.next_cursor);
             } else {
                 throw new Error(result.error);
             }
@@ -163,13 +175,26 @@ class SEODashboard {
             statusText.textContent = 'Atenção Necessária';
         }
 
+        // Circuit breakers: dependência com o circuito aberto é recusada sem ser chamada
+        const breakers = data.circuit_breakers || {};
+        const circuitOpen = (name) => breakers[name] && breakers[name].state !== 'closed';
+        const circuitText = (name) => `Indisponível (nova tentativa em ${breakers[name].retry_in_seconds}s)`;
+
         // WordPress status
-        wordpressStatus.textContent = data.wordpress_connected ? 'Conectado' : 'Desconectado';
+        if (circuitOpen('wordpress')) {
+            wordpressStatus.textContent = circuitText('wordpress');
+        } else {
+            wordpressStatus.textContent = data.wordpress_connected ? 'Conectado' : 'Desconectado';
+        }
         wordpressStatus.className = data.wordpress_connected ? 'card-text text-success' : 'card-text text-danger';
 
         // Gemini status
         const quotaInfo = data.gemini_quota || {};
-        if (quotaInfo.quota_exceeded) {
+        if (circuitOpen('gemini')) {
+            geminiStatus.textContent = circuitText('gemini');
+            geminiStatus.className = 'card-text text-danger';
+            geminiQuota.textContent = breakers.gemini.last_error || '';
+        } else if (quotaInfo.quota_exceeded) {
             geminiStatus.textContent = 'Quota Excedida';
             geminiStatus.className = 'card-text text-danger';
             geminiQuota.textContent = `Chave ${quotaInfo.current_key_index + 1}/${quotaInfo.total_keys}`;
@@ -179,9 +204,14 @@ class SEODashboard {
             geminiQuota.textContent = `${quotaInfo.requests_made || 0} requisições`;
         }
 
-        // TMDB status (sempre operacional se configurado)
-        tmdbStatus.textContent = 'Configurado';
-        tmdbStatus.className = 'card-text text-success';
+        // TMDB status (operacional se configurado e com o circuito fechado)
+        if (circuitOpen('tmdb')) {
+            tmdbStatus.textContent = circuitText('tmdb');
+            tmdbStatus.className = 'card-text text-warning';
+        } else {
+            tmdbStatus.textContent = 'Configurado';
+            tmdbStatus.className = 'card-text text-success';
+        }
 
         // Last update
         lastUpdate.textContent = new Date().toLocaleTimeString();
@@ -239,6 +269,50 @@ class SEODashboard {
         configContainer.innerHTML = configHtml;
     }
 
+    async loadMoreLogs() {
+        if (!this.logsCursor) return;
+
+        try {
+            const response = await fetch(`/api/logs?limit=${this.logLimit}&cursor=${this.logsCursor}`);
+            const result = await response.json();
+
+            if (result.success) {
+                const tbody = document.querySelector('#logsContainer tbody');
+                if (tbody) {
+                    tbody.insertAdjacentHTML('beforeend', result.data.map(log => this.renderLogRow(log)).join(''));
+                }
+                this.updateLogsPager(result.pagination?.next_cursor);
+            } else {
+                throw new Error(result.error);
+            }
+        } catch (error) {
+            console.error('Erro ao carregar mais logs:', error);
+        }
+    }
+
+    updateLogsPager(nextCursor) {
+        this.logsCursor = nextCursor || null;
+
+        const container = document.getElementById('logsContainer');
+        let pager = document.getElementById('logsLoadMore');
+        if (!this.logsCursor) {
+            if (pager) pager.remove();
+            return;
+        }
+
+        if (!pager) {
+            container.insertAdjacentHTML('beforeend', `
+                <div class="text-center mt-2">
+                    <button id="logsLoadMore" class="btn btn-sm btn-outline-secondary">
+                        <i class="fas fa-chevron-down me-1"></i>Carregar mais
+                    </button>
+                </div>
+            `);
+            pager = document.getElementById('logsLoadMore');
+            pager.addEventListener('click', () => this.loadMoreLogs());
+        }
+    }
+
     updateLogs(logs) {
         const container = document.getElementById('logsContainer');
 
@@ -287,7 +361,7 @@ class SEODashboard {
                           log.status === 'error' ? 'fa-times' : 'fa-exclamation';
 
         return `
-            <tr class="fade-in">
+            <tr class="fade-in" data-log-id="${log.id}">
                 <td>${timeString}</td>
                 <td>
                     <strong>ID ${log.post_id}</strong><br>
@@ -389,14 +463,13 @@ class SEODashboard {
         testBtn.disabled = true;
 
         try {
-            const response = await fetch('/api/run-test');
-            const result = await response.json();
+            const job = await this.submitJob('/api/run-test', { method: 'POST' });
 
-            if (result.success) {
+            if (job.status === 'success') {
                 this.showSuccess('Teste executado com sucesso!');
 
                 // Show test results
-                const data = result.data;
+                const data = job.result;
                 const message = `
                     Posts encontrados: ${data.posts_found}<br>
                     Posts processados: ${data.posts_processed}<br>
@@ -410,7 +483,7 @@ class SEODashboard {
                 // Refresh data after test
                 setTimeout(() => this.loadAllData(), 2000);
             } else {
-                throw new Error(result.error);
+                throw new Error(job.error);
             }
         } catch (error) {
             console.error('Erro no teste:', error);
@@ -455,14 +528,13 @@ class SEODashboard {
         autoBtn.disabled = true;
 
         try {
-            const response = await fetch('/api/auto-process');
-            const result = await response.json();
+            const job = await this.submitJob('/api/auto-process', { method: 'POST' });
 
-            if (result.success) {
+            if (job.status === 'success') {
                 this.showSuccess('Automação executada com sucesso!');
 
                 // Show automation results
-                const data = result.data;
+                const data = job.result;
                 const message = `
                     <strong>Automação João → Abel</strong><br>
                     Posts do João encontrados: ${data.posts_found}<br>
@@ -477,7 +549,7 @@ class SEODashboard {
                 // Refresh data after automation
                 setTimeout(() => this.loadAllData(), 2000);
             } else {
-                throw new Error(result.error);
+                throw new Error(job.error);
             }
         } catch (error) {
             console.error('Erro na automação:', error);
@@ -505,6 +577,155 @@ class SEODashboard {
         document.getElementById('lastPostId').textContent = '-';
     }
 
+    connectEvents() {
+        if (!window.EventSource) {
+            console.log('⚠️ EventSource não suportado, usando polling');
+            this.startAutoRefresh();
+            return;
+        }
+
+        this.eventSource = new EventSource('/api/events');
+
+        this.eventSource.addEventListener('open', () => {
+            console.log('⚡ Atualizações ao vivo conectadas');
+            this.stopAutoRefresh();
+        });
+
+        this.eventSource.addEventListener('error', () => {
+            // Enquanto o stream estiver fora, mantém o painel atualizado por polling
+            if (!this.refreshInterval) {
+                console.log('⚠️ Stream de eventos indisponível, voltando ao polling');
+                this.startAutoRefresh();
+            }
+
+            // Stream recusado (ex.: limite de conexões): tenta de novo mais tarde
+            if (this.eventSource.readyState === EventSource.CLOSED && !this.reconnectTimeout) {
+                this.reconnectTimeout = setTimeout(() => {
+                    this.reconnectTimeout = null;
+                    this.connectEvents();
+                }, 60000);
+            }
+        });
+
+        this.onEvent('status', (data) => this.updateSystemStatus(data));
+        this.onEvent('statistics', (data) => {
+            this.updateStatistics(data);
+            this.updateChart(data.daily_stats);
+        });
+        this.onEvent('config', (data) => this.updateConfiguration(data));
+        this.onEvent('log', (log) => this.prependLog(log));
+        this.onEvent('cycle_started', () => {
+            this.showToast('Ciclo de otimização iniciado', 'info');
+        });
+        this.onEvent('cycle_finished', (data) => {
+            this.showInfo('Ciclo concluído', `
+                Posts encontrados: ${data.posts_found}<br>
+                Sucessos: ${data.posts_success}<br>
+                Erros: ${data.posts_error}<br>
+                Tempo: ${data.processing_time?.toFixed(2)}s
+            `);
+        });
+        this.onEvent('post_progress', (data) => {
+            if (data.stage === 'success') {
+                this.showSuccess(`Post ${data.post_id} otimizado (Score: ${data.seo_score})`);
+            } else if (data.stage === 'error') {
+                this.showError(`Erro no post ${data.post_id}: ${data.error}`);
+            } else {
+                console.log(`📝 Post ${data.post_id}: ${data.stage}`);
+            }
+        });
+        this.onEvent('key_switched', (data) => {
+            this.showToast(`Chave Gemini alternada para ${data.to_key_index + 1}/${data.total_keys}`, 'info');
+        });
+        this.onEvent('job_updated', (job) => this.resolveJob(job));
+        this.onEvent('keys_exhausted', () => {
+            this.showError('Todas as chaves Gemini atingiram a quota');
+        });
+    }
+
+    async submitJob(url, options = {}) {
+        // Endpoints de ação respondem 202 com um job; aguarda sua conclusão
+        const response = await fetch(url, options);
+        const result = await response.json();
+
+        if (!result.success) {
+            throw new Error(result.error);
+        }
+
+        if (result.data.coalesced) {
+            this.showToast(`Já há um job ${result.data.kind} em andamento; aguardando o resultado dele`, 'info');
+        }
+
+        return this.waitForJob(result.data);
+    }
+
+    waitForJob(job) {
+        if (job.status === 'success' || job.status === 'error') {
+            return Promise.resolve(job);
+        }
+
+        return new Promise((resolve) => {
+            // Submissões agrupadas no mesmo job esperam todas pelo mesmo resultado
+            this.pendingJobs.set(job.id, [...(this.pendingJobs.get(job.id) || []), resolve]);
+
+            // Polling de segurança caso o stream de eventos esteja fora
+            const poll = async () => {
+                if (!this.pendingJobs.has(job.id)) return;
+                try {
+                    const response = await fetch(`/api/jobs/${job.id}`);
+                    const result = await response.json();
+                    if (result.success) {
+                        this.resolveJob(result.data);
+                    }
+                } catch (error) {
+                    console.error('Erro ao consultar job:', error);
+                }
+                if (this.pendingJobs.has(job.id)) {
+                    setTimeout(poll, this.eventSource?.readyState === EventSource.OPEN ? 15000 : 3000);
+                }
+            };
+            setTimeout(poll, 3000);
+        });
+    }
+
+    resolveJob(job) {
+        if (job.status !== 'success' && job.status !== 'error') return;
+
+        const resolvers = this.pendingJobs.get(job.id);
+        if (resolvers) {
+            this.pendingJobs.delete(job.id);
+            resolvers.forEach((resolve) => resolve(job));
+        }
+    }
+
+    onEvent(type, handler) {
+        this.eventSource.addEventListener(type, (event) => {
+            try {
+                handler(JSON.parse(event.data));
+            } catch (error) {
+                console.error(`Erro ao tratar evento ${type}:`, error);
+            }
+        });
+    }
+
+    prependLog(log) {
+        const tbody = document.querySelector('#logsContainer tbody');
+        if (!tbody) {
+            // Tabela ainda vazia: recarrega para montar a estrutura
+            this.loadLogs(this.logLimit);
+            return;
+        }
+
+        tbody.insertAdjacentHTML('afterbegin', this.renderLogRow(log));
+        if (tbody.rows.length > this.logLimit) {
+            while (tbody.rows.length > this.logLimit) {
+                tbody.deleteRow(-1);
+            }
+            // "Carregar mais" continua a partir da última linha visível
+            this.updateLogsPager(tbody.rows[tbody.rows.length - 1].dataset.logId);
+        }
+    }
+
     startAutoRefresh() {
         // Refresh every 30 seconds
         this.refreshInterval = setInterval(() => {
@@ -650,7 +871,7 @@ class SEODashboard {
         btn.innerHTML = '<i class="fas fa-spinner fa-spin me-1"></i>Processando...';
 
         try {
-            const response = await fetch('/api/process-post', {
+            const job = await this.submitJob('/api/process-post', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -658,10 +879,8 @@ class SEODashboard {
                 body: JSON.stringify({ url: postUrl })
             });
 
-            const data = await response.json();
-
-            if (data.success) {
-                const result = data.data;
+            if (job.status === 'success') {
+                const result = job.result;
                 if (result.success) {
                     this.showAlert(
                         `✅ Post processado com sucesso em ${result.processing_time.toFixed(2)}s!`, 
@@ -677,7 +896,7 @@ class SEODashboard {
                     this.showAlert(`❌ Erro: ${result.error}`, 'danger');
                 }
             } else {
-                this.showAlert(`❌ Erro: ${data.error}`, 'danger');
+                this.showAlert(`❌ Erro: ${job.error}`, 'danger');
             }
 
         } catch (error) {
@@ -690,11 +909,6 @@ class SEODashboard {
     }
 }
 
-// Initialize dashboard when DOM is loaded
-document.addEventListener('DOMContentLoaded', () => {
-    new SEODashboard();
-});
-
 // Handle page visibility changes
 document.addEventListener('visibilitychange', () => {
     if (document.hidden) {
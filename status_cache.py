@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
+
+from config import config
+from database import db
+from seo_optimizer import seo_optimizer
+from events import event_bus
+from priority import post_queue
+from lazy import LazySingleton
+
+@dataclass(frozen=True)
+class SnapshotSection:
+    """Uma seção do snapshot de status, com validadores para GET condicional"""
+
+    data: Any
+    etag: str
+    last_modified: datetime
+
+def _fingerprint(data: Any) -> str:
+    """Calcula um ETag estável para um payload JSON (ignora o carimbo de tempo)"""
+    if isinstance(data, dict):
+        data = {key: value for key, value in data.items() if key != 'timestamp'}
+    encoded = json.dumps(data, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
+
+def build_statistics() -> Dict:
+    """Monta o payload de estatísticas exibido pelo dashboard"""
+    stats = db.get_statistics()
+    quota_info = db.get_gemini_quota_info()
+
+    # Estatísticas por período
+    recent_logs = db.get_recent_logs(100)
+
+    # Agrupa logs por data
+    daily_stats = {}
+    for log in recent_logs:
+        date = log['created_at'][:10]  # YYYY-MM-DD
+        if date not in daily_stats:
+            daily_stats[date] = {'success': 0, 'error': 0}
+        daily_stats[date][log['status']] = daily_stats[date].get(log['status'], 0) + 1
+
+    return {
+        'general': stats,
+        'quota': quota_info,
+        'daily_stats': daily_stats,
+        'last_processed_post_id': db.get_last_processed_post_id(),
+        'leases': db.get_post_lease_summary(),
+        'queue': post_queue.summary(),
+        'shadow': db.get_shadow_summary() if config.dry_run else None,
+        'total_api_keys': len(config.gemini_api_keys)
+    }
+
+def build_config_info() -> Dict:
+    """Monta o payload de configuração (sem segredos) exibido pelo dashboard"""
+    settings = config.snapshot()
+    return {
+        'wordpress_url': settings.wordpress_url,
+        'wordpress_username': settings.wordpress_username,
+        'target_author_id': settings.target_author_id,  # Posts do João (ID 6)
+        'editor_author_id': settings.editor_author_id,  # Você editando (ID 9)
+        'movie_category_id': settings.movie_category_id,
+        'series_category_id': settings.series_category_id,
+        'max_posts_per_cycle': settings.max_posts_per_cycle,
+        'check_interval_minutes': settings.check_interval_minutes,
+        'gemini_keys_count': len(settings.gemini_api_keys),
+        'tmdb_configured': bool(settings.tmdb_api_key),
+        'tmdb_enrichment_enabled': settings.tmdb_enrichment_enabled,
+        'dry_run': settings.dry_run,
+        'tenants': [
+            {'name': profile.name, 'wordpress_url': profile.settings.wordpress_url, 'weight': profile.weight}
+            for profile in config.tenants()
+        ]
+    }
+
+class StatusAggregator:
+    """
+    Mantém em memória um snapshot único do status do sistema, atualizado por
+    uma thread em segundo plano. Os endpoints do dashboard apenas leem esse
+    snapshot, então N abas abertas custam o mesmo que uma.
+    """
+
+    # Eventos que tornam o snapshot desatualizado
+    REFRESH_TRIGGERS = ('cycle_finished', 'key_switched', 'keys_exhausted', 'circuit_changed', 'log')
+
+    # Intervalo mínimo entre atualizações, para agrupar rajadas de eventos
+    MIN_REFRESH_GAP_SECONDS = 2
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.refresh_seconds = config.status_refresh_seconds
+        self.builders: Dict[str, Callable[[], Any]] = {
+            'status': seo_optimizer.get_system_status,
+            'statistics': build_statistics,
+            'config': build_config_info,
+        }
+        self._sections: Dict[str, SnapshotSection] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        event_bus.add_listener(self._on_event)
+
+    def _on_event(self, event):
+        """Antecipa a atualização quando algo que afeta o status acontece"""
+        if event.type in self.REFRESH_TRIGGERS:
+            self.request_refresh()
+
+    def start(self):
+        """Inicia a thread de atualização (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='status-aggregator', daemon=True
+            )
+            self._thread.start()
+            self.logger.info(f"Agregador de status iniciado (a cada {self.refresh_seconds}s)")
+
+    def refresh(self):
+        """Recalcula todas as seções; seções inalteradas mantêm ETag e data"""
+        with self._refresh_lock:
+            for name, builder in self.builders.items():
+                try:
+                    data = builder()
+                except Exception as e:
+                    self.logger.error(f"Erro ao atualizar seção '{name}' do status: {e}")
+                    continue
+
+                etag = _fingerprint(data)
+                previous = self._sections.get(name)
+                if previous and previous.etag == etag:
+                    continue
+
+                self._sections[name] = SnapshotSection(
+                    data=data,
+                    etag=etag,
+                    last_modified=datetime.now(timezone.utc).replace(microsecond=0)
+                )
+                # Clientes SSE recebem a seção nova sem precisar consultar a API
+                event_bus.publish(name, data)
+
+    def request_refresh(self):
+        """Antecipa a próxima atualização (ex.: após uma ação no dashboard)"""
+        self._wakeup.set()
+
+    def get_section(self, name: str) -> SnapshotSection:
+        """
+        Retorna uma seção do snapshot. Na primeira chamada do processo a
+        atualização é feita de forma síncrona para não servir dados vazios.
+        """
+        section = self._sections.get(name)
+        if section is None:
+            self.refresh()
+            section = self._sections.get(name)
+        self.start()
+        if section is None:
+            raise RuntimeError(f"Seção de status '{name}' indisponível")
+        return section
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.refresh_seconds)
+            self._wakeup.clear()
+            self.refresh()
+            time.sleep(self.MIN_REFRESH_GAP_SECONDS)
+
+# Instância global do agregador (thread iniciada no primeiro acesso)
+status_aggregator = LazySingleton(StatusAggregator)
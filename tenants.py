@@ -0,0 +1,83 @@
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List
+
+from config import TenantProfile, config, use_tenant
+from database import db
+from lazy import LazySingleton
+
+class FairTenantScheduler:
+    """
+    Roda os ciclos de vários sites/autores (TENANTS_FILE) no mesmo
+    processo, dividindo as chaves Gemini compartilhadas:
+
+    - a cada rodada, cada tenant roda um ciclo próprio (configuração,
+      banco, cursor e clientes dele, via `use_tenant`);
+    - a ordem da rodada é pelo consumo do dia (requisições Gemini feitas
+      pelo tenant, contadas pelo cliente Gemini na tabela `tenant_usage` do
+      banco base, então valem entre processos e reinícios) dividido pelo
+      `weight`: quem consumiu menos da sua parte vai primeiro e pega a
+      quota antes que ela acabe;
+    - um tenant sem chave disponível (todas as dele esgotadas) fica para a
+      próxima rodada; se nenhuma chave tem quota, a rodada termina.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def order(self) -> List[TenantProfile]:
+        """Tenants na ordem da próxima rodada (menor consumo ponderado primeiro)"""
+        usage = self.usage()
+        return sorted(config.tenants(), key=lambda profile: usage.get(profile.name, 0) / profile.weight)
+
+    def usage(self) -> Dict[str, int]:
+        """Requisições Gemini consumidas hoje (dia da quota) por tenant"""
+        return db.get_tenant_usage()
+
+    def run_round(self) -> Dict:
+        """Roda um ciclo de cada tenant; retorna as estatísticas somadas (e as de cada um)"""
+        from seo_optimizer import seo_optimizer
+
+        round_start = time.time()
+        stats = {
+            'cycle_start': datetime.now().isoformat(),
+            'posts_found': 0,
+            'posts_processed': 0,
+            'posts_success': 0,
+            'posts_error': 0,
+            'processing_time': 0,
+            'errors': [],
+            'tenants': {},
+        }
+
+        for profile in self.order():
+            if db.get_best_available_key_index() is None:
+                self.logger.warning("Todas as chaves Gemini esgotadas, encerrando a rodada de tenants")
+                break
+
+            with use_tenant(profile.name):
+                if db.get_best_available_key_index(profile.settings.gemini_key_indexes) is None:
+                    self.logger.warning(f"Tenant {profile.name}: chaves Gemini esgotadas, fica para a próxima rodada")
+                    continue
+
+                self.logger.info(f"Tenant {profile.name}: iniciando ciclo ({profile.settings.wordpress_url})")
+                requests_before = self.usage().get(profile.name, 0)
+                result = seo_optimizer.run_optimization_cycle()
+                used = max(0, self.usage().get(profile.name, 0) - requests_before)
+                db.set_statistic('last_cycle_result', result)
+
+            self.logger.info(
+                f"Tenant {profile.name}: {result.get('posts_success', 0)} sucessos, "
+                f"{result.get('posts_error', 0)} erros, {used} requisições Gemini"
+            )
+            stats['tenants'][profile.name] = result
+            for key in ('posts_found', 'posts_processed', 'posts_success', 'posts_error'):
+                stats[key] += result.get(key, 0)
+            stats['errors'].extend(f"[{profile.name}] {error}" for error in result.get('errors', []))
+
+        stats['processing_time'] = time.time() - round_start
+        return stats
+
+# Instância global do escalonador de tenants
+tenant_scheduler = LazySingleton(FairTenantScheduler)
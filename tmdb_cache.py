@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from database import db
+from lazy import LazySingleton
+
+# TTL (em segundos) por endpoint: (resultado encontrado, resultado negativo).
+# Buscas mudam pouco; detalhes trazem votos/vídeos que envelhecem mais rápido.
+# Resultados negativos expiram antes para que lançamentos novos apareçam.
+ENDPOINT_TTLS: Dict[str, Tuple[int, int]] = {
+    'movie_search': (7 * 24 * 3600, 24 * 3600),
+    'tv_search': (7 * 24 * 3600, 24 * 3600),
+    'movie_details': (3 * 24 * 3600, 24 * 3600),
+    'tv_details': (3 * 24 * 3600, 24 * 3600),
+}
+
+# Marca de "não encontrado" guardada na camada em memória
+_NEGATIVE = object()
+
+class TMDBCache:
+    """
+    Cache de duas camadas para as consultas ao TMDB: um LRU em memória na
+    frente da tabela `tmdb_cache` do SQLite, que sobrevive a reinícios e é
+    compartilhada entre o processo principal e o dashboard.
+
+    Apenas respostas definitivas são guardadas: um resultado encontrado ou
+    um "não encontrado" (busca sem resultados / 404). Falhas de rede e
+    erros do servidor não são cacheados.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.logger = logging.getLogger(__name__)
+        self.max_entries = max_entries
+        self._memory: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        try:
+            removed = db.purge_expired_tmdb_cache()
+            if removed:
+                self.logger.info(f"Cache TMDB: {removed} entradas expiradas removidas")
+        except Exception as e:
+            self.logger.error(f"Erro ao limpar cache TMDB: {e}")
+
+    @staticmethod
+    def make_key(endpoint: str, *parts: Any) -> str:
+        """Monta a chave de cache normalizando os parâmetros da consulta"""
+        normalized = [' '.join(str(part).lower().split()) if part is not None else '' for part in parts]
+        return ':'.join([endpoint] + normalized)
+
+    def get(self, endpoint: str, key: str) -> Tuple[bool, Any]:
+        """
+        Procura uma entrada válida.
+
+        Returns:
+            (encontrado, valor). `valor` é None para resultados negativos.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, None if entry[1] is _NEGATIVE else entry[1]
+            if entry:
+                del self._memory[key]
+
+        try:
+            stored = db.get_tmdb_cache_entry(key)
+        except Exception as e:
+            self.logger.error(f"Erro ao ler cache TMDB ({endpoint}): {e}")
+            stored = None
+
+        if stored is None:
+            with self._lock:
+                self.misses += 1
+            return False, None
+
+        value = None if stored['is_negative'] else stored['value']
+        self._remember(key, stored['expires_at'], value)
+        with self._lock:
+            self.hits += 1
+        return True, value
+
+    def set(self, endpoint: str, key: str, value: Any):
+        """Guarda um resultado (ou None para "não encontrado") com o TTL do endpoint"""
+        positive_ttl, negative_ttl = ENDPOINT_TTLS[endpoint]
+        expires_at = time.time() + (positive_ttl if value is not None else negative_ttl)
+
+        self._remember(key, expires_at, value)
+        try:
+            db.set_tmdb_cache_entry(key, endpoint, value, expires_at)
+        except Exception as e:
+            self.logger.error(f"Erro ao gravar cache TMDB ({endpoint}): {e}")
+
+    def stats(self) -> Dict:
+        """Contadores de uso do cache neste processo"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory)
+            }
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        with self._lock:
+            self._memory[key] = (expires_at, _NEGATIVE if value is None else value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+# Instância global do cache do TMDB (construída no primeiro uso)
+tmdb_cache = LazySingleton(TMDBCache)
@@ -1,129 +1,211 @@
-import requests
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from difflib import SequenceMatcher
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import quote
 import re
-from config import config
+from breakers import TMDB, circuit_breakers
+from config import config, current_tenant
+from lazy import LazySingleton
+from tmdb_cache import TMDBCache, tmdb_cache
+from tmdb_index import normalize_title, title_index
+from tmdb_transport import TMDBTransport
+
+# Quantos resultados de cada busca são guardados para ranqueamento
+SEARCH_RESULTS_KEPT = 10
+
+# Semelhança mínima de título para aceitar um resultado da busca
+MIN_TITLE_SIMILARITY = 0.6
+
+# Buscas simultâneas por post (uma por consulta candidata)
+MAX_PARALLEL_SEARCHES = 5
+
+# Faixa de anos de lançamento aceitos (lançamentos anunciados vão até 2 anos à frente)
+MIN_RELEASE_YEAR = 1900
+MAX_YEARS_AHEAD = 2
+
+def valid_release_year(year: Optional[int]) -> Optional[int]:
+    """O ano, se for um ano de lançamento plausível; senão None (busca sem filtro de ano)"""
+    if year and MIN_RELEASE_YEAR <= year <= date.today().year + MAX_YEARS_AHEAD:
+        return year
+    return None
 
 class TMDBClient:
     """Cliente para integração com The Movie Database (TMDB)"""
     
     def __init__(self):
+        settings = config.snapshot()
         self.logger = logging.getLogger(__name__)
-        self.api_key = config.tmdb_api_key
-        self.base_url = config.tmdb_base_url
-        self.image_base_url = config.tmdb_image_url
-        self.session = requests.Session()
-        
-        # Headers para autenticação
-        if config.tmdb_read_token:
-            self.session.headers.update({
-                'Authorization': f'Bearer {config.tmdb_read_token}',
-                'Content-Type': 'application/json'
-            })
+        self.base_url = settings.tmdb_base_url
+        self.image_base_url = settings.tmdb_image_url
+        self.transport = TMDBTransport(
+            base_url=settings.tmdb_base_url,
+            api_key=settings.tmdb_api_key,
+            read_token=settings.tmdb_read_token,
+            rate_limit=settings.tmdb_rate_limit,
+            pool_size=settings.tmdb_pool_size,
+            timeout=settings.tmdb_timeout_seconds,
+            max_retries=settings.tmdb_max_retries,
+            breaker=circuit_breakers.get(TMDB)
+        )
+        self._search_pool = ThreadPoolExecutor(
+            max_workers=MAX_PARALLEL_SEARCHES, thread_name_prefix='tmdb-search'
+        )
     
     def search_movie(self, query: str, year: Optional[int] = None) -> Optional[Dict]:
-        """Busca filme no TMDB"""
-        try:
-            url = f"{self.base_url}/search/movie"
-            params = {
-                'api_key': self.api_key,
-                'query': query,
-                'language': 'pt-BR',
-                'include_adult': 'false'
-            }
-            
-            if year:
-                params['year'] = str(year)
-            
-            self.logger.info(f"Buscando filme: {query}")
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            results = data.get('results', [])
-            
-            if results:
-                movie = results[0]  # Pega o primeiro resultado
-                self.logger.info(f"Filme encontrado: {movie.get('title')}")
-                return movie
-            else:
-                self.logger.warning(f"Nenhum filme encontrado para: {query}")
-                return None
-                
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar filme {query}: {e}")
-            return None
+        """Busca filme no TMDB e retorna o resultado mais parecido com a consulta"""
+        self.logger.info(f"Buscando filme: {query}")
+        movie = self._best_match(query, year, self._search('movie', query, year), 'title')
+        if movie:
+            self.logger.info(f"Filme encontrado: {movie.get('title')}")
+        else:
+            self.logger.warning(f"Nenhum filme encontrado para: {query}")
+        return movie
     
     def search_tv_show(self, query: str, year: Optional[int] = None) -> Optional[Dict]:
-        """Busca série de TV no TMDB"""
+        """Busca série de TV no TMDB e retorna o resultado mais parecido com a consulta"""
+        self.logger.info(f"Buscando série: {query}")
+        tv_show = self._best_match(query, year, self._search('tv', query, year), 'name')
+        if tv_show:
+            self.logger.info(f"Série encontrada: {tv_show.get('name')}")
+        else:
+            self.logger.warning(f"Nenhuma série encontrada para: {query}")
+        return tv_show
+
+    def _search(self, media_type: str, query: str, year: Optional[int] = None) -> List[Dict]:
+        """
+        Executa /search/movie ou /search/tv (via cache) e retorna os primeiros
+        resultados. Em caso de erro retorna lista vazia, sem cachear.
+        """
+        endpoint = f"{media_type}_search"
+        # Ano inválido filtraria a busca até zerar o resultado (e o cache o guardaria)
+        year = valid_release_year(year)
+        cache_key = TMDBCache.make_key(endpoint, query, year)
+        found, cached = tmdb_cache.get(endpoint, cache_key)
+        if found:
+            return cached or []
+
         try:
-            url = f"{self.base_url}/search/tv"
             params = {
-                'api_key': self.api_key,
                 'query': query,
                 'language': 'pt-BR',
                 'include_adult': 'false'
             }
             
             if year:
-                params['first_air_date_year'] = str(year)
+                params['year' if media_type == 'movie' else 'first_air_date_year'] = str(year)
             
-            self.logger.info(f"Buscando série: {query}")
-            response = self.session.get(url, params=params)
+            response = self.transport.get(f"/search/{media_type}", params)
             response.raise_for_status()
             
-            data = response.json()
-            results = data.get('results', [])
-            
-            if results:
-                tv_show = results[0]  # Pega o primeiro resultado
-                self.logger.info(f"Série encontrada: {tv_show.get('name')}")
-                return tv_show
-            else:
-                self.logger.warning(f"Nenhuma série encontrada para: {query}")
-                return None
+            results = response.json().get('results', [])[:SEARCH_RESULTS_KEPT]
+            tmdb_cache.set(endpoint, cache_key, results or None)
+            return results
                 
         except Exception as e:
-            self.logger.error(f"Erro ao buscar série {query}: {e}")
+            label = 'filme' if media_type == 'movie' else 'série'
+            self.logger.error(f"Erro ao buscar {label} {query}: {e}")
+            return []
+
+    def get_stats(self) -> Dict:
+        """Contadores de requisições e de cache do TMDB neste processo"""
+        return {
+            'transport': self.transport.stats(),
+            'cache': tmdb_cache.stats()
+        }
+
+    def _learn_titles(self, media_type: str, details: Dict):
+        """Ensina ao índice local os títulos traduzidos/alternativos e o ano da mídia"""
+        if not title_index.available():
+            return
+
+        title_field = 'title' if media_type == 'movie' else 'name'
+        date_field = 'release_date' if media_type == 'movie' else 'first_air_date'
+        alternatives = details.get('alternative_titles', {})
+        titles = [details.get(title_field), details.get(f"original_{title_field}")]
+        titles += [alt.get('title') for alt in alternatives.get('titles', alternatives.get('results', []))]
+
+        release_year = (details.get(date_field) or '')[:4]
+        title_index.add_titles(
+            media_type, details['id'], titles,
+            year=int(release_year) if release_year.isdigit() else None,
+            popularity=details.get('popularity')
+        )
+
+    def _best_match(self, query: str, year: Optional[int], results: List[Dict],
+                    title_field: str) -> Optional[Dict]:
+        """
+        Ordena os resultados por semelhança de título (traduzido ou original)
+        e proximidade do ano, retornando o melhor se for aceitável.
+        """
+        target = normalize_title(query)
+        if not target or not results:
             return None
+
+        date_field = 'release_date' if title_field == 'title' else 'first_air_date'
+        original_field = f"original_{title_field}"
+
+        best, best_score = None, 0.0
+        for position, result in enumerate(results):
+            similarity = max(
+                SequenceMatcher(None, target, normalize_title(result.get(field) or '')).ratio()
+                for field in (title_field, original_field)
+            )
+            if similarity < MIN_TITLE_SIMILARITY:
+                continue
+
+            score = similarity
+            result_year = (result.get(date_field) or '')[:4]
+            if year and result_year.isdigit():
+                distance = abs(int(result_year) - year)
+                score += 0.2 if distance == 0 else 0.1 if distance == 1 else -0.1
+            # Desempate pela ordem de relevância do próprio TMDB
+            score -= position * 0.01
+
+            if score > best_score:
+                best, best_score = result, score
+
+        return best
     
     def get_movie_details(self, movie_id: int) -> Optional[Dict]:
         """Obtém detalhes completos de um filme"""
-        try:
-            url = f"{self.base_url}/movie/{movie_id}"
-            params = {
-                'api_key': self.api_key,
-                'language': 'pt-BR',
-                'append_to_response': 'videos,images'
-            }
-            
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            return response.json()
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao obter detalhes do filme {movie_id}: {e}")
-            return None
+        return self._get_details('movie', movie_id)
     
     def get_tv_details(self, tv_id: int) -> Optional[Dict]:
         """Obtém detalhes completos de uma série"""
+        return self._get_details('tv', tv_id)
+
+    def _get_details(self, media_type: str, media_id: int) -> Optional[Dict]:
+        """Busca detalhes (com vídeos e imagens) de um filme ou série, via cache"""
+        endpoint = f"{media_type}_details"
+        label = 'do filme' if media_type == 'movie' else 'da série'
+        cache_key = TMDBCache.make_key(endpoint, media_id)
+        found, cached = tmdb_cache.get(endpoint, cache_key)
+        if found:
+            return cached
+
         try:
-            url = f"{self.base_url}/tv/{tv_id}"
             params = {
-                'api_key': self.api_key,
                 'language': 'pt-BR',
-                'append_to_response': 'videos,images'
+                'append_to_response': 'videos,images,alternative_titles'
             }
             
-            response = self.session.get(url, params=params)
+            response = self.transport.get(f"/{media_type}/{media_id}", params)
+            if response.status_code == 404:
+                # ID inexistente/removido: resultado negativo definitivo
+                self.logger.warning(f"Detalhes {label} {media_id} não encontrados no TMDB")
+                tmdb_cache.set(endpoint, cache_key, None)
+                return None
             response.raise_for_status()
             
-            return response.json()
+            details = response.json()
+            tmdb_cache.set(endpoint, cache_key, details)
+            self._learn_titles(media_type, details)
+            return details
             
         except Exception as e:
-            self.logger.error(f"Erro ao obter detalhes da série {tv_id}: {e}")
+            self.logger.error(f"Erro ao obter detalhes {label} {media_id}: {e}")
             return None
     
     def extract_youtube_trailer(self, videos: List[Dict]) -> Optional[str]:
@@ -168,10 +250,8 @@ class TMDBClient:
         candidates.extend(title_words)
         
         # Busca por anos no conteúdo
-        years = re.findall(r'\b(19|20)\d{2}\b', content)
-        year = None
-        if years:
-            year = int(years[0])
+        years = [int(found) for found in re.findall(r'\b((?:19|20)\d{2})\b', content)]
+        year = next((found for found in years if valid_release_year(found)), None)
         
         # Retorna o candidato mais provável
         if candidates:
@@ -217,26 +297,64 @@ class TMDBClient:
         if len(title_words) >= 2:
             search_queries.append(" ".join(title_words[:3]))
         
-        # Tenta cada query até encontrar algo
+        # Remove consultas repetidas mantendo a ordem de prioridade
+        unique_queries = []
+        seen = set()
         for query in search_queries:
-            self.logger.info(f"Tentando busca com: '{query}'")
-            
+            normalized = normalize_title(query)
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                unique_queries.append(query)
+
+        # Primeiro o índice local: um título conhecido dispensa a busca na API
+        result = self._lookup_local(unique_queries, 'movie' if is_movie else 'tv', year)
+
+        if not result:
+            result = self._search_parallel(unique_queries, year, is_movie)
+
+        if result:
             if is_movie:
-                result = self.search_movie(query, year)
-                if result:
-                    details = self.get_movie_details(result['id'])
-                    if details:
-                        return self._format_movie_data(details)
+                details = self.get_movie_details(result['id'])
+                if details:
+                    return self._format_movie_data(details)
             else:
-                result = self.search_tv_show(query, year)
-                if result:
-                    details = self.get_tv_details(result['id'])
-                    if details:
-                        return self._format_tv_data(details)
+                details = self.get_tv_details(result['id'])
+                if details:
+                    return self._format_tv_data(details)
         
         self.logger.warning("Nenhuma mídia encontrada para o post")
         return None
     
+    def _lookup_local(self, queries: List[str], media_type: str,
+                      year: Optional[int]) -> Optional[Dict]:
+        """Resolve as consultas pelo índice local, na ordem de prioridade"""
+        if not title_index.available():
+            return None
+
+        for query in queries:
+            entries = title_index.lookup(query, media_type, year)
+            if entries:
+                self.logger.info(f"Mídia resolvida pelo índice local: '{query}' -> {entries[0].tmdb_id}")
+                return {'id': entries[0].tmdb_id}
+        return None
+
+    def _search_parallel(self, queries: List[str], year: Optional[int],
+                         is_movie: bool) -> Optional[Dict]:
+        """Dispara todas as buscas em paralelo; a primeira aceitável vence"""
+        search = self.search_movie if is_movie else self.search_tv_show
+        futures = {self._search_pool.submit(search, query, year): query for query in queries}
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                if result:
+                    self.logger.info(f"Mídia encontrada com a busca '{futures[future]}'")
+                    return result
+        finally:
+            # Buscas ainda na fila são canceladas; as em andamento só alimentam o cache
+            for future in futures:
+                future.cancel()
+        return None
+    
     def _format_movie_data(self, movie_details: Dict) -> Dict:
         """Formata dados do filme para uso no sistema"""
         videos = movie_details.get('videos', {}).get('results', [])
@@ -288,14 +406,21 @@ class TMDBClient:
         Returns:
             Dict com dados da mídia ou None
         """
+        settings = config.snapshot()
         categories = post_data.get('categories', [])
-        is_movie = any(cat.get('id') == config.movie_category_id for cat in categories)
-        is_series = any(cat.get('id') == config.series_category_id for cat in categories)
+        is_movie = any(cat.get('id') == settings.movie_category_id for cat in categories)
+        is_series = any(cat.get('id') == settings.series_category_id for cat in categories)
         
         if not (is_movie or is_series):
             self.logger.info("Post não é de filme nem série, pulando busca TMDB")
             return None
-        
+
+        # TMDB fora do ar: o enriquecimento é opcional, o post segue sem ele
+        breaker = circuit_breakers.get(TMDB)
+        if not breaker.available():
+            self.logger.info(f"Pulando busca TMDB: {breaker.open_error()}")
+            return None
+
         tags = [tag.get('name', '') for tag in post_data.get('tags', [])]
         
         return self.search_media_from_post(
@@ -305,5 +430,5 @@ class TMDBClient:
             is_movie=is_movie
         )
 
-# Instância global do cliente TMDB
-tmdb_client = TMDBClient()
+# Instância global do cliente TMDB, uma por tenant (construída no primeiro uso)
+tmdb_client = LazySingleton(TMDBClient, scope=current_tenant)
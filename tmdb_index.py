@@ -0,0 +1,268 @@
+import gzip
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from config import config
+from lazy import LazySingleton
+
+# Arquivos diários de IDs publicados pelo TMDB (um JSON por linha, gzip)
+EXPORT_URL = "https://files.tmdb.org/p/exports/{kind}_ids_{day:%m_%d_%Y}.json.gz"
+
+# Tipo de mídia -> (nome do arquivo de exportação, campo do título original)
+EXPORT_KINDS = {
+    'movie': ('movie', 'original_title'),
+    'tv': ('tv_series', 'original_name'),
+}
+
+# Títulos com popularidade abaixo disso são ignorados (milhares de entradas
+# sem relevância que só aumentariam o índice)
+DEFAULT_MIN_POPULARITY = 1.0
+
+# Linhas gravadas por transação durante a construção
+BUILD_BATCH_SIZE = 5000
+
+def normalize_title(title: str) -> str:
+    """Normaliza um título para comparação: minúsculas, sem acentos e pontuação"""
+    decomposed = unicodedata.normalize('NFKD', title.lower())
+    ascii_title = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', ascii_title).split())
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """Um título do índice local apontando para um ID do TMDB"""
+
+    media_type: str
+    tmdb_id: int
+    title: str
+    year: Optional[int]
+    popularity: float
+
+class TMDBTitleIndex:
+    """
+    Índice local de títulos do TMDB, construído a partir das exportações
+    diárias de IDs e consultado sem chamadas à API.
+
+    Fica em um arquivo SQLite próprio (TMDB_INDEX_PATH) com uma tabela
+    WITHOUT ROWID ordenada pelo título normalizado: a busca é uma descida
+    na árvore B do arquivo, sem carregar o índice na memória. As
+    exportações trazem só o título original; títulos traduzidos,
+    alternativos e anos são acrescentados à medida que os detalhes são
+    obtidos da API.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.path = path or config.tmdb_index_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+    def available(self) -> bool:
+        """True se o arquivo do índice já foi construído"""
+        return os.path.exists(self.path)
+
+    def lookup(self, title: str, media_type: str, year: Optional[int] = None,
+               limit: int = 5) -> List[IndexEntry]:
+        """
+        Procura um título normalizado exato. Entradas com o ano informado
+        vêm primeiro, depois as mais populares.
+        """
+        normalized = normalize_title(title)
+        if not normalized or not self.available():
+            return []
+
+        try:
+            rows = self._reader().execute('''
+                SELECT media_type, tmdb_id, title, year, popularity FROM titles
+                WHERE normalized = ? AND media_type = ?
+            ''', (normalized, media_type)).fetchall()
+        except sqlite3.Error as e:
+            self.logger.error(f"Erro ao consultar índice TMDB: {e}")
+            return []
+
+        # Um mesmo ID pode aparecer por mais de um título equivalente
+        entries: Dict[int, IndexEntry] = {}
+        for row in rows:
+            entry = IndexEntry(*row)
+            if entry.tmdb_id not in entries or (entry.year and not entries[entry.tmdb_id].year):
+                entries[entry.tmdb_id] = entry
+
+        return sorted(
+            entries.values(),
+            key=lambda entry: (not (year and entry.year and abs(entry.year - year) <= 1),
+                               -entry.popularity)
+        )[:limit]
+
+    def add_titles(self, media_type: str, tmdb_id: int, titles: Iterable[str],
+                   year: Optional[int] = None, popularity: Optional[float] = None):
+        """Acrescenta títulos (traduzidos/alternativos) e o ano de uma mídia já conhecida"""
+        if not self.available():
+            return
+
+        rows = []
+        seen = set()
+        for title in titles:
+            normalized = normalize_title(title or '')
+            if normalized and normalized not in seen:
+                seen.add(normalized)
+                rows.append((normalized, media_type, tmdb_id, title, year, popularity or 0.0))
+        if not rows:
+            return
+
+        with self._write_lock:
+            conn = self._connect(self.path)
+            try:
+                conn.executemany('''
+                    INSERT INTO titles (normalized, media_type, tmdb_id, title, year, popularity)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (normalized, media_type, tmdb_id) DO UPDATE SET
+                        year = COALESCE(excluded.year, titles.year),
+                        popularity = MAX(excluded.popularity, titles.popularity)
+                ''', rows)
+                # O ano vale para todos os títulos da mídia, inclusive o da exportação
+                if year:
+                    conn.execute(
+                        'UPDATE titles SET year = ? WHERE media_type = ? AND tmdb_id = ? AND year IS NULL',
+                        (year, media_type, tmdb_id)
+                    )
+                conn.commit()
+            except sqlite3.Error as e:
+                self.logger.error(f"Erro ao atualizar índice TMDB: {e}")
+            finally:
+                conn.close()
+
+    def build(self, day: Optional[date] = None,
+              min_popularity: float = DEFAULT_MIN_POPULARITY) -> Dict[str, int]:
+        """
+        Baixa as exportações de filmes e séries e reconstrói o índice em um
+        arquivo temporário, que substitui o atual atomicamente ao final.
+        Títulos alternativos e anos já aprendidos são preservados.
+
+        Args:
+            day: Data da exportação (padrão: ontem, sempre disponível).
+            min_popularity: Popularidade mínima para incluir um título.
+
+        Returns:
+            Dict com o número de títulos indexados por tipo de mídia.
+        """
+        import requests
+
+        day = day or date.today() - timedelta(days=1)
+        tmp_path = f"{self.path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        counts = {}
+        conn = self._connect(tmp_path)
+        try:
+            conn.execute('''
+                CREATE TABLE titles (
+                    normalized TEXT NOT NULL,
+                    media_type TEXT NOT NULL,
+                    tmdb_id INTEGER NOT NULL,
+                    title TEXT,
+                    year INTEGER,
+                    popularity REAL,
+                    PRIMARY KEY (normalized, media_type, tmdb_id)
+                ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+
+            for media_type, (kind, title_field) in EXPORT_KINDS.items():
+                url = EXPORT_URL.format(kind=kind, day=day)
+                self.logger.info(f"Baixando exportação TMDB: {url}")
+                start = time.time()
+                with requests.get(url, stream=True, timeout=(10, 120)) as response:
+                    response.raise_for_status()
+                    lines = gzip.GzipFile(fileobj=response.raw)
+                    counts[media_type] = self._load_export(
+                        conn, media_type, title_field, lines, min_popularity
+                    )
+                self.logger.info(
+                    f"{counts[media_type]} títulos de '{media_type}' indexados em {time.time() - start:.1f}s"
+                )
+
+            self._merge_learned_titles(conn)
+            conn.execute("INSERT INTO meta VALUES ('export_date', ?)", (day.isoformat(),))
+            conn.commit()
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+
+        with self._write_lock:
+            os.replace(tmp_path, self.path)
+            # Conexões de leitura abertas apontam para o arquivo antigo
+            self._local = threading.local()
+        return counts
+
+    def _load_export(self, conn: sqlite3.Connection, media_type: str, title_field: str,
+                     lines: Iterable[bytes], min_popularity: float) -> int:
+        count = 0
+        batch = []
+        for line in lines:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item.get('adult') or (item.get('popularity') or 0) < min_popularity:
+                continue
+
+            title = item.get(title_field) or ''
+            normalized = normalize_title(title)
+            if not normalized:
+                continue
+
+            batch.append((normalized, media_type, item['id'], title, None, item.get('popularity') or 0.0))
+            if len(batch) >= BUILD_BATCH_SIZE:
+                count += self._insert_batch(conn, batch)
+                batch = []
+
+        if batch:
+            count += self._insert_batch(conn, batch)
+        return count
+
+    def _insert_batch(self, conn: sqlite3.Connection, batch: List[tuple]) -> int:
+        conn.executemany('INSERT OR IGNORE INTO titles VALUES (?, ?, ?, ?, ?, ?)', batch)
+        conn.commit()
+        return len(batch)
+
+    def _merge_learned_titles(self, conn: sqlite3.Connection):
+        """Copia para o índice novo os títulos e anos aprendidos via API"""
+        if not self.available():
+            return
+        conn.execute('ATTACH DATABASE ? AS previous', (self.path,))
+        try:
+            conn.execute('''
+                INSERT INTO titles
+                SELECT normalized, media_type, tmdb_id, title, year, popularity
+                FROM previous.titles WHERE year IS NOT NULL
+                ON CONFLICT (normalized, media_type, tmdb_id) DO UPDATE SET year = excluded.year
+            ''')
+            conn.commit()
+        except sqlite3.Error as e:
+            self.logger.warning(f"Títulos aprendidos do índice anterior não foram copiados: {e}")
+        finally:
+            conn.execute('DETACH DATABASE previous')
+
+    def _reader(self) -> sqlite3.Connection:
+        # Uma conexão somente leitura por thread (as buscas rodam em paralelo)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        return sqlite3.connect(path, timeout=30)
+
+# Instância global do índice local de títulos (aberto no primeiro uso)
+title_index = LazySingleton(TMDBTitleIndex)
@@ -0,0 +1,184 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+# Respostas que valem nova tentativa
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Espera máxima aceita de um Retry-After antes de desistir da requisição
+MAX_RETRY_AFTER_SECONDS = 60
+
+class RateLimiter:
+    """
+    Token bucket compartilhado entre threads: no máximo `rate` requisições
+    por segundo, com rajadas de até `burst`. Um 429 pausa o bucket inteiro
+    até o fim do Retry-After, para que as outras threads não insistam.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Bloqueia até haver um token disponível e retorna o tempo esperado"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Suspende a emissão de tokens (ex.: após um 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+class TMDBTransport:
+    """
+    Camada HTTP do cliente TMDB: sessão com pool de conexões dimensionado,
+    timeouts, limite de taxa no cliente e novas tentativas em 429/5xx
+    respeitando Retry-After. Mantém contadores para monitoramento. Com
+    `breaker`, cada requisição passa pelo circuit breaker e um circuito
+    aberto interrompe as novas tentativas na hora.
+    """
+
+    def __init__(self, base_url: str, api_key: str, read_token: str,
+                 rate_limit: float, pool_size: int, timeout: float, max_retries: int,
+                 breaker=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from breakers import guarded_adapter
+
+        self.logger = logging.getLogger(__name__)
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = RateLimiter(rate_limit, burst=pool_size)
+        self._requests = requests
+
+        self.session = requests.Session()
+        # pool_block limita as conexões simultâneas ao tamanho do pool
+        pool_options = {'pool_connections': 1, 'pool_maxsize': pool_size, 'pool_block': True}
+        if breaker:
+            adapter = guarded_adapter(breaker, **pool_options)
+        else:
+            adapter = HTTPAdapter(**pool_options)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Autenticação: token de leitura (Bearer) ou, na falta dele, api_key
+        self._auth_params: Dict[str, str] = {}
+        if read_token:
+            self.session.headers['Authorization'] = f'Bearer {read_token}'
+        else:
+            self._auth_params['api_key'] = api_key
+        self.session.headers['Accept'] = 'application/json'
+
+        self._counters = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'server_errors': 0,
+            'network_errors': 0,
+            'rate_limit_wait_seconds': 0.0,
+        }
+        self._counters_lock = threading.Lock()
+
+    def get(self, path: str, params: Optional[Dict] = None):
+        """
+        Faz um GET em `base_url + path`. Retorna a última resposta obtida
+        (o chamador decide sobre 404 e raise_for_status); erros de rede
+        são propagados após esgotar as tentativas.
+        """
+        url = f"{self.base_url}{path}"
+        params = {**self._auth_params, **(params or {})}
+
+        for attempt in range(self.max_retries + 1):
+            waited = self.limiter.acquire()
+            self._count('rate_limit_wait_seconds', waited)
+            self._count('requests')
+
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+            except (self._requests.ConnectionError, self._requests.Timeout) as e:
+                self._count('network_errors')
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                self.logger.warning(f"Falha de rede no TMDB ({e}); nova tentativa em {delay:.1f}s")
+                self._retry_sleep(delay)
+                continue
+
+            if response.status_code not in RETRY_STATUSES:
+                return response
+
+            if response.status_code == 429:
+                self._count('throttled')
+            else:
+                self._count('server_errors')
+
+            retry_after = self._retry_after(response)
+            if attempt >= self.max_retries or (retry_after or 0) > MAX_RETRY_AFTER_SECONDS:
+                return response
+
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            if response.status_code == 429:
+                self.limiter.pause(delay)
+            self.logger.warning(
+                f"TMDB respondeu {response.status_code} em {path}; nova tentativa em {delay:.1f}s"
+            )
+            response.close()
+            self._retry_sleep(delay)
+
+        return response
+
+    def stats(self) -> Dict:
+        """Contadores acumulados desde a criação do transporte"""
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats['rate_limit_wait_seconds'] = round(stats['rate_limit_wait_seconds'], 2)
+        return stats
+
+    def _retry_sleep(self, delay: float):
+        self._count('retries')
+        time.sleep(delay)
+
+    def _count(self, name: str, amount: float = 1):
+        with self._counters_lock:
+            self._counters[name] += amount
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # Backoff exponencial com jitter: ~0.5s, 1s, 2s...
+        return 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+
+    @staticmethod
+    def _retry_after(response) -> Optional[float]:
+        """Interpreta Retry-After em segundos ou como data HTTP"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
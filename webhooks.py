@@ -0,0 +1,105 @@
+import hashlib
+import hmac
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from config import config
+from lazy import LazySingleton
+
+# Diferença máxima entre o horário da assinatura e o do servidor (anti-replay)
+SIGNATURE_TOLERANCE_SECONDS = 300
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Assinatura esperada: HMAC-SHA256 de `<timestamp>.<corpo>` em hexadecimal"""
+    message = timestamp.encode('utf-8') + b'.' + body
+    return hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+def verify_signature(secret: str, timestamp: Optional[str], signature: Optional[str],
+                     body: bytes, now: Optional[float] = None) -> bool:
+    """
+    Confere a assinatura de um webhook (cabeçalhos X-Webhook-Timestamp e
+    X-Webhook-Signature, este como `sha256=<hex>` ou só o hex).
+    """
+    if not secret or not timestamp or not signature:
+        return False
+    try:
+        sent_at = float(timestamp)
+    except ValueError:
+        return False
+    if abs((now if now is not None else time.time()) - sent_at) > SIGNATURE_TOLERANCE_SECONDS:
+        return False
+
+    if signature.startswith('sha256='):
+        signature = signature[len('sha256='):]
+    return hmac.compare_digest(sign_payload(secret, timestamp, body), signature.strip().lower())
+
+class WebhookDispatcher:
+    """
+    Recebe IDs de posts avisados pelo WordPress e os entrega ao pipeline
+    com debounce: cada novo aviso do mesmo post adia o processamento para
+    WEBHOOK_DEBOUNCE_SECONDS depois do último, agrupando os vários saves
+    de uma publicação. Um post pendente nunca aparece duas vezes na fila.
+    """
+
+    def __init__(self, handler: Optional[Callable[[int], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.handler = handler or _submit_post_job
+        self._pending: Dict[int, float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, post_id: int) -> float:
+        """Agenda (ou reagenda) um post e retorna em quantos segundos ele será processado"""
+        delay = config.webhook_debounce_seconds
+        with self._condition:
+            rescheduled = post_id in self._pending
+            self._pending[post_id] = time.monotonic() + delay
+            self._ensure_thread()
+            self._condition.notify()
+
+        state = 'reagendado' if rescheduled else 'agendado'
+        self.logger.info(f"Webhook: post {post_id} {state} para daqui a {delay}s")
+        return delay
+
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def _ensure_thread(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name='webhook-dispatcher', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # Dorme até o próximo vencimento (ou até chegar um aviso novo)
+                while True:
+                    now = time.monotonic()
+                    due = [post_id for post_id, due_at in self._pending.items() if due_at <= now]
+                    if due:
+                        break
+                    timeout = min(self._pending.values()) - now if self._pending else None
+                    self._condition.wait(timeout)
+                for post_id in due:
+                    del self._pending[post_id]
+
+            for post_id in due:
+                try:
+                    self.handler(post_id)
+                except Exception as e:
+                    self.logger.error(f"Erro ao enfileirar post {post_id} do webhook: {e}")
+
+def _submit_post_job(post_id: int):
+    """Entrega o post ao executor de jobs (que deduplica pela chave do post)"""
+    from jobs import job_runner
+    from seo_optimizer import seo_optimizer
+
+    job_runner.submit('webhook_post', f"post_id:{post_id}",
+                      lambda: seo_optimizer.process_post_by_id(post_id))
+
+# Instância global do despachante de webhooks (thread iniciada no primeiro aviso)
+webhook_dispatcher = LazySingleton(WebhookDispatcher)
@@ -1,19 +1,37 @@
-import requests
 import logging
-from typing import Dict, List, Optional
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
 import base64
 from datetime import datetime
-from config import config
+from breakers import circuit_breakers, guarded_adapter
+from config import config, current_tenant
+from content_analysis import extract_focus_keyword, truncate_text
+from lazy import LazySingleton
+
+# Último segmento do caminho de uma URL de post (o slug)
+_SLUG_RE = re.compile(r'/([^/]+)/?$')
+
+# Campos necessários para pontuar um post na auditoria do acervo
+AUDIT_POST_FIELDS = 'id,link,modified,categories,title,excerpt,content'
+
+# Campos de tags/categorias guardados no catálogo local de termos
+TERM_FIELDS = 'id,name,slug,link,count'
 
 class WordPressClient:
     """Cliente para integração com WordPress REST API"""
     
     def __init__(self):
+        import requests
+
         self.logger = logging.getLogger(__name__)
         self.base_url = config.wordpress_url.rstrip('/')
         self.username = config.wordpress_username
         self.password = config.wordpress_password
         self.session = requests.Session()
+        # Timeout padrão e circuit breaker em todas as requisições (WordPress fora do ar falha na hora)
+        adapter = guarded_adapter(circuit_breakers.wordpress(), timeout=config.wordpress_timeout_seconds)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
         # Configura autenticação básica
         credentials = f"{self.username}:{self.password}"
@@ -74,42 +92,136 @@ class WordPressClient:
             self.logger.error(f"Erro ao buscar posts: {e}")
             return []
     
-    def get_new_posts_since_id(self, author_id: int, last_post_id: int, 
-                              per_page: int = 10) -> List[Dict]:
+    def iter_published_posts(self, per_page: int = 100,
+                             fields: str = AUDIT_POST_FIELDS) -> Iterator[List[Dict]]:
         """
-        Busca posts novos desde um ID específico
-        
-        Args:  
-            author_id: ID do autor
-            last_post_id: ID do último post processado
-            per_page: Limite de posts
+        Percorre todos os posts publicados, uma página por vez, do mais novo
+        para o mais antigo. Apenas uma página fica em memória.
+
+        Args:
+            per_page: Posts por página (máximo 100 na API do WordPress)
+            fields: Campos pedidos à API (`_fields`), para reduzir o payload
         """
-        try:
-            url = f"{self.base_url}/wp-json/wp/v2/posts"
+        import requests
+
+        url = f"{self.base_url}/wp-json/wp/v2/posts"
+        page = 1
+        total_pages = None
+        while total_pages is None or page <= total_pages:
             params = {
-                'author': author_id,
                 'per_page': per_page,
+                'page': page,
                 'status': 'publish',
                 'orderby': 'id',
                 'order': 'desc',
-                '_embed': 1
+                '_fields': fields
             }
+            try:
+                response = self.session.get(url, params=params, timeout=60)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                self.logger.error(f"Erro ao buscar página {page} de posts: {e}")
+                raise
 
-            self.logger.info(f"Buscando posts novos desde ID {last_post_id}")
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-
+            total_pages = int(response.headers.get('X-WP-TotalPages', page))
             posts = response.json()
+            if not posts:
+                return
+            self.logger.info(f"Página {page}/{total_pages}: {len(posts)} posts")
+            yield posts
+            page += 1
 
-            # Filtra posts com ID maior que o último processado
-            new_posts = [post for post in posts if post['id'] > last_post_id]
+    def iter_terms(self, taxonomy: str, per_page: int = 100) -> Iterator[List[Dict]]:
+        """
+        Percorre os termos de uma taxonomia (`tags` ou `categories`), uma
+        página por vez, do ID mais alto para o mais baixo.
 
-            self.logger.info(f"Encontrados {len(new_posts)} posts novos")
-            return new_posts
+        Args:
+            taxonomy: Rota da taxonomia na API (`tags`, `categories`)
+            per_page: Termos por página (máximo 100 na API do WordPress)
+        """
+        import requests
+
+        url = f"{self.base_url}/wp-json/wp/v2/{taxonomy}"
+        page = 1
+        total_pages = None
+        while total_pages is None or page <= total_pages:
+            params = {
+                'per_page': per_page,
+                'page': page,
+                'orderby': 'id',
+                'order': 'desc',
+                '_fields': TERM_FIELDS
+            }
+            try:
+                response = self.session.get(url, params=params, timeout=60)
+                response.raise_for_status()
+            except requests.RequestException as e:
+                self.logger.error(f"Erro ao buscar página {page} de {taxonomy}: {e}")
+                raise
+
+            total_pages = int(response.headers.get('X-WP-TotalPages', page))
+            terms = response.json()
+            if not terms:
+                return
+            yield terms
+            page += 1
+
+    def get_new_posts_since_id(self, author_id: int, last_post_id: int,
+                              per_page: int = 10, max_pages: Optional[int] = None) -> Tuple[List[Dict], bool]:
+        """
+        Busca posts novos desde um ID específico
+        
+        Args:  
+            author_id: ID do autor
+            last_post_id: ID do último post processado
+            per_page: Limite de posts por página
+            max_pages: Páginas a percorrer (do mais novo para o mais antigo);
+                       None percorre até alcançar o último post processado
+
+        Returns:
+            Os posts novos e se a busca alcançou o último post processado.
+            False (limite de páginas ou erro no meio do caminho) quer dizer
+            que há posts novos mais antigos que os retornados.
+        """
+        url = f"{self.base_url}/wp-json/wp/v2/posts"
+        self.logger.info(f"Buscando posts novos desde ID {last_post_id}")
+
+        new_posts = []
+        page = 1
+        try:
+            while True:
+                params = {
+                    'author': author_id,
+                    'per_page': per_page,
+                    'page': page,
+                    'status': 'publish',
+                    'orderby': 'id',
+                    'order': 'desc',
+                    '_embed': 1
+                }
+                response = self.session.get(url, params=params)
+                response.raise_for_status()
+                posts = response.json()
+
+                # Filtra posts com ID maior que o último processado
+                new_posts.extend(post for post in posts if post['id'] > last_post_id)
+
+                total_pages = int(response.headers.get('X-WP-TotalPages', 0))
+                if (not posts or posts[-1]['id'] <= last_post_id or len(posts) < per_page
+                        or (total_pages and page >= total_pages)):
+                    break
+                if max_pages and page >= max_pages:
+                    self.logger.warning(f"Limite de {max_pages} páginas atingido antes do post {last_post_id}")
+                    return new_posts, False
+                page += 1
 
         except Exception as e:
-            self.logger.error(f"Erro ao buscar posts novos: {e}")
-            return []
+            self.logger.error(f"Erro ao buscar posts novos (página {page}): {e}")
+            return new_posts, False
+
+        self.logger.info(f"Encontrados {len(new_posts)} posts novos em {page} página(s)")
+        return new_posts, True
 
     def get_post_categories(self, post_id: int) -> List[Dict]:
         """Obtém categorias de um post"""
@@ -298,57 +410,11 @@ class WordPressClient:
         Returns:
             Excerpt truncado de forma inteligente
         """
-        import re
-        
-        # Remove tags HTML do excerpt
-        clean_excerpt = re.sub(r'<[^>]+>', '', excerpt).strip()
-        
-        # Se já está dentro do limite, retorna como está
-        if len(clean_excerpt) <= max_length:
-            return clean_excerpt
-        
-        # Trunca no limite máximo
-        truncated = clean_excerpt[:max_length]
-        
-        # Tenta cortar no final de uma frase (. ! ?)
-        sentence_match = re.search(r'^(.+[.!?])\s*', truncated)
-        if sentence_match and len(sentence_match.group(1)) >= max_length * 0.6:
-            return sentence_match.group(1).strip()
-        
-        # Se não encontrou fim de frase, tenta cortar no final de uma palavra
-        # Procura o último espaço antes do limite
-        last_space = truncated.rfind(' ')
-        if last_space > max_length * 0.7:  # Pelo menos 70% do limite
-            truncated = truncated[:last_space]
-        
-        # Remove pontuação final incompleta se houver
-        truncated = re.sub(r'[,;:]$', '', truncated.strip())
-        
-        # Adiciona reticências se foi truncado
-        if len(clean_excerpt) > max_length:
-            truncated += '...'
-        
-        return truncated.strip()
+        return truncate_text(excerpt, max_length)
 
     def _extract_focus_keyword(self, title: str, content: str) -> str:
         """Extrai palavra-chave foco do título e conteúdo"""
-        import re
-        
-        # Remove tags HTML do conteúdo
-        clean_content = re.sub(r'<[^>]+>', '', content)
-        
-        # Busca por termos em negrito no conteúdo
-        bold_terms = re.findall(r'<b>([^<]+)</b>', content)
-        if bold_terms:
-            # Pega o primeiro termo em negrito
-            return bold_terms[0].strip()
-        
-        # Se não encontrou, usa as primeiras palavras do título
-        title_words = title.split()
-        if len(title_words) >= 2:
-            return ' '.join(title_words[:2])
-        
-        return title_words[0] if title_words else 'cultura pop'
+        return extract_focus_keyword(title, content)
     
     def get_post_full_data(self, post_id: int) -> Optional[Dict]:
         """
@@ -402,10 +468,8 @@ class WordPressClient:
             categories = embedded_terms[0] if len(embedded_terms) > 0 else []
 
             # Verifica se tem categoria de filme ou série
-            movie_category = any(cat.get('id') == config.movie_category_id for cat in categories)
-            series_category = any(cat.get('id') == config.series_category_id for cat in categories)
-            
-            return movie_category or series_category
+            optimizable_ids = config.snapshot().optimizable_category_ids
+            return any(cat.get('id') in optimizable_ids for cat in categories)
         except Exception as e:
             self.logger.error(f"Erro ao verificar otimizabilidade do post {post_data.get('id', 'N/A')}: {e}")
             return False
@@ -422,8 +486,7 @@ class WordPressClient:
         """
         try:
             # Extrai o slug do post da URL
-            import re
-            slug_match = re.search(r'/([^/]+)/?$', post_url.rstrip('/'))
+            slug_match = _SLUG_RE.search(post_url.rstrip('/'))
             if not slug_match:
                 self.logger.error(f"Não foi possível extrair slug da URL: {post_url}")
                 return None
@@ -464,5 +527,5 @@ class WordPressClient:
             self.logger.error(f"Erro ao buscar post pela URL {post_url}: {e}")
             return None
 
-# Instância global do cliente WordPress
-wordpress_client = WordPressClient()
+# Instância global do cliente WordPress, uma por tenant (construída no primeiro uso)
+wordpress_client = LazySingleton(WordPressClient, scope=current_tenant)